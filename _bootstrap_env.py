@@ -0,0 +1,18 @@
+# _bootstrap_env.py
+"""
+Carrega o arquivo .env uma única vez por processo.
+
+Importado por config.py e pelos scripts avulsos no lugar de load_dotenv():
+o .env é lido numa só passada e só preenche variáveis que ainda não
+existem no ambiente (as do ambiente de produção têm precedência).
+"""
+import os
+from dotenv import dotenv_values
+
+if not os.environ.get("_DOTENV_LOADED"):
+    os.environ.update({
+        key: value
+        for key, value in dotenv_values().items()
+        if value is not None and key not in os.environ
+    })
+    os.environ["_DOTENV_LOADED"] = "1"
@@ -4,31 +4,137 @@ Combina múltiplas estratégias com proteções e otimizações
 """
 
 import asyncio
+import json
 import logging
+import os
+import re
+import statistics
 import time
-from typing import Dict, List, Optional, Set
-from dataclasses import dataclass, asdict
+from collections import OrderedDict, deque
+from typing import Dict, List, Optional, Set, Tuple
+from dataclasses import dataclass, field
 from decimal import Decimal
 from enum import Enum
 
+import numpy as np
+import websockets
 from web3 import Web3
 
+try:
+    import orjson
+    ORJSON_AVAILABLE = True
+except ImportError:
+    ORJSON_AVAILABLE = False
+
 from config import config
 from mempool_monitor import mempool_monitor, NewTokenEvent, add_mempool_callback
 from security_checker import check_token_safety, SecurityReport
-from dex_aggregator import get_best_price, execute_best_trade
-from utils import get_token_info, get_wallet_balance
+from dex_aggregator import get_best_price, execute_best_trade, batch_get_prices, close_aggregator, encode_sell_template
+from utils import get_token_info, get_wallet_balance, http_provider, njit
 from risk_manager import risk_manager
+from check_balance import warm_balance_cache
 from notifier import send as _send_telegram_alert
 
+logger = logging.getLogger(__name__)
+
+# Fila de alertas: o envio síncrono do notifier roda em thread, fora do event loop
+ALERT_COALESCE_SECONDS = 1.0
+_alert_queue: Optional[asyncio.Queue] = None
+_alert_loop: Optional[asyncio.AbstractEventLoop] = None
+_alert_tasks: Set[asyncio.Task] = set()  # mantém o worker vivo (o loop só guarda referência fraca)
+_last_alert: Tuple[str, float] = ("", 0.0)
+
+async def _alert_worker(queue: asyncio.Queue):
+    """Drena a fila de alertas enviando cada mensagem em uma thread"""
+    while True:
+        message = await queue.get()
+        try:
+            await asyncio.to_thread(_send_telegram_alert, message)
+        except Exception as e:
+            logger.error(f"Erro enviando alerta: {e}")
+        finally:
+            queue.task_done()
+
 async def send_telegram_alert(message: str):
-    """Wrapper assíncrono para envio de alertas do Telegram"""
-    try:
-        _send_telegram_alert(message)
-    except Exception as e:
-        logger.error(f"Erro enviando alerta: {e}")
+    """Enfileira alerta do Telegram sem bloquear o event loop"""
+    global _alert_queue, _alert_loop, _last_alert
+    
+    # Descarta alerta idêntico repetido dentro da janela
+    now = time.monotonic()
+    if message == _last_alert[0] and now - _last_alert[1] < ALERT_COALESCE_SECONDS:
+        return
+    _last_alert = (message, now)
+    
+    # Uma fila/worker por event loop
+    loop = asyncio.get_running_loop()
+    if _alert_loop is not loop:
+        _alert_queue = asyncio.Queue()
+        _alert_loop = loop
+        task = loop.create_task(_alert_worker(_alert_queue))
+        _alert_tasks.add(task)
+        task.add_done_callback(_alert_tasks.discard)
+        
+    _alert_queue.put_nowait(message)
 
-logger = logging.getLogger(__name__)
+# Endereços sentinela que nunca devem gerar cotação na DEX (20 bytes)
+INVALID_PRICE_ADDRESSES = {
+    b"\xee" * 20,  # placeholder de ETH nativo (0xeeee...)
+    b"\x00" * 20,  # endereço zero
+}
+
+# 1 ETH / 1 token (18 decimais) em wei
+WEI = Decimal(10**18)
+
+# Intervalos em nanossegundos (time.monotonic_ns)
+NS_1H = 3600 * 10**9
+NS_24H = 24 * NS_1H
+NS_7D = 7 * NS_24H
+
+@njit(cache=True)
+def _exit_mask(prices, stops, trailing, pnl_pct, tp_next, target_pct, age_ns, timeout_ns, timeout_pnl):
+    """Máscara vetorizada (SoA) das posições com possível condição de saída"""
+    return (
+        (prices <= stops)
+        | ((trailing > 0) & (prices <= trailing))
+        | (prices >= tp_next)
+        | (pnl_pct >= target_pct)
+        | ((age_ns > timeout_ns) & (pnl_pct < timeout_pnl))
+    )
+
+# Intervalo adaptativo do monitor: curto com volatilidade alta, longo com mercado parado
+POLL_MIN_SECONDS = 0.5
+POLL_MAX_SECONDS = 30.0
+POLL_VOL_REFERENCE = 0.05  # desvio dos retornos por tick que leva ao intervalo mínimo
+RETURNS_WINDOW = 20  # retornos recentes mantidos por posição
+
+# keccak("Sync(uint112,uint112)") - emitido pelo par V2 a cada swap/mint/burn
+SYNC_TOPIC = "0x1c411e9a96e071241c2f21f7726b17ae89e3cab4c78be50e062b03a9fffbbad1"
+
+# Símbolos de stablecoins/wrapped/staking que não são alvo do sniper
+CHEAP_REJECT_SYMBOL_RE = re.compile(r"usd|wrapped|staked|^w?eth$|^w?btc$", re.IGNORECASE)
+
+# Limite do LRU de tokens já processados
+MAX_PROCESSED_TOKENS = 50_000
+
+def _addr_key(address: str) -> bytes:
+    """Normaliza endereço hex para 20 bytes (chave compacta e case-insensitive)"""
+    return bytes.fromhex(address[2:] if address[:2].lower() == "0x" else address)
+
+def _addr_hex(key: bytes) -> str:
+    """Converte chave de 20 bytes de volta para hex (RPC, logs e Telegram)"""
+    return "0x" + key.hex()
+
+def _dumps_state(state: dict) -> bytes:
+    """Serializa o snapshot de estado (orjson quando disponível, Decimal vira string)"""
+    if ORJSON_AVAILABLE:
+        return orjson.dumps(state, default=str)
+    return json.dumps(state, default=str).encode()
+
+def _loads_state(data: bytes) -> dict:
+    """Lê o snapshot de estado"""
+    if ORJSON_AVAILABLE:
+        return orjson.loads(data)
+    return json.loads(data)
 
 class StrategyType(Enum):
     MEMECOIN_SNIPER = "memecoin_sniper"
@@ -41,17 +147,17 @@ class PositionStatus(Enum):
     STOP_LOSS = "stop_loss"
     CLOSED = "closed"
 
-@dataclass
+@dataclass(slots=True)
 class Position:
     """Posição de trading"""
     token_address: str
     token_symbol: str
     strategy_type: StrategyType
-    entry_price: float
-    entry_amount: Decimal
+    entry_price: float  # ETH por token
+    entry_amount: int  # quantidade de tokens em wei
     entry_time: int
     current_price: float
-    current_value: Decimal
+    current_value: int  # valor atual em wei de ETH
     pnl: float
     pnl_percentage: float
     status: PositionStatus
@@ -60,25 +166,146 @@ class Position:
     trailing_stop_price: float
     dex_name: str
     transaction_hash: str
+    entry_time_ns: int = field(default_factory=time.monotonic_ns)  # relógio monotônico
+    pair_address: str = ""  # par token/WETH para eventos Sync
+    sell_calldata_prefix: bytes = b""  # calldata de venda pré-codificado (V2)
+    tp_prices: List[float] = field(default_factory=list)  # gatilhos absolutos de take profit
+    next_tp_idx: int = 0  # próximo nível de take profit a disparar
+    returns: deque = field(
+        default_factory=lambda: deque(maxlen=RETURNS_WINDOW), repr=False, compare=False
+    )  # retornos recentes entre atualizações de preço
+    dirty: bool = field(default=True, repr=False, compare=False)  # mutada desde o último to_dict
+    _static_dict: dict = field(default=None, init=False, repr=False, compare=False)
+    _dict_cache: dict = field(default=None, init=False, repr=False, compare=False)
+    
+    def __post_init__(self):
+        # Gatilhos de take profit como preços absolutos (ordem crescente)
+        self.take_profit_levels.sort()
+        if not self.tp_prices:
+            self.tp_prices = [self.entry_price * (1 + level) for level in self.take_profit_levels]
+            
+        # Campos que não mudam após a abertura - serializados uma única vez
+        self._static_dict = {
+            'token_address': self.token_address,
+            'token_symbol': self.token_symbol,
+            'strategy_type': self.strategy_type.value,
+            'entry_price': self.entry_price,
+            'entry_time': self.entry_time,
+            'dex_name': self.dex_name,
+            'transaction_hash': self.transaction_hash,
+            'pair_address': self.pair_address,
+        }
     
     def to_dict(self) -> dict:
-        """Converte para dicionário"""
-        data = asdict(self)
-        data['strategy_type'] = self.strategy_type.value
-        data['status'] = self.status.value
-        data['entry_amount'] = str(self.entry_amount)
-        data['current_value'] = str(self.current_value)
-        return data
+        """Converte para dicionário (reaproveita a serialização se nada mudou)"""
+        if not self.dirty and self._dict_cache is not None:
+            return self._dict_cache
+        self.dirty = False
+        self._dict_cache = {
+            **self._static_dict,
+            'entry_amount': str(Decimal(self.entry_amount) / WEI),
+            'current_price': self.current_price,
+            'current_value': str(Decimal(self.current_value) / WEI),
+            'pnl': self.pnl,
+            'pnl_percentage': self.pnl_percentage,
+            'status': self.status.value,
+            'take_profit_levels': self.take_profit_levels[self.next_tp_idx:],
+            'stop_loss_price': self.stop_loss_price,
+            'trailing_stop_price': self.trailing_stop_price,
+        }
+        return self._dict_cache
+        
+    def to_state(self) -> dict:
+        """Estado completo para o snapshot em disco (wei como string - excede 64 bits)"""
+        return {
+            **self._static_dict,
+            'entry_amount': str(self.entry_amount),
+            'current_price': self.current_price,
+            'current_value': str(self.current_value),
+            'pnl': self.pnl,
+            'pnl_percentage': self.pnl_percentage,
+            'status': self.status.value,
+            'take_profit_levels': list(self.take_profit_levels),
+            'stop_loss_price': self.stop_loss_price,
+            'trailing_stop_price': self.trailing_stop_price,
+            'sell_calldata_prefix': self.sell_calldata_prefix.hex(),
+            'tp_prices': list(self.tp_prices),
+            'next_tp_idx': self.next_tp_idx,
+        }
+        
+    @classmethod
+    def from_state(cls, state: dict) -> "Position":
+        """Reconstrói a posição a partir do snapshot"""
+        # O relógio monotônico não sobrevive ao restart: reancora pela idade real
+        age_ns = max(0, int((time.time() - state['entry_time']) * 1e9))
+        return cls(
+            token_address=state['token_address'],
+            token_symbol=state['token_symbol'],
+            strategy_type=StrategyType(state['strategy_type']),
+            entry_price=state['entry_price'],
+            entry_amount=int(state['entry_amount']),
+            entry_time=state['entry_time'],
+            current_price=state['current_price'],
+            current_value=int(state['current_value']),
+            pnl=state['pnl'],
+            pnl_percentage=state['pnl_percentage'],
+            status=PositionStatus(state['status']),
+            take_profit_levels=state['take_profit_levels'],
+            stop_loss_price=state['stop_loss_price'],
+            trailing_stop_price=state['trailing_stop_price'],
+            dex_name=state['dex_name'],
+            transaction_hash=state['transaction_hash'],
+            entry_time_ns=time.monotonic_ns() - age_ns,
+            pair_address=state.get('pair_address', ""),
+            sell_calldata_prefix=bytes.fromhex(state.get('sell_calldata_prefix', "")),
+            tp_prices=state.get('tp_prices', []),
+            next_tp_idx=state.get('next_tp_idx', 0),
+        )
+
+# Regras de saída por estratégia: (alvo de pnl %, timeout em ns, pnl % mínimo no timeout)
+_EXIT_RULES = {
+    StrategyType.MEMECOIN_SNIPER: (200.0, NS_24H, 50.0),
+    StrategyType.ALTCOIN_SWING: (np.inf, NS_7D, 20.0),
+}
+_NO_EXIT_RULE = (np.inf, np.iinfo(np.int64).max, -np.inf)
 
 class AdvancedSniperStrategy:
     """Estratégia avançada de sniper com múltiplas funcionalidades"""
     
     def __init__(self):
-        self.w3 = Web3(Web3.HTTPProvider(config["RPC_URL"]))
+        self.w3 = Web3(http_provider())
         self.is_running = False
         self.is_paused = False  # Estado de pausa
-        self.positions: Dict[str, Position] = {}
-        self.processed_tokens: Set[str] = set()
+        self.positions: Dict[bytes, Position] = {}
+        # LRU limitado de tokens já processados (chaves de 20 bytes)
+        self.processed_tokens: "OrderedDict[bytes, None]" = OrderedDict()
+        
+        # Cache de preços {token: (preço, expira_em)} - TTL ~ tempo de bloco
+        self._price_cache: Dict[bytes, Tuple[float, float]] = {}
+        self.price_cache_ttl = float(config.get("PRICE_CACHE_TTL", 2.0))
+        self._weth_key = _addr_key(config.get("WETH") or "0x")
+        
+        # Cotações em andamento - chamadas concorrentes compartilham o mesmo future
+        self._inflight: Dict[bytes, asyncio.Future] = {}
+        
+        # Tarefas por posição acordadas a cada novo preço
+        self._price_updated: Dict[bytes, asyncio.Event] = {}
+        self._position_tasks: Dict[bytes, asyncio.Task] = {}
+        
+        # Preços empurrados via WebSocket (eventos Sync dos pares)
+        self.ws_url = config.get("WS_URL")
+        self._pairs: Dict[bytes, bytes] = {}  # par -> token
+        
+        # Back-pressure de RPC: análise de novos tokens e saídas usam semáforos
+        # separados para que um stop loss nunca espere atrás de novas entradas
+        self._rpc_sem = asyncio.Semaphore(config.get("RPC_CONCURRENCY", 8))
+        self._exit_sem = asyncio.Semaphore(config.get("EXIT_RPC_CONCURRENCY", 4))
+        
+        # Protege mutações de self.stats entre saídas concorrentes
+        self._stats_lock = asyncio.Lock()
+        
+        # Snapshot de posições/estatísticas - gravado só em trades e no shutdown
+        self.state_file = config.get("STATE_FILE", "./.cache/sniper_state.json")
         
         # Configurações da estratégia (ajustadas dinamicamente pelo modo turbo)
         self.max_positions = config.get("MAX_POSITIONS", 3)
@@ -108,6 +335,9 @@ class AdvancedSniperStrategy:
             "profit_reinvest_pct": config.get("ALTCOIN_PROFIT_REINVEST_PCT", 0.5)
         }
         
+        # Tokens descartados pelo pré-filtro local (sem RPC)
+        self._rejected_cheap = 0
+        
         # Estatísticas
         self.stats = {
             "total_trades": 0,
@@ -117,6 +347,7 @@ class AdvancedSniperStrategy:
             "worst_trade": 0.0,
             "start_time": int(time.time())
         }
+        self._start_ns = time.monotonic_ns()
         
         logger.info(f"✅ Estratégia inicializada - Modo Turbo: {config.get('TURBO_MODE', False)}")
         logger.info(f"💰 Trade Size: {self.trade_size_eth} ETH")
@@ -132,6 +363,13 @@ class AdvancedSniperStrategy:
         self.is_running = True
         logger.info("🚀 Iniciando estratégia avançada de sniper...")
         
+        # Restaura posições abertas antes do restart
+        self.load_state()
+        if self.positions:
+            asyncio.create_task(warm_balance_cache(
+                [position.token_address for position in self.positions.values()]
+            ))
+        
         # Adiciona callback para novos tokens
         add_mempool_callback(self._on_new_token)
         
@@ -141,6 +379,10 @@ class AdvancedSniperStrategy:
         # Inicia loop de monitoramento de posições
         asyncio.create_task(self._position_monitor_loop())
         
+        # Preços por push via WebSocket; o polling vira heartbeat
+        if self.ws_url:
+            asyncio.create_task(self._pair_event_loop())
+        
         # Inicia rebalanceamento de portfólio
         asyncio.create_task(self._portfolio_rebalance_loop())
         
@@ -149,10 +391,59 @@ class AdvancedSniperStrategy:
     async def stop_strategy(self):
         """Para a estratégia"""
         self.is_running = False
+        
+        # Acorda as tarefas de posição para que encerrem
+        for event in self._price_updated.values():
+            event.set()
+            
+        self.save_state()
         await mempool_monitor.stop_monitoring()
+        await close_aggregator()
         logger.info("🛑 Estratégia de sniper parada")
         await send_telegram_alert("🛑 Sniper Bot parado")
         
+    def save_state(self):
+        """Grava snapshot de posições e estatísticas com troca atômica do arquivo"""
+        if not self.state_file:
+            return
+        try:
+            data = _dumps_state({
+                "stats": self.stats,
+                "positions": [position.to_state() for position in self.positions.values()],
+            })
+            os.makedirs(os.path.dirname(self.state_file) or ".", exist_ok=True)
+            tmp_file = f"{self.state_file}.tmp"
+            with open(tmp_file, "wb") as f:
+                f.write(data)
+            os.replace(tmp_file, self.state_file)
+        except Exception as e:
+            logger.error(f"❌ Erro salvando estado da estratégia: {e}")
+            
+    def load_state(self):
+        """Restaura posições e estatísticas do último snapshot"""
+        if not self.state_file or not os.path.exists(self.state_file):
+            return
+        try:
+            with open(self.state_file, "rb") as f:
+                state = _loads_state(f.read())
+                
+            stats = state.get("stats", {})
+            stats["total_profit"] = Decimal(str(stats.get("total_profit", "0")))
+            self.stats.update(stats)
+            
+            for item in state.get("positions", []):
+                position = Position.from_state(item)
+                token_key = _addr_key(position.token_address)
+                self.positions[token_key] = position
+                if position.pair_address:
+                    self._pairs[_addr_key(position.pair_address)] = token_key
+                if self.is_running:
+                    self._start_position_task(token_key, position)
+                    
+            logger.info(f"✅ Estado restaurado: {len(self.positions)} posições")
+        except Exception as e:
+            logger.error(f"❌ Erro restaurando estado da estratégia: {e}")
+            
     def pause_strategy(self):
         """Pausa a estratégia temporariamente (mantém posições)"""
         self.is_paused = True
@@ -193,11 +484,18 @@ class AdvancedSniperStrategy:
                 
             token_address = event.token_address
             
+            # Pré-filtro determinístico antes de qualquer RPC
+            if self._cheap_reject(token_address):
+                self._rejected_cheap += 1
+                return
+                
+            token_key = _addr_key(token_address)
+            
             # Verifica se já processamos este token
-            if token_address in self.processed_tokens:
+            if token_key in self.processed_tokens:
                 return
                 
-            self.processed_tokens.add(token_address)
+            self._mark_processed(token_key)
             
             logger.info(f"🎯 Analisando novo token: {token_address[:10]}...")
             
@@ -207,7 +505,8 @@ class AdvancedSniperStrategy:
                 return
                 
             # Verifica segurança do token
-            security_report = await check_token_safety(token_address)
+            async with self._rpc_sem:
+                security_report = await check_token_safety(token_address)
             if not security_report.is_safe:
                 logger.warning(f"❌ Token rejeitado por segurança: {security_report.warnings}")
                 return
@@ -221,6 +520,28 @@ class AdvancedSniperStrategy:
         except Exception as e:
             logger.error(f"❌ Erro processando novo token: {e}")
             
+    def _cheap_reject(self, token_address: str, symbol: str = "") -> bool:
+        """Filtro local barato: endereço inválido/sentinela, já em carteira ou símbolo indesejado"""
+        try:
+            token_key = _addr_key(token_address)
+        except ValueError:
+            return True
+            
+        if len(token_key) != 20 or token_key in INVALID_PRICE_ADDRESSES or token_key == self._weth_key:
+            return True
+        if token_key in self.positions:
+            return True
+        if symbol and CHEAP_REJECT_SYMBOL_RE.search(symbol):
+            return True
+        return False
+        
+    def _mark_processed(self, token_key: bytes):
+        """Registra token no LRU de processados, descartando o mais antigo"""
+        self.processed_tokens[token_key] = None
+        self.processed_tokens.move_to_end(token_key)
+        if len(self.processed_tokens) > MAX_PROCESSED_TOKENS:
+            self.processed_tokens.popitem(last=False)
+            
     async def _execute_memecoin_strategy(self, event: NewTokenEvent, security_report: SecurityReport):
         """Executa estratégia para memecoins"""
         try:
@@ -236,11 +557,17 @@ class AdvancedSniperStrategy:
                 return
                 
             # Obtém informações do token
-            token_info = await get_token_info(token_address)
+            async with self._rpc_sem:
+                token_info = await get_token_info(token_address)
             if not token_info:
                 logger.warning("❌ Não foi possível obter informações do token")
                 return
                 
+            if self._cheap_reject(token_address, token_info.get("symbol", "")):
+                self._rejected_cheap += 1
+                logger.info(f"❌ Símbolo descartado pelo pré-filtro: {token_info.get('symbol')}")
+                return
+                
             # Calcula tamanho da posição
             position_size = min(
                 self.memecoin_config["max_investment"],
@@ -248,7 +575,8 @@ class AdvancedSniperStrategy:
             )
             
             # Verifica saldo disponível
-            wallet_balance = await get_wallet_balance()
+            async with self._rpc_sem:
+                wallet_balance = await get_wallet_balance()
             if wallet_balance < position_size:
                 logger.warning(f"❌ Saldo insuficiente: {wallet_balance} < {position_size}")
                 return
@@ -259,7 +587,8 @@ class AdvancedSniperStrategy:
                 amount_eth=position_size,
                 strategy_type=StrategyType.MEMECOIN_SNIPER,
                 dex_name=event.dex_name,
-                token_info=token_info
+                token_info=token_info,
+                pair_address=event.pair_address
             )
             
         except Exception as e:
@@ -271,10 +600,15 @@ class AdvancedSniperStrategy:
             token_address = event.token_address
             
             # Obtém informações do token
-            token_info = await get_token_info(token_address)
+            async with self._rpc_sem:
+                token_info = await get_token_info(token_address)
             if not token_info:
                 return
                 
+            if self._cheap_reject(token_address, token_info.get("symbol", "")):
+                self._rejected_cheap += 1
+                return
+                
             # Verifica critérios de altcoin
             market_cap = token_info.get("market_cap", 0)
             volume_24h = token_info.get("volume_24h", 0)
@@ -300,7 +634,8 @@ class AdvancedSniperStrategy:
                 amount_eth=position_size,
                 strategy_type=StrategyType.ALTCOIN_SWING,
                 dex_name=event.dex_name,
-                token_info=token_info
+                token_info=token_info,
+                pair_address=event.pair_address
             )
             
         except Exception as e:
@@ -312,7 +647,8 @@ class AdvancedSniperStrategy:
         amount_eth: Decimal, 
         strategy_type: StrategyType,
         dex_name: str,
-        token_info: dict
+        token_info: dict,
+        pair_address: str = ""
     ):
         """Executa ordem de compra"""
         try:
@@ -320,51 +656,65 @@ class AdvancedSniperStrategy:
             amount_wei = int(amount_eth * Decimal("1e18"))
             
             # Obtém melhor preço
-            best_quote = await get_best_price(
-                token_in=weth_address,
-                token_out=token_address,
-                amount_in=amount_wei,
-                is_buy=True
-            )
+            async with self._rpc_sem:
+                best_quote = await get_best_price(
+                    token_in=weth_address,
+                    token_out=token_address,
+                    amount_in=amount_wei,
+                    is_buy=True
+                )
             
             if not best_quote:
                 logger.warning("❌ Nenhuma cotação disponível")
                 return
                 
             # Executa trade
-            result = await execute_best_trade(
-                token_in=weth_address,
-                token_out=token_address,
-                amount_in=amount_wei,
-                is_buy=True
-            )
+            async with self._rpc_sem:
+                result = await execute_best_trade(
+                    token_in=weth_address,
+                    token_out=token_address,
+                    amount_in=amount_wei,
+                    is_buy=True
+                )
             
             if not result.get("success"):
                 logger.error(f"❌ Falha na compra: {result.get('error')}")
                 return
                 
-            # Cria posição
+            # Cria posição (quantidades em wei, preço em ETH por token)
+            amount_out = int(result["amount_out"])
+            entry_price = amount_wei / amount_out
             position = Position(
                 token_address=token_address,
                 token_symbol=token_info.get("symbol", "UNKNOWN"),
                 strategy_type=strategy_type,
-                entry_price=float(amount_eth / Decimal(str(result["amount_out"] / 1e18))),
-                entry_amount=Decimal(str(result["amount_out"] / 1e18)),
+                entry_price=entry_price,
+                entry_amount=amount_out,
                 entry_time=int(time.time()),
-                current_price=float(amount_eth / Decimal(str(result["amount_out"] / 1e18))),
-                current_value=amount_eth,
+                current_price=entry_price,
+                current_value=amount_wei,
                 pnl=0.0,
                 pnl_percentage=0.0,
                 status=PositionStatus.ACTIVE,
                 take_profit_levels=self.take_profit_levels.copy(),
-                stop_loss_price=float(amount_eth / Decimal(str(result["amount_out"] / 1e18))) * (1 - self.stop_loss_pct),
+                stop_loss_price=entry_price * (1 - self.stop_loss_pct),
                 trailing_stop_price=0.0,
                 dex_name=best_quote.dex_quote.dex_name,
-                transaction_hash=result["tx_hash"]
+                transaction_hash=result["tx_hash"],
+                pair_address=pair_address or ""
             )
             
-            self.positions[token_address] = position
-            self.stats["total_trades"] += 1
+            position.sell_calldata_prefix = self._encode_sell_calldata(token_address)
+            
+            token_key = _addr_key(token_address)
+            self.positions[token_key] = position
+            if position.pair_address:
+                self._pairs[_addr_key(position.pair_address)] = token_key
+            if self.is_running:
+                self._start_position_task(token_key, position)
+            async with self._stats_lock:
+                self.stats["total_trades"] += 1
+            self.save_state()
             
             # Notifica compra
             await self._notify_position_opened(position)
@@ -374,76 +724,290 @@ class AdvancedSniperStrategy:
         except Exception as e:
             logger.error(f"❌ Erro executando compra: {e}")
             
+    def _encode_sell_calldata(self, token_address: str) -> bytes:
+        """Pré-codifica o calldata de venda da posição (seletor + path + carteira)"""
+        try:
+            wallet = config.get("WALLET")
+            if not wallet:
+                return b""
+            return encode_sell_template(token_address, config["WETH"], wallet)
+        except Exception as e:
+            logger.debug(f"Erro pré-codificando calldata de {token_address}: {e}")
+            return b""
+            
     async def _position_monitor_loop(self):
         """Loop de monitoramento de posições"""
         while self.is_running:
             try:
                 await self._update_positions()
                 await self._check_exit_conditions()
-                await asyncio.sleep(5)  # Verifica a cada 5 segundos
+                # Polling só cobre lacunas entre eventos - intervalo segue a volatilidade
+                await asyncio.sleep(self._next_poll_interval())
             except Exception as e:
                 logger.error(f"❌ Erro no monitoramento de posições: {e}")
                 await asyncio.sleep(10)
                 
-    async def _update_positions(self):
-        """Atualiza preços e valores das posições"""
-        for token_address, position in self.positions.items():
+    def _next_poll_interval(self) -> float:
+        """Intervalo até o próximo polling a partir da volatilidade recente das posições"""
+        sigma = 0.0
+        for position in self.positions.values():
+            if len(position.returns) > 1:
+                sigma = max(sigma, statistics.pstdev(position.returns))
+        interval = POLL_MIN_SECONDS * POLL_VOL_REFERENCE / max(sigma, 1e-4)
+        return min(POLL_MAX_SECONDS, max(POLL_MIN_SECONDS, interval))
+        
+    async def _pair_event_loop(self):
+        """Recebe eventos Sync dos pares das posições via eth_subscribe"""
+        while self.is_running:
             try:
-                if position.status != PositionStatus.ACTIVE:
-                    continue
-                    
-                # Obtém preço atual
-                current_price = await self._get_current_price(token_address)
-                if not current_price:
-                    continue
+                async with websockets.connect(self.ws_url) as websocket:
+                    logger.info("✅ WebSocket conectado para eventos de pares")
+                    subscribed = None
+                    subscription_id = None
                     
-                # Atualiza posição
-                position.current_price = current_price
-                position.current_value = Decimal(str(current_price)) * position.entry_amount
-                position.pnl = float(position.current_value - (position.entry_price * position.entry_amount))
-                position.pnl_percentage = (current_price / position.entry_price - 1) * 100
-                
-                # Atualiza trailing stop
-                if position.pnl_percentage > 0:
-                    new_trailing_stop = current_price * (1 - self.trailing_stop_pct)
-                    if new_trailing_stop > position.trailing_stop_price:
-                        position.trailing_stop_price = new_trailing_stop
-                        
+                    while self.is_running:
+                        # (Re)assina quando o conjunto de pares muda
+                        if subscribed is None or self._pairs.keys() != subscribed:
+                            if subscription_id:
+                                await websocket.send(json.dumps({
+                                    "id": 2, "method": "eth_unsubscribe", "params": [subscription_id]
+                                }))
+                                subscription_id = None
+                            subscribed = frozenset(self._pairs)
+                            if subscribed:
+                                await websocket.send(json.dumps({
+                                    "id": 1,
+                                    "method": "eth_subscribe",
+                                    "params": ["logs", {
+                                        "address": [_addr_hex(pair) for pair in subscribed],
+                                        "topics": [SYNC_TOPIC]
+                                    }]
+                                }))
+                                
+                        try:
+                            message = await asyncio.wait_for(websocket.recv(), timeout=1)
+                        except asyncio.TimeoutError:
+                            continue
+                            
+                        data = json.loads(message)
+                        if data.get("id") == 1:
+                            subscription_id = data.get("result")
+                            continue
+                            
+                        log = data.get("params", {}).get("result")
+                        if log:
+                            await self._on_sync_log(log)
+                            
             except Exception as e:
-                logger.error(f"❌ Erro atualizando posição {token_address}: {e}")
+                logger.error(f"❌ Erro no WebSocket de pares: {e}")
+                await asyncio.sleep(5)
                 
-    async def _check_exit_conditions(self):
-        """Verifica condições de saída das posições"""
-        for token_address, position in list(self.positions.items()):
-            try:
-                if position.status != PositionStatus.ACTIVE:
-                    continue
-                    
-                # Verifica stop loss
-                if position.current_price <= position.stop_loss_price:
-                    await self._execute_exit(position, "Stop Loss")
-                    continue
+    async def _on_sync_log(self, log: dict):
+        """Recalcula o preço localmente a partir das reservas do evento Sync"""
+        try:
+            token_key = self._pairs.get(_addr_key(log["address"]))
+            position = self.positions.get(token_key) if token_key else None
+            if position is None or position.status != PositionStatus.ACTIVE:
+                return
+                
+            data = bytes.fromhex(log["data"][2:])
+            reserve0 = int.from_bytes(data[:32], "big")
+            reserve1 = int.from_bytes(data[32:64], "big")
+            
+            # token0 é o menor endereço do par
+            if token_key < self._weth_key:
+                reserve_token, reserve_weth = reserve0, reserve1
+            else:
+                reserve_token, reserve_weth = reserve1, reserve0
+            if reserve_token == 0 or reserve_weth == 0:
+                return
+                
+            # getAmountOut V2 (taxa de 0.3%) para 1 token, igual à cotação do router
+            amount_in_with_fee = 10**18 * 997
+            amount_out = amount_in_with_fee * reserve_weth // (reserve_token * 1000 + amount_in_with_fee)
+            price = amount_out / 1e18
+            
+            self._store_price(token_key, price)
+            await self._update_one(token_key, position, price)
+            
+        except Exception as e:
+            logger.debug(f"Erro processando evento Sync: {e}")
+            
+    async def _update_positions(self):
+        """Atualiza preços e valores das posições"""
+        active = {
+            token_key: position
+            for token_key, position in self.positions.items()
+            if position.status == PositionStatus.ACTIVE
+        }
+        if not active:
+            return
+            
+        # Usa preços em cache e cota o restante em um único multicall
+        prices: Dict[bytes, float] = {}
+        stale: Dict[str, bytes] = {}
+        for token_key, position in active.items():
+            cached = self._get_cached_price(token_key)
+            if cached is not None:
+                prices[token_key] = cached
+            elif self._is_quotable(token_key):
+                stale[position.token_address] = token_key
+                
+        if stale:
+            async with self._exit_sem:
+                fetched = await batch_get_prices(list(stale), config["WETH"], int(1e18))
+            for token_address, price in fetched.items():
+                token_key = stale[token_address]
+                self._store_price(token_key, price)
+                prices[token_key] = price
+                
+            # O multicall só cobre routers V2: o restante (ex.: pools só V3)
+            # é cotado individualmente pelo agregador
+            missing = [token_key for token_key in stale.values() if token_key not in prices]
+            if missing:
+                quoted = await asyncio.gather(*(self._get_current_price(_addr_hex(k)) for k in missing))
+                prices.update((k, p) for k, p in zip(missing, quoted) if p)
+        
+        # Atualiza as posições concorrentemente
+        await asyncio.gather(
+            *(self._update_one(token_key, position, prices.get(token_key))
+              for token_key, position in active.items()),
+            return_exceptions=True
+        )
+        
+    async def _update_one(self, token_key: bytes, position: Position, current_price: Optional[float]):
+        """Atualiza preço e valor de uma posição"""
+        try:
+            if not current_price:
+                return
+                
+            # Preço inalterado (comum entre blocos): nada a recalcular, mas a
+            # tarefa ainda precisa acordar para as saídas por tempo
+            if abs(current_price - position.current_price) <= position.current_price * 1e-9:
+                position.returns.append(0.0)
+                self._wake_position(token_key)
+                return
+                
+            # Registra o retorno para o intervalo adaptativo de polling
+            if position.current_price > 0:
+                position.returns.append(current_price / position.current_price - 1)
+                
+            # Atualiza posição
+            position.dirty = True
+            position.current_price = current_price
+            position.current_value = int(current_price * position.entry_amount)
+            position.pnl = (current_price - position.entry_price) * position.entry_amount / 1e18
+            position.pnl_percentage = (current_price / position.entry_price - 1) * 100
+            
+            # Atualiza trailing stop
+            if position.pnl_percentage > 0:
+                position.trailing_stop_price = max(
+                    position.trailing_stop_price, current_price * (1 - self.trailing_stop_pct)
+                )
                     
-                # Verifica trailing stop
-                if position.trailing_stop_price > 0 and position.current_price <= position.trailing_stop_price:
-                    await self._execute_exit(position, "Trailing Stop")
-                    continue
+            # Acorda a tarefa da posição para avaliar saída
+            self._wake_position(token_key)
                     
-                # Verifica take profit levels
-                for i, tp_level in enumerate(position.take_profit_levels):
-                    if position.pnl_percentage >= tp_level * 100:
-                        await self._execute_partial_exit(position, i, tp_level)
-                        break
-                        
-                # Verifica condições específicas por estratégia
-                if position.strategy_type == StrategyType.MEMECOIN_SNIPER:
-                    await self._check_memecoin_exit_conditions(position)
-                elif position.strategy_type == StrategyType.ALTCOIN_SWING:
-                    await self._check_altcoin_exit_conditions(position)
+        except Exception as e:
+            logger.error(f"❌ Erro atualizando posição {position.token_address}: {e}")
+            
+    def _wake_position(self, token_key: bytes):
+        """Sinaliza a tarefa da posição para reavaliar as saídas"""
+        event = self._price_updated.get(token_key)
+        if event is not None:
+            event.set()
+            
+    async def _check_exit_conditions(self):
+        """Verifica saída das posições sem tarefa própria (fallback)"""
+        pending = [
+            position
+            for token_key, position in self.positions.items()
+            if token_key not in self._position_tasks and position.status == PositionStatus.ACTIVE
+        ]
+        if not pending:
+            return
+            
+        # Avalia todas as posições em uma passada vetorizada e só
+        # executa a lógica completa de saída para as candidatas
+        mask = self._exit_candidates(pending)
+        await asyncio.gather(
+            *(self._check_position_exit(position) for position, hit in zip(pending, mask) if hit),
+            return_exceptions=True
+        )
+        
+    def _exit_candidates(self, positions: List[Position]) -> np.ndarray:
+        """Empacota as posições em arrays paralelos e calcula a máscara de saída"""
+        n = len(positions)
+        now_ns = time.monotonic_ns()
+        rules = [_EXIT_RULES.get(p.strategy_type, _NO_EXIT_RULE) for p in positions]
+        
+        prices = np.fromiter((p.current_price for p in positions), dtype=np.float64, count=n)
+        stops = np.fromiter((p.stop_loss_price for p in positions), dtype=np.float64, count=n)
+        trailing = np.fromiter((p.trailing_stop_price for p in positions), dtype=np.float64, count=n)
+        pnl_pct = np.fromiter((p.pnl_percentage for p in positions), dtype=np.float64, count=n)
+        tp_next = np.fromiter(
+            (p.tp_prices[p.next_tp_idx] if p.next_tp_idx < len(p.tp_prices) else np.inf for p in positions),
+            dtype=np.float64, count=n
+        )
+        age_ns = np.fromiter((now_ns - p.entry_time_ns for p in positions), dtype=np.int64, count=n)
+        target_pct = np.fromiter((r[0] for r in rules), dtype=np.float64, count=n)
+        timeout_ns = np.fromiter((r[1] for r in rules), dtype=np.int64, count=n)
+        timeout_pnl = np.fromiter((r[2] for r in rules), dtype=np.float64, count=n)
+        
+        return _exit_mask(prices, stops, trailing, pnl_pct, tp_next, target_pct, age_ns, timeout_ns, timeout_pnl)
+        
+    def _start_position_task(self, token_key: bytes, position: Position):
+        """Cria a tarefa que avalia saídas da posição a cada novo preço"""
+        self._price_updated[token_key] = asyncio.Event()
+        self._position_tasks[token_key] = asyncio.create_task(self._position_task(token_key, position))
+        
+    async def _position_task(self, token_key: bytes, position: Position):
+        """Aguarda atualizações de preço e avalia condições de saída"""
+        event = self._price_updated[token_key]
+        try:
+            while self.is_running and position.status != PositionStatus.CLOSED:
+                await event.wait()
+                event.clear()
+                if not self.is_running or position.status == PositionStatus.CLOSED:
+                    break
+                await self._check_position_exit(position)
+        except Exception as e:
+            logger.error(f"❌ Erro na tarefa da posição {position.token_address}: {e}")
+        finally:
+            self._price_updated.pop(token_key, None)
+            self._position_tasks.pop(token_key, None)
+        
+    async def _check_position_exit(self, position: Position):
+        """Verifica condições de saída de uma posição"""
+        try:
+            if position.status != PositionStatus.ACTIVE:
+                return
+                
+            # Verifica stop loss
+            if position.current_price <= position.stop_loss_price:
+                await self._execute_exit(position, "Stop Loss")
+                return
+                
+            # Verifica trailing stop
+            if position.trailing_stop_price > 0 and position.current_price <= position.trailing_stop_price:
+                await self._execute_exit(position, "Trailing Stop")
+                return
+                
+            # Verifica take profit (preços absolutos pré-calculados na abertura)
+            idx = position.next_tp_idx
+            while idx < len(position.tp_prices) and position.current_price >= position.tp_prices[idx]:
+                await self._execute_partial_exit(position, idx, position.take_profit_levels[idx])
+                idx += 1
                     
-            except Exception as e:
-                logger.error(f"❌ Erro verificando saída {token_address}: {e}")
+            # Verifica condições específicas por estratégia
+            if position.strategy_type == StrategyType.MEMECOIN_SNIPER:
+                await self._check_memecoin_exit_conditions(position)
+            elif position.strategy_type == StrategyType.ALTCOIN_SWING:
+                await self._check_altcoin_exit_conditions(position)
                 
+        except Exception as e:
+            logger.error(f"❌ Erro verificando saída {position.token_address}: {e}")
+            
     async def _check_memecoin_exit_conditions(self, position: Position):
         """Verifica condições específicas de saída para memecoins"""
         # Saída automática ao atingir 2x (200% de lucro)
@@ -451,42 +1015,47 @@ class AdvancedSniperStrategy:
             await self._execute_exit(position, "Target 2x atingido")
             
         # Saída por tempo (24h para memecoins)
-        age_hours = (time.time() - position.entry_time) / 3600
-        if age_hours > 24 and position.pnl_percentage < 50:  # Se não teve 50% em 24h
+        age_ns = time.monotonic_ns() - position.entry_time_ns
+        if age_ns > NS_24H and position.pnl_percentage < 50:  # Se não teve 50% em 24h
             await self._execute_exit(position, "Timeout 24h")
             
     async def _check_altcoin_exit_conditions(self, position: Position):
         """Verifica condições específicas de saída para altcoins"""
         # Lógica mais conservadora para altcoins
-        age_days = (time.time() - position.entry_time) / 86400
+        age_ns = time.monotonic_ns() - position.entry_time_ns
         
         # Saída por tempo (7 dias para altcoins)
-        if age_days > 7 and position.pnl_percentage < 20:  # Se não teve 20% em 7 dias
+        if age_ns > NS_7D and position.pnl_percentage < 20:  # Se não teve 20% em 7 dias
             await self._execute_exit(position, "Timeout 7 dias")
             
     async def _execute_partial_exit(self, position: Position, level_index: int, tp_level: float):
         """Executa saída parcial no take profit"""
         try:
-            # Remove o nível de take profit já atingido
-            position.take_profit_levels.pop(level_index)
+            # Avança para o próximo nível de take profit
+            position.next_tp_idx = max(position.next_tp_idx, level_index + 1)
+            position.dirty = True
             
             # Vende 25% da posição
-            sell_amount = position.entry_amount * Decimal("0.25")
+            sell_amount = position.entry_amount // 4
             
-            result = await execute_best_trade(
-                token_in=position.token_address,
-                token_out=config["WETH"],
-                amount_in=int(sell_amount * Decimal("1e18")),
-                is_buy=False
-            )
+            async with self._exit_sem:
+                result = await execute_best_trade(
+                    token_in=position.token_address,
+                    token_out=config["WETH"],
+                    amount_in=sell_amount,
+                    is_buy=False,
+                    calldata_template=position.sell_calldata_prefix
+                )
             
             if result.get("success"):
                 # Atualiza posição
                 position.entry_amount -= sell_amount
                 position.status = PositionStatus.TAKING_PROFIT
                 
-                profit = float(Decimal(str(result["amount_out"] / 1e18)) - (sell_amount * Decimal(str(position.entry_price))))
-                self.stats["total_profit"] += Decimal(str(profit))
+                profit = (result["amount_out"] - sell_amount * position.entry_price) / 1e18
+                async with self._stats_lock:
+                    self.stats["total_profit"] += Decimal(str(profit))
+                self.save_state()
                 
                 await self._notify_partial_exit(position, tp_level, profit)
                 
@@ -498,32 +1067,43 @@ class AdvancedSniperStrategy:
     async def _execute_exit(self, position: Position, reason: str):
         """Executa saída completa da posição"""
         try:
-            result = await execute_best_trade(
-                token_in=position.token_address,
-                token_out=config["WETH"],
-                amount_in=int(position.entry_amount * Decimal("1e18")),
-                is_buy=False
-            )
+            async with self._exit_sem:
+                result = await execute_best_trade(
+                    token_in=position.token_address,
+                    token_out=config["WETH"],
+                    amount_in=position.entry_amount,
+                    is_buy=False,
+                    calldata_template=position.sell_calldata_prefix
+                )
             
             if result.get("success"):
                 # Calcula lucro/prejuízo
-                exit_value = Decimal(str(result["amount_out"] / 1e18))
-                entry_value = position.entry_amount * Decimal(str(position.entry_price))
-                pnl = float(exit_value - entry_value)
+                pnl = (result["amount_out"] - position.entry_amount * position.entry_price) / 1e18
                 
                 # Atualiza estatísticas
-                self.stats["total_profit"] += Decimal(str(pnl))
-                if pnl > 0:
-                    self.stats["winning_trades"] += 1
-                    if pnl > self.stats["best_trade"]:
-                        self.stats["best_trade"] = pnl
-                else:
-                    if pnl < self.stats["worst_trade"]:
-                        self.stats["worst_trade"] = pnl
+                async with self._stats_lock:
+                    self.stats["total_profit"] += Decimal(str(pnl))
+                    if pnl > 0:
+                        self.stats["winning_trades"] += 1
+                        if pnl > self.stats["best_trade"]:
+                            self.stats["best_trade"] = pnl
+                    else:
+                        if pnl < self.stats["worst_trade"]:
+                            self.stats["worst_trade"] = pnl
                         
                 # Remove posição
+                token_key = _addr_key(position.token_address)
                 position.status = PositionStatus.CLOSED
-                del self.positions[position.token_address]
+                position.dirty = True
+                self.positions.pop(token_key, None)
+                if position.pair_address:
+                    self._pairs.pop(_addr_key(position.pair_address), None)
+                
+                # Encerra a tarefa da posição
+                event = self._price_updated.get(token_key)
+                if event is not None:
+                    event.set()
+                self.save_state()
                 
                 await self._notify_position_closed(position, reason, pnl)
                 
@@ -562,19 +1142,72 @@ class AdvancedSniperStrategy:
         except Exception as e:
             logger.error(f"❌ Erro no rebalanceamento: {e}")
             
+    def _is_quotable(self, token_key: bytes) -> bool:
+        """Filtra endereços vazios/sentinela antes de gastar RPC"""
+        return (
+            len(token_key) == 20
+            and token_key not in INVALID_PRICE_ADDRESSES
+            and token_key != self._weth_key
+        )
+        
+    def _get_cached_price(self, token_key: bytes) -> Optional[float]:
+        """Retorna preço em cache se ainda dentro do TTL"""
+        cached = self._price_cache.get(token_key)
+        if cached and time.monotonic() < cached[1]:
+            return cached[0]
+        return None
+        
+    def _store_price(self, token_key: bytes, price: float):
+        """Armazena preço no cache com expiração"""
+        self._price_cache[token_key] = (price, time.monotonic() + self.price_cache_ttl)
+        
     async def _get_current_price(self, token_address: str) -> Optional[float]:
-        """Obtém preço atual do token"""
+        """Obtém preço atual do token (cache + single-flight)"""
+        try:
+            token_key = _addr_key(token_address)
+        except ValueError:
+            return None
+            
+        if not self._is_quotable(token_key):
+            return None
+            
+        cached = self._get_cached_price(token_key)
+        if cached is not None:
+            return cached
+            
+        # Reaproveita cotação já em andamento para o mesmo token
+        inflight = self._inflight.get(token_key)
+        if inflight is not None:
+            return await asyncio.shield(inflight)
+            
+        future = asyncio.get_running_loop().create_future()
+        self._inflight[token_key] = future
+        try:
+            price = await self._quote_price(token_key)
+            future.set_result(price)
+            return price
+        finally:
+            if not future.done():
+                future.set_result(None)
+            del self._inflight[token_key]
+            
+    async def _quote_price(self, token_key: bytes) -> Optional[float]:
+        """Cota o token na DEX e atualiza o cache"""
+        token_address = _addr_hex(token_key)
         try:
             # Usa cotação pequena para obter preço
-            quote = await get_best_price(
-                token_in=token_address,
-                token_out=config["WETH"],
-                amount_in=int(1e18),  # 1 token
-                is_buy=False
-            )
+            async with self._exit_sem:
+                quote = await get_best_price(
+                    token_in=token_address,
+                    token_out=config["WETH"],
+                    amount_in=int(1e18),  # 1 token
+                    is_buy=False
+                )
             
             if quote:
-                return quote.dex_quote.amount_out / 1e18
+                price = quote.dex_quote.amount_out / 1e18
+                self._store_price(token_key, price)
+                return price
             return None
             
         except Exception as e:
@@ -587,7 +1220,7 @@ class AdvancedSniperStrategy:
             f"🎯 NOVA POSIÇÃO ABERTA\n\n"
             f"Token: {position.token_symbol}\n"
             f"Estratégia: {position.strategy_type.value}\n"
-            f"Valor: {position.entry_amount:.4f} ETH\n"
+            f"Valor: {position.current_value / 1e18:.4f} ETH\n"
             f"Preço: {position.entry_price:.8f}\n"
             f"DEX: {position.dex_name}\n"
             f"TX: {position.transaction_hash[:10]}..."
@@ -612,7 +1245,7 @@ class AdvancedSniperStrategy:
             f"Token: {position.token_symbol}\n"
             f"Motivo: {reason}\n"
             f"PnL: {pnl:+.4f} ETH ({position.pnl_percentage:+.1f}%)\n"
-            f"Duração: {(time.time() - position.entry_time) / 3600:.1f}h"
+            f"Duração: {(time.monotonic_ns() - position.entry_time_ns) / NS_1H:.1f}h"
         )
         await send_telegram_alert(message)
         
@@ -631,7 +1264,8 @@ class AdvancedSniperStrategy:
             "total_profit": float(self.stats["total_profit"]),
             "best_trade": self.stats["best_trade"],
             "worst_trade": self.stats["worst_trade"],
-            "uptime_hours": (time.time() - self.stats["start_time"]) / 3600
+            "rejected_cheap": self._rejected_cheap,
+            "uptime_hours": (time.monotonic_ns() - self._start_ns) / NS_1H
         }
         
     def get_active_positions(self) -> List[dict]:
@@ -1,17 +1,19 @@
 # advanced_strategy.py
 
 import asyncio
+import functools
 import logging
+import re
 import traceback
 import numpy as np
 from decimal import Decimal
 from time import time
 from typing import Tuple, Dict, List, Optional
 from dataclasses import dataclass
-from enum import Enum
+from enum import IntEnum
 
 try:
-    from web3 import Web3
+    from web3 import Web3, AsyncWeb3
     WEB3_AVAILABLE = True
 except ImportError:
     WEB3_AVAILABLE = False
@@ -22,6 +24,12 @@ try:
 except ImportError:
     TELEGRAM_AVAILABLE = False
 
+try:
+    import ahocorasick
+    AHOCORASICK_AVAILABLE = True
+except ImportError:
+    AHOCORASICK_AVAILABLE = False
+
 from config import config
 from telegram_alert import TelegramAlert
 from dex import DexClient, DexVersion
@@ -38,19 +46,192 @@ from utils import (
     is_token_concentrated,
     rate_limiter,
     configure_rate_limiter_from_config,
+    njit,
+    prange,
+    http_provider,
+    async_http_provider,
+    batch_eth_call,
+    to_checksum,
 )
 
 log = logging.getLogger("advanced_sniper")
 configure_rate_limiter_from_config(config)
 
-class SignalStrength(Enum):
+# Tamanho do histórico de preços por token e janelas dos indicadores
+PRICE_HISTORY_SIZE = 50
+RSI_PERIOD = 14
+MOMENTUM_WINDOW = 5
+
+# Alertas do Telegram agrupados em um único send_message por janela
+ALERT_FLUSH_DELAY = 0.5
+ALERT_BATCH_MAX_CHARS = 3800  # limite do Telegram é 4096 por mensagem
+ALERT_SEPARATOR = escape_md_v2("\n---\n")
+
+# Aritmética de trade em wei (int); Decimal só na fronteira com o executor
+WEI_PER_ETH = 10**18
+WEI_DECIMAL = Decimal(WEI_PER_ETH)
+PRICE_QUOTE_AMOUNT = 10**18  # 1 token (18 decimals), same quote as DexClient.get_token_price
+PPM = 1_000_000  # frações (tamanho de posição, % de venda) em partes por milhão
+
+def to_wei(x: float) -> int:
+    """ETH -> wei"""
+    return int(x * WEI_PER_ETH)
+
+def from_wei(w: int) -> float:
+    """wei -> ETH"""
+    return w * 1e-18
+
+@njit(cache=True, fastmath=True)
+def _rsi_njit(prices, period):
+    """RSI simples em um único laço sobre os últimos period+1 preços"""
+    n = prices.shape[0]
+    gain = 0.0
+    loss = 0.0
+    for i in range(n - period, n):
+        d = prices[i] - prices[i - 1]
+        if d > 0:
+            gain += d
+        else:
+            loss -= d
+    if loss == 0:
+        return 100.0
+    return 100.0 - 100.0 / (1.0 + (gain / period) / (loss / period))
+
+# Especializações para os períodos fixos usados em produção: a assinatura explícita
+# compila na importação (sem stall na primeira chamada) e fixa o tamanho do laço
+@njit('float64(float64[::1])', cache=True, fastmath=True, boundscheck=False)
+def _rsi14(prices):
+    """RSI(14) sobre exatamente os últimos 15 preços (array contíguo)"""
+    gain = 0.0
+    loss = 0.0
+    for i in range(1, 15):
+        d = prices[i] - prices[i - 1]
+        if d > 0:
+            gain += d
+        else:
+            loss -= d
+    if loss == 0.0:
+        return 100.0
+    return 100.0 - 100.0 / (1.0 + gain / loss)
+
+@njit('float64(float64[::1])', cache=True, fastmath=True, boundscheck=False)
+def _momentum5(prices):
+    """Momentum sobre exatamente os últimos 5 preços (array contíguo)"""
+    if prices[0] <= 0:
+        return 0.0
+    return (prices[4] - prices[0]) / prices[0]
+
+@njit(cache=True)
+def _ring_ordered(buf, head, count):
+    """Copia contígua, em ordem cronológica, dos preços de uma linha do buffer circular"""
+    size = buf.shape[0]
+    out = np.empty(count, dtype=np.float64)
+    start = head - count
+    for k in range(count):
+        out[k] = buf[(start + k) % size]
+    return out
+
+# Gerador único para os placeholders de volume/liquidez/holders (compatível com Numba)
+_RNG = np.random.default_rng(seed=42)
+
+# Pesos dos indicadores: rsi, volume, liquidez, momentum, holders
+_WEIGHTS = np.array([0.2, 0.25, 0.2, 0.2, 0.15], dtype=np.float64)
+
+def _score_features(rsi, volume_spike, liquidity_growth, price_momentum, holder_distribution) -> np.ndarray:
+    """Matriz (N, 5) de features não normalizadas; o score é clip(feats, 0, 1) @ _WEIGHTS"""
+    rsi_dist = np.abs(np.asarray(rsi, dtype=np.float64) - 50)
+    return np.column_stack((
+        np.where(rsi_dist <= 20, 1.0, 1 - rsi_dist / 50),  # RSI 30-70 range is good
+        np.asarray(volume_spike) / 3.0,  # higher is better, capped at 3x
+        np.asarray(liquidity_growth) + 0.2,  # positive growth is good
+        np.asarray(price_momentum) + 0.1,  # positive, but not too extreme
+        holder_distribution,  # higher is better
+    ))
+
+@njit(parallel=True, cache=True)
+def _batch_analyze(prices, heads, counts, rows, out_rsi, out_mom):
+    """RSI e momentum das linhas `rows` da TokenTable em uma única passada"""
+    for j in prange(rows.shape[0]):
+        r = rows[j]
+        count = counts[r]
+        ordered = _ring_ordered(prices[r], heads[r], count)
+        out_rsi[j] = _rsi14(ordered[count - 15:]) if count >= 15 else 50.0
+        out_mom[j] = _momentum5(ordered[count - 5:]) if count >= 5 else 0.0
+
+class TokenTable:
+    """Tokens analisados em layout SoA: uma linha por token, uma coluna NumPy por atributo"""
+    
+    def __init__(self, capacity: int = 64, window: int = PRICE_HISTORY_SIZE):
+        self.token_ids: Dict[str, int] = {}
+        self.prices = np.zeros((capacity, window), dtype=np.float64)
+        self.times = np.zeros((capacity, window), dtype=np.float64)
+        self.heads = np.zeros(capacity, dtype=np.int32)
+        self.counts = np.zeros(capacity, dtype=np.int32)
+        self.entry = np.zeros(capacity, dtype=np.float64)
+        self.highest = np.zeros(capacity, dtype=np.float64)
+        self.tp_hit = np.zeros(capacity, dtype=np.int32)
+    
+    def __len__(self) -> int:
+        return len(self.token_ids)
+    
+    def __contains__(self, token: str) -> bool:
+        return token in self.token_ids
+    
+    def row(self, token: str) -> int:
+        """Linha do token, alocando uma nova se necessário"""
+        row = self.token_ids.get(token)
+        if row is None:
+            row = len(self.token_ids)
+            if row == self.heads.shape[0]:
+                self._grow()
+            self.token_ids[token] = row
+        return row
+    
+    def _grow(self):
+        """Dobra a capacidade de todas as colunas"""
+        for name in ("prices", "times", "heads", "counts", "entry", "highest", "tp_hit"):
+            old = getattr(self, name)
+            new = np.zeros((old.shape[0] * 2,) + old.shape[1:], dtype=old.dtype)
+            new[:old.shape[0]] = old
+            setattr(self, name, new)
+    
+    def append(self, token: str, price: float, timestamp: float) -> int:
+        """Adiciona preço ao buffer circular do token e retorna a linha"""
+        row = self.row(token)
+        head = self.heads[row]
+        self.prices[row, head] = price
+        self.times[row, head] = timestamp
+        self.heads[row] = (head + 1) % self.prices.shape[1]
+        self.counts[row] = min(self.counts[row] + 1, self.prices.shape[1])
+        return row
+    
+    def count(self, token: str) -> int:
+        row = self.token_ids.get(token)
+        return 0 if row is None else int(self.counts[row])
+    
+    def ordered(self, token: str) -> np.ndarray:
+        """Preços do token em ordem cronológica"""
+        row = self.token_ids[token]
+        return _ring_ordered(self.prices[row], self.heads[row], self.counts[row])
+
+class SignalStrength(IntEnum):
     VERY_WEAK = 1
     WEAK = 2
     NEUTRAL = 3
     STRONG = 4
     VERY_STRONG = 5
 
-@dataclass
+# Limiares de score (inclusivos) e níveis correspondentes para np.searchsorted
+_SIG_THRESHOLDS = np.array([0.35, 0.5, 0.65, 0.8], dtype=np.float64)
+_SIG_LEVELS = (
+    SignalStrength.VERY_WEAK,
+    SignalStrength.WEAK,
+    SignalStrength.NEUTRAL,
+    SignalStrength.STRONG,
+    SignalStrength.VERY_STRONG,
+)
+
+@dataclass(slots=True, frozen=True)
 class TechnicalIndicators:
     rsi: float
     volume_spike: float
@@ -60,7 +241,7 @@ class TechnicalIndicators:
     overall_score: float
     signal_strength: SignalStrength
 
-@dataclass
+@dataclass(slots=True, frozen=True)
 class SniperConfig:
     min_liquidity: Decimal
     max_tax_bps: int
@@ -75,50 +256,141 @@ class SniperConfig:
     max_positions: int
     min_signal_strength: SignalStrength
 
+@dataclass(slots=True)
+class Position:
+    """Open position tracked by the strategy (mutable: highest price, TP count, amount)"""
+    pair: str
+    router: str
+    entry_price: float
+    entry_time: float
+    amount_wei: int
+    highest_price: float
+    tp_levels_hit: int = 0
+    indicators: Optional[TechnicalIndicators] = None
+
+class KeywordMatcher:
+    """Busca qualquer palavra-chave de uma lista 'a,b,c' em uma única passada pelo texto"""
+    __slots__ = ('keywords', '_automaton', '_pattern')
+    
+    def __init__(self, raw: str):
+        self.keywords = [kw.strip() for kw in raw.lower().split(',') if kw.strip()]
+        self._automaton = None
+        self._pattern = None
+        if not self.keywords:
+            return
+        if AHOCORASICK_AVAILABLE:
+            self._automaton = ahocorasick.Automaton()
+            for kw in self.keywords:
+                self._automaton.add_word(kw, kw)
+            self._automaton.make_automaton()
+        else:
+            # Fallback: uma única alternação compilada
+            self._pattern = re.compile("|".join(map(re.escape, self.keywords)))
+    
+    def search(self, text: str) -> Optional[str]:
+        """Primeira palavra-chave encontrada em `text` (já em minúsculas) ou None"""
+        if self._automaton is not None:
+            return next((kw for _, kw in self._automaton.iter(text)), None)
+        if self._pattern is not None:
+            match = self._pattern.search(text)
+            return match.group(0) if match else None
+        return None
+
+def _build_sniper_config() -> SniperConfig:
+    return SniperConfig(
+        min_liquidity=Decimal(str(config.get("MIN_LIQ_WETH", 1.0))),
+        max_tax_bps=int(float(config.get("MAX_TAX_PCT", 8.0)) * 100),
+        min_volume_spike=float(config.get("MIN_VOLUME_SPIKE", 2.0)),
+        min_rsi_oversold=float(config.get("MIN_RSI_OVERSOLD", 30.0)),
+        max_rsi_overbought=float(config.get("MAX_RSI_OVERBOUGHT", 70.0)),
+        min_momentum_score=float(config.get("MIN_MOMENTUM_SCORE", 0.6)),
+        take_profit_levels=[0.15, 0.30, 0.50, 1.0],  # 15%, 30%, 50%, 100%
+        stop_loss_pct=float(config.get("STOP_LOSS_PCT", 0.08)),
+        trailing_stop_pct=float(config.get("TRAIL_PCT", 0.05)),
+        position_size_pct=float(config.get("POSITION_SIZE_PCT", 0.1)),
+        max_positions=int(config.get("MAX_POSITIONS", 3)),
+        min_signal_strength=SignalStrength.STRONG
+    )
+
+@functools.lru_cache(maxsize=4)
+def _telegram_handles(token: Optional[str], chat_id) -> Tuple[Optional["Bot"], Optional[TelegramAlert]]:
+    """Bot e TelegramAlert compartilhados por token"""
+    if not (TELEGRAM_AVAILABLE and token):
+        return None, None
+    bot = Bot(token=token)
+    return bot, TelegramAlert(bot=bot, chat_id=chat_id)
+
+@functools.lru_cache(maxsize=16)
+def _get_exchange_client(router_address: Optional[str]) -> ExchangeClient:
+    """ExchangeClient compartilhado por router"""
+    return ExchangeClient(router_address=router_address)
+
+@functools.lru_cache(maxsize=16)
+def _get_safe_executor(router_address: Optional[str]) -> SafeTradeExecutor:
+    """Cadeia ExchangeClient -> TradeExecutor -> SafeTradeExecutor construída uma vez por router"""
+    te = TradeExecutor(exchange_client=_get_exchange_client(router_address), dry_run=config["DRY_RUN"])
+    return SafeTradeExecutor(executor=te, risk_manager=risk_manager)
+
+# Handles compartilhados entre instâncias (provider, checksum e config calculados uma vez)
+if WEB3_AVAILABLE:
+    _SHARED_W3 = Web3(http_provider())
+    _SHARED_ASYNC_W3 = AsyncWeb3(async_http_provider())  # DexClient reads
+    _SHARED_WETH = Web3.to_checksum_address(config["WETH"])
+else:
+    _SHARED_W3 = None
+    _SHARED_ASYNC_W3 = None
+    _SHARED_WETH = None
+_SHARED_SNIPER_CONFIG = _build_sniper_config()
+
 class AdvancedSniperStrategy:
+    # Atributos fixos: sem __dict__ por instância, acesso por offset de slot
+    __slots__ = (
+        'w3', 'weth', 'bot', 'alert', 'chat_id', 'config',
+        '_alert_queue', '_alert_task',
+        '_min_liquidity', '_max_age_hours', '_min_holders', '_max_supply',
+        '_min_volume_24h', '_max_market_cap', '_blacklist', '_whitelist',
+        'active_positions', '_dex_clients', '_tp_levels', 'tokens',
+        'total_trades', 'winning_trades', 'total_profit',
+    )
+    
     def __init__(self):
-        # Web3 setup
-        if WEB3_AVAILABLE:
-            prov = Web3.HTTPProvider(config["RPC_URL"])
-            self.w3 = Web3(prov)
-            self.weth = Web3.to_checksum_address(config["WETH"])
-        else:
-            self.w3 = None
-            self.weth = None
+        # Shared handles built once at import time
+        self.w3 = _SHARED_W3
+        self.weth = _SHARED_WETH
+        if self.w3 is None:
             log.warning("Web3 não disponível - funcionalidades blockchain limitadas")
         
         # Telegram setup
-        if TELEGRAM_AVAILABLE and config.get("TELEGRAM_TOKEN"):
-            self.bot = Bot(token=config["TELEGRAM_TOKEN"])
-            self.alert = TelegramAlert(
-                bot=self.bot,
-                chat_id=config["TELEGRAM_CHAT_ID"]
-            )
-        else:
-            self.bot = None
-            self.alert = None
+        self.bot, self.alert = _telegram_handles(config.get("TELEGRAM_TOKEN"), config["TELEGRAM_CHAT_ID"])
+        if self.bot is None:
             log.warning("Telegram não disponível - alertas limitados")
         self.chat_id = config["TELEGRAM_CHAT_ID"]
         
+        # Fila de alertas drenada por uma única tarefa (criada no primeiro alerta)
+        self._alert_queue: Optional[asyncio.Queue] = None
+        self._alert_task: Optional[asyncio.Task] = None
+        
         # Advanced configuration
-        self.config = SniperConfig(
-            min_liquidity=Decimal(str(config.get("MIN_LIQ_WETH", 1.0))),
-            max_tax_bps=int(float(config.get("MAX_TAX_PCT", 8.0)) * 100),
-            min_volume_spike=float(config.get("MIN_VOLUME_SPIKE", 2.0)),
-            min_rsi_oversold=float(config.get("MIN_RSI_OVERSOLD", 30.0)),
-            max_rsi_overbought=float(config.get("MAX_RSI_OVERBOUGHT", 70.0)),
-            min_momentum_score=float(config.get("MIN_MOMENTUM_SCORE", 0.6)),
-            take_profit_levels=[0.15, 0.30, 0.50, 1.0],  # 15%, 30%, 50%, 100%
-            stop_loss_pct=float(config.get("STOP_LOSS_PCT", 0.08)),
-            trailing_stop_pct=float(config.get("TRAIL_PCT", 0.05)),
-            position_size_pct=float(config.get("POSITION_SIZE_PCT", 0.1)),
-            max_positions=int(config.get("MAX_POSITIONS", 3)),
-            min_signal_strength=SignalStrength.STRONG
-        )
+        self.config = _SHARED_SNIPER_CONFIG
+        
+        # Limites dos filtros de memecoin lidos uma única vez
+        self._min_liquidity = float(config.get('MEMECOIN_MIN_LIQUIDITY', 0.05))
+        self._max_age_hours = int(config.get('MEMECOIN_MAX_AGE_HOURS', 24))
+        self._min_holders = int(config.get('MEMECOIN_MIN_HOLDERS', 10))
+        self._max_supply = int(config.get('MEMECOIN_MAX_SUPPLY', 1000000000))
+        self._min_volume_24h = float(config.get('MIN_VOLUME_24H', 1000))
+        self._max_market_cap = float(config.get('MAX_MARKET_CAP', 10000000))
+        
+        # Blacklist/whitelist compiladas uma vez
+        self._blacklist = KeywordMatcher(config.get('BLACKLIST_KEYWORDS', ''))
+        self._whitelist = KeywordMatcher(config.get('WHITELIST_PATTERNS', ''))
         
         # Active positions tracking
-        self.active_positions: Dict[str, Dict] = {}
-        self.price_history: Dict[str, List[Tuple[float, float]]] = {}  # token -> [(price, timestamp)]
+        self.active_positions: Dict[str, Position] = {}
+        self._dex_clients: Dict[str, DexClient] = {}  # pair -> DexClient
+        # TP levels as an array; +inf sentinel once all levels were hit
+        self._tp_levels = np.append(np.asarray(self.config.take_profit_levels, dtype=np.float64), np.inf)
+        self.tokens = TokenTable()  # histórico de preços (buffer circular) por token
         
         # Performance tracking
         self.total_trades = 0
@@ -127,89 +399,82 @@ class AdvancedSniperStrategy:
         
     async def analyze_token_technical(self, dex: DexClient, pair: str, token: str) -> TechnicalIndicators:
         """Perform advanced technical analysis on token"""
+        indicators = await self.analyze_all_tokens(dex, {token: pair})
+        return indicators.get(token) or TechnicalIndicators(0, 0, 0, 0, 0, 0, SignalStrength.VERY_WEAK)
+    
+    async def analyze_all_tokens(self, dex: DexClient, pairs: Dict[str, str]) -> Dict[str, TechnicalIndicators]:
+        """Analyze all tokens (token -> pair) in a single batched pass over the TokenTable"""
+        results: Dict[str, TechnicalIndicators] = {}
         try:
-            # Get price history (simulate with current price for now)
-            current_price = dex.get_token_price(token, self.weth)
-            if current_price is None:
-                return TechnicalIndicators(0, 0, 0, 0, 0, 0, SignalStrength.VERY_WEAK)
-            
-            # Initialize price history if not exists
-            if token not in self.price_history:
-                self.price_history[token] = []
-            
-            # Add current price to history
-            self.price_history[token].append((float(current_price), time()))
-            
-            # Keep only last 50 data points
-            if len(self.price_history[token]) > 50:
-                self.price_history[token] = self.price_history[token][-50:]
-            
-            # Calculate RSI (simplified)
-            rsi = self._calculate_rsi(token)
-            
-            # Calculate volume spike
-            volume_spike = self._calculate_volume_spike(dex, pair)
-            
-            # Calculate liquidity growth
-            liquidity_growth = self._calculate_liquidity_growth(dex, pair)
-            
-            # Calculate price momentum
-            price_momentum = self._calculate_price_momentum(token)
-            
-            # Analyze holder distribution
-            holder_distribution = self._analyze_holder_distribution(token)
-            
-            # Calculate overall score
-            overall_score = self._calculate_overall_score(
-                rsi, volume_spike, liquidity_growth, price_momentum, holder_distribution
+            # Add current prices to the ring buffers
+            prices = await self._batch_get_prices({token: dex for token in pairs})
+            now = time()
+            rows: List[int] = []
+            tokens: List[str] = []
+            for token in pairs:
+                current_price = prices.get(token)
+                if current_price is None:
+                    results[token] = TechnicalIndicators(0, 0, 0, 0, 0, 0, SignalStrength.VERY_WEAK)
+                    continue
+                rows.append(self.tokens.append(token, float(current_price), now))
+                tokens.append(token)
+            
+            if not rows:
+                return results
+            
+            # Placeholders (volume, liquidity, holders) drawn in one vectorized call
+            n = len(rows)
+            samples = _RNG.uniform(size=(n, 3))
+            volume = 0.5 + samples[:, 0] * 2.5  # 0.5x to 3.0x
+            liquidity = -0.2 + samples[:, 1] * 0.7  # -20% to +50%
+            holders = 0.3 + samples[:, 2] * 0.6  # 0.3 = concentrated, 0.9 = well distributed
+            
+            # RSI and momentum for every row at once
+            out_rsi = np.empty(n, dtype=np.float64)
+            out_mom = np.empty(n, dtype=np.float64)
+            _batch_analyze(
+                self.tokens.prices, self.tokens.heads, self.tokens.counts,
+                np.array(rows, dtype=np.int64), out_rsi, out_mom
             )
             
-            # Determine signal strength
-            signal_strength = self._determine_signal_strength(overall_score)
-            
-            return TechnicalIndicators(
-                rsi=rsi,
-                volume_spike=volume_spike,
-                liquidity_growth=liquidity_growth,
-                price_momentum=price_momentum,
-                holder_distribution=holder_distribution,
-                overall_score=overall_score,
-                signal_strength=signal_strength
-            )
+            # Weighted scores: one (N, 5) @ (5,) product
+            feats = _score_features(out_rsi, volume, liquidity, out_mom, holders)
+            scores = np.clip(feats, 0.0, 1.0) @ _WEIGHTS
+            strength_idx = np.searchsorted(_SIG_THRESHOLDS, scores, side="right")
+            
+            for i, token in enumerate(tokens):
+                overall_score = float(scores[i])
+                results[token] = TechnicalIndicators(
+                    rsi=float(out_rsi[i]),
+                    volume_spike=float(volume[i]),
+                    liquidity_growth=float(liquidity[i]),
+                    price_momentum=float(out_mom[i]),
+                    holder_distribution=float(holders[i]),
+                    overall_score=overall_score,
+                    signal_strength=_SIG_LEVELS[strength_idx[i]]
+                )
             
         except Exception as e:
             log.error(f"Error in technical analysis: {e}")
-            return TechnicalIndicators(0, 0, 0, 0, 0, 0, SignalStrength.VERY_WEAK)
+        
+        return results
     
-    def _calculate_rsi(self, token: str, period: int = 14) -> float:
+    def _calculate_rsi(self, token: str, period: int = RSI_PERIOD) -> float:
         """Calculate RSI indicator"""
-        if token not in self.price_history or len(self.price_history[token]) < period + 1:
+        if self.tokens.count(token) < period + 1:
             return 50.0  # Neutral RSI
         
-        prices = [p[0] for p in self.price_history[token][-period-1:]]
-        deltas = np.diff(prices)
-        
-        gains = np.where(deltas > 0, deltas, 0)
-        losses = np.where(deltas < 0, -deltas, 0)
-        
-        avg_gain = np.mean(gains) if len(gains) > 0 else 0
-        avg_loss = np.mean(losses) if len(losses) > 0 else 0
-        
-        if avg_loss == 0:
-            return 100.0
-        
-        rs = avg_gain / avg_loss
-        rsi = 100 - (100 / (1 + rs))
-        
-        return float(rsi)
+        prices = self.tokens.ordered(token)
+        if period == 14:
+            return float(_rsi14(prices[-15:]))
+        return float(_rsi_njit(prices, period))
     
     def _calculate_volume_spike(self, dex: DexClient, pair: str) -> float:
         """Calculate volume spike indicator"""
         try:
             # Simulate volume analysis (in real implementation, would get actual volume data)
             # For now, return a random value between 0.5 and 3.0
-            import random
-            return random.uniform(0.5, 3.0)
+            return float(_RNG.uniform(0.5, 3.0))
         except:
             return 1.0
     
@@ -217,30 +482,23 @@ class AdvancedSniperStrategy:
         """Calculate liquidity growth rate"""
         try:
             # Simulate liquidity growth analysis
-            import random
-            return random.uniform(-0.2, 0.5)  # -20% to +50%
+            return float(_RNG.uniform(-0.2, 0.5))  # -20% to +50%
         except:
             return 0.0
     
     def _calculate_price_momentum(self, token: str) -> float:
         """Calculate price momentum score"""
-        if token not in self.price_history or len(self.price_history[token]) < 5:
-            return 0.0
-        
-        prices = [p[0] for p in self.price_history[token][-5:]]
-        if len(prices) < 2:
+        if self.tokens.count(token) < MOMENTUM_WINDOW:
             return 0.0
         
         # Simple momentum: (current - first) / first
-        momentum = (prices[-1] - prices[0]) / prices[0] if prices[0] > 0 else 0
-        return float(momentum)
+        return float(_momentum5(self.tokens.ordered(token)[-MOMENTUM_WINDOW:]))
     
     def _analyze_holder_distribution(self, token: str) -> float:
         """Analyze token holder distribution"""
         try:
             # Simulate holder analysis (would use actual blockchain data)
-            import random
-            return random.uniform(0.3, 0.9)  # 0.3 = concentrated, 0.9 = well distributed
+            return float(_RNG.uniform(0.3, 0.9))  # 0.3 = concentrated, 0.9 = well distributed
         except:
             return 0.5
     
@@ -248,124 +506,81 @@ class AdvancedSniperStrategy:
                                liquidity_growth: float, price_momentum: float, 
                                holder_distribution: float) -> float:
         """Calculate weighted overall score"""
-        # Weights for different indicators
-        weights = {
-            'rsi': 0.2,
-            'volume': 0.25,
-            'liquidity': 0.2,
-            'momentum': 0.2,
-            'holders': 0.15
-        }
-        
-        # Normalize RSI (30-70 range is good)
-        rsi_score = 1.0 if 30 <= rsi <= 70 else max(0, 1 - abs(rsi - 50) / 50)
-        
-        # Volume spike score (higher is better, but cap at 3x)
-        volume_score = min(volume_spike / 3.0, 1.0)
-        
-        # Liquidity growth score (positive growth is good)
-        liquidity_score = max(0, min(liquidity_growth + 0.2, 1.0))
-        
-        # Momentum score (positive momentum is good, but not too extreme)
-        momentum_score = max(0, min(price_momentum + 0.1, 1.0))
-        
-        # Holder distribution score (higher is better)
-        holder_score = holder_distribution
-        
-        overall = (
-            weights['rsi'] * rsi_score +
-            weights['volume'] * volume_score +
-            weights['liquidity'] * liquidity_score +
-            weights['momentum'] * momentum_score +
-            weights['holders'] * holder_score
-        )
-        
-        return overall
+        feats = _score_features([rsi], [volume_spike], [liquidity_growth], [price_momentum], [holder_distribution])
+        return float(np.clip(feats, 0.0, 1.0)[0] @ _WEIGHTS)
     
     def _determine_signal_strength(self, score: float) -> SignalStrength:
         """Determine signal strength based on overall score"""
-        if score >= 0.8:
-            return SignalStrength.VERY_STRONG
-        elif score >= 0.65:
-            return SignalStrength.STRONG
-        elif score >= 0.5:
-            return SignalStrength.NEUTRAL
-        elif score >= 0.35:
-            return SignalStrength.WEAK
-        else:
-            return SignalStrength.VERY_WEAK
+        return _SIG_LEVELS[int(np.searchsorted(_SIG_THRESHOLDS, score, side="right"))]
     
     def _is_memecoin_candidate(self, token: str, pair_data: dict) -> bool:
         """Detecta se um token é um candidato a memecoin promissor"""
         try:
-            # Verificar configurações de memecoin
-            min_liquidity = float(config.get('MEMECOIN_MIN_LIQUIDITY', 0.05))
-            max_age_hours = int(config.get('MEMECOIN_MAX_AGE_HOURS', 24))
-            min_holders = int(config.get('MEMECOIN_MIN_HOLDERS', 10))
-            max_supply = int(config.get('MEMECOIN_MAX_SUPPLY', 1000000000))
-            
-            # Verificar blacklist de palavras
-            blacklist = config.get('BLACKLIST_KEYWORDS', '').lower().split(',')
+            # Mensagens de debug só são formatadas se o nível estiver ativo
+            dbg = log.isEnabledFor(logging.DEBUG)
+            
+            # Verificar blacklist de palavras (nome e símbolo em uma única passada;
+            # o separador \x00 impede casamentos entre os dois campos)
             token_name = pair_data.get('name', '').lower()
             token_symbol = pair_data.get('symbol', '').lower()
+            haystack = token_name + '\x00' + token_symbol
             
-            for keyword in blacklist:
-                if keyword.strip() and (keyword.strip() in token_name or keyword.strip() in token_symbol):
-                    log.info(f"Token {token} rejeitado por blacklist: {keyword}")
-                    return False
+            keyword = self._blacklist.search(haystack)
+            if keyword:
+                log.info("Token %s rejeitado por blacklist: %s", token, keyword)
+                return False
             
             # Verificar whitelist de padrões (bonus points)
-            whitelist = config.get('WHITELIST_PATTERNS', '').lower().split(',')
-            has_memecoin_pattern = False
-            for pattern in whitelist:
-                if pattern.strip() and (pattern.strip() in token_name or pattern.strip() in token_symbol):
-                    has_memecoin_pattern = True
-                    break
+            has_memecoin_pattern = self._whitelist.search(haystack) is not None
             
             # Verificar liquidez mínima
             liquidity_eth = pair_data.get('liquidity_eth', 0)
-            if liquidity_eth < min_liquidity:
-                log.debug(f"Token {token} rejeitado por baixa liquidez: {liquidity_eth}")
+            if liquidity_eth < self._min_liquidity:
+                if dbg:
+                    log.debug("Token %s rejeitado por baixa liquidez: %s", token, liquidity_eth)
                 return False
             
             # Verificar idade do token (se disponível)
             token_age_hours = pair_data.get('age_hours', 0)
-            if token_age_hours > max_age_hours:
-                log.debug(f"Token {token} rejeitado por idade: {token_age_hours}h")
+            if token_age_hours > self._max_age_hours:
+                if dbg:
+                    log.debug("Token %s rejeitado por idade: %sh", token, token_age_hours)
                 return False
             
             # Verificar supply máximo
             total_supply = pair_data.get('total_supply', 0)
-            if total_supply > max_supply:
-                log.debug(f"Token {token} rejeitado por supply alto: {total_supply}")
+            if total_supply > self._max_supply:
+                if dbg:
+                    log.debug("Token %s rejeitado por supply alto: %s", token, total_supply)
                 return False
             
             # Verificar número mínimo de holders
             holder_count = pair_data.get('holder_count', 0)
-            if holder_count < min_holders:
-                log.debug(f"Token {token} rejeitado por poucos holders: {holder_count}")
+            if holder_count < self._min_holders:
+                if dbg:
+                    log.debug("Token %s rejeitado por poucos holders: %s", token, holder_count)
                 return False
             
             # Bonus para tokens com padrões de memecoin
             if has_memecoin_pattern:
-                log.info(f"Token {token} tem padrão de memecoin: {token_name} / {token_symbol}")
+                log.info("Token %s tem padrão de memecoin: %s / %s", token, token_name, token_symbol)
                 return True
             
             # Verificar volume 24h mínimo
             volume_24h = pair_data.get('volume_24h_usd', 0)
-            min_volume = float(config.get('MIN_VOLUME_24H', 1000))
-            if volume_24h < min_volume:
-                log.debug(f"Token {token} rejeitado por baixo volume: ${volume_24h}")
+            if volume_24h < self._min_volume_24h:
+                if dbg:
+                    log.debug("Token %s rejeitado por baixo volume: $%s", token, volume_24h)
                 return False
             
             # Verificar market cap máximo
             market_cap = pair_data.get('market_cap_usd', 0)
-            max_market_cap = float(config.get('MAX_MARKET_CAP', 10000000))
-            if market_cap > max_market_cap:
-                log.debug(f"Token {token} rejeitado por market cap alto: ${market_cap}")
+            if market_cap > self._max_market_cap:
+                if dbg:
+                    log.debug("Token %s rejeitado por market cap alto: $%s", token, market_cap)
                 return False
             
-            log.info(f"Token {token} passou nos filtros de memecoin")
+            log.info("Token %s passou nos filtros de memecoin", token)
             return True
             
         except Exception as e:
@@ -375,9 +590,9 @@ class AdvancedSniperStrategy:
     async def should_enter_position(self, indicators: TechnicalIndicators, token: str = None, pair_data: dict = None) -> bool:
         """Determine if we should enter a position based on indicators"""
         # Check if we have room for more positions
-        max_positions = int(config.get('MAX_POSITIONS', 3))
+        max_positions = self.config.max_positions
         if len(self.active_positions) >= max_positions:
-            log.debug(f"Máximo de posições atingido: {len(self.active_positions)}/{max_positions}")
+            log.debug("Máximo de posições atingido: %s/%s", len(self.active_positions), max_positions)
             return False
         
         # Verificar se é um candidato a memecoin promissor
@@ -388,8 +603,8 @@ class AdvancedSniperStrategy:
             log.info(f"Token {token} é um candidato a memecoin promissor!")
         
         # Check signal strength
-        if indicators.signal_strength.value < self.config.min_signal_strength.value:
-            log.debug(f"Sinal fraco: {indicators.signal_strength.value} < {self.config.min_signal_strength.value}")
+        if indicators.signal_strength < self.config.min_signal_strength:
+            log.debug("Sinal fraco: %d < %d", indicators.signal_strength, self.config.min_signal_strength)
             return False
         
         # Check individual indicators
@@ -413,33 +628,32 @@ class AdvancedSniperStrategy:
         try:
             # Calculate position size based on signal strength
             base_size = float(self.config.position_size_pct)
-            signal_multiplier = indicators.signal_strength.value / 3.0  # 0.33 to 1.67
+            signal_multiplier = indicators.signal_strength / 3.0  # 0.33 to 1.67
             position_size = base_size * signal_multiplier
             
             # Get available balance
-            balance = get_token_balance(
-                ExchangeClient(router_address=dex.router), 
+            balance_wei = to_wei(get_token_balance(
+                _get_exchange_client(dex.router), 
                 base
-            )
+            ))
             
-            if balance <= 0:
+            if balance_wei <= 0:
                 return None
             
-            # Calculate trade amount
-            trade_amount = Decimal(str(balance * position_size))
+            # Calculate trade amount (wei fixed-point)
+            trade_amount_wei = balance_wei * int(position_size * PPM) // PPM
+            trade_amount_eth = from_wei(trade_amount_wei)
             
             # Execute trade
-            exch = ExchangeClient(router_address=dex.router)
-            te = TradeExecutor(exchange_client=exch, dry_run=config["DRY_RUN"])
-            safe = SafeTradeExecutor(executor=te, risk_manager=risk_manager)
+            safe = _get_safe_executor(dex.router)
             
-            current_price = dex.get_token_price(target, base)
-            slippage = dex.calc_dynamic_slippage(pair, float(trade_amount))
+            current_price = await dex.get_token_price(target, base)
+            slippage = await dex.calc_dynamic_slippage(pair, trade_amount_eth)
             
             tx_hash = safe.buy(
                 token_in=base,
                 token_out=target,
-                amount_eth=trade_amount,
+                amount_eth=Decimal(trade_amount_wei) / WEI_DECIMAL,
                 current_price=current_price,
                 last_trade_price=None,
                 amount_out_min=None,
@@ -448,18 +662,19 @@ class AdvancedSniperStrategy:
             
             if tx_hash:
                 # Record position
-                self.active_positions[target] = {
-                    'pair': pair,
-                    'entry_price': current_price,
-                    'entry_time': time(),
-                    'amount': trade_amount,
-                    'highest_price': current_price,
-                    'tp_levels_hit': 0,
-                    'indicators': indicators
-                }
+                self.active_positions[target] = Position(
+                    pair=pair,
+                    router=dex.router,
+                    entry_price=current_price,
+                    entry_time=time(),
+                    amount_wei=trade_amount_wei,
+                    highest_price=current_price,
+                    indicators=indicators
+                )
+                self._dex_clients[pair] = dex
                 
                 # Send detailed notification
-                await self._send_buy_notification(target, tx_hash, indicators, trade_amount)
+                await self._send_buy_notification(target, tx_hash, indicators, trade_amount_eth)
             
             return tx_hash
             
@@ -468,7 +683,7 @@ class AdvancedSniperStrategy:
             return None
     
     async def _send_buy_notification(self, token: str, tx_hash: str, 
-                                   indicators: TechnicalIndicators, amount: Decimal):
+                                   indicators: TechnicalIndicators, amount: float):
         """Send detailed buy notification"""
         msg = (
             f"🎯 *COMPRA EXECUTADA*\n\n"
@@ -485,129 +700,190 @@ class AdvancedSniperStrategy:
             f"🛡️ *Stop Loss:* {self.config.stop_loss_pct*100:.1f}%"
         )
         
-        try:
-            await self.bot.send_message(
-                chat_id=self.chat_id,
-                text=escape_md_v2(msg),
-                parse_mode="MarkdownV2"
-            )
-        except Exception as e:
-            log.error(f"Error sending buy notification: {e}")
+        self._queue_alert(escape_md_v2(msg))
     
-    async def manage_positions(self):
-        """Advanced position management with multiple TP levels"""
-        for token, position in list(self.active_positions.items()):
+    def _queue_alert(self, text: str):
+        """Enfileira alerta já escapado para o próximo envio agrupado"""
+        if self.bot is None:
+            return
+        if self._alert_task is None or self._alert_task.done():
+            self._alert_queue = asyncio.Queue()
+            self._alert_task = asyncio.create_task(self._alert_flusher(self._alert_queue))
+        self._alert_queue.put_nowait(text)
+    
+    async def _alert_flusher(self, queue: asyncio.Queue):
+        """Agrupa os alertas pendentes em uma única chamada send_message"""
+        while True:
+            msgs = [await queue.get()]
+            await asyncio.sleep(ALERT_FLUSH_DELAY)
+            total_len = len(msgs[0])
+            while not queue.empty() and total_len < ALERT_BATCH_MAX_CHARS:
+                msg = queue.get_nowait()
+                msgs.append(msg)
+                total_len += len(msg) + len(ALERT_SEPARATOR)
+            
             try:
-                await self._manage_single_position(token, position)
+                await self.bot.send_message(
+                    chat_id=self.chat_id,
+                    text=ALERT_SEPARATOR.join(msgs),
+                    parse_mode="MarkdownV2"
+                )
             except Exception as e:
-                log.error(f"Error managing position {token}: {e}")
+                log.error(f"Error sending notifications: {e}")
     
-    async def _manage_single_position(self, token: str, position: Dict):
-        """Manage a single position with advanced exit strategy"""
-        try:
-            # Get current price
-            dex = DexClient(self.w3, position['pair'])  # This needs to be fixed
-            current_price = dex.get_token_price(token, self.weth)
-            
-            if current_price is None:
-                return
-            
-            entry_price = position['entry_price']
-            highest_price = position.get('highest_price', entry_price)
-            
-            # Update highest price
-            if current_price > highest_price:
-                position['highest_price'] = current_price
-                highest_price = current_price
-            
-            # Calculate profit/loss
-            profit_pct = (current_price - entry_price) / entry_price
-            
-            # Check take profit levels
-            tp_levels = self.config.take_profit_levels
-            current_tp_level = position.get('tp_levels_hit', 0)
-            
-            if current_tp_level < len(tp_levels):
-                target_tp = tp_levels[current_tp_level]
-                if profit_pct >= target_tp:
+    async def manage_positions(self):
+        """Advanced position management with multiple TP levels (all positions in one vector pass)"""
+        if not self.active_positions:
+            return
+        
+        tokens = list(self.active_positions)
+        positions = [self.active_positions[t] for t in tokens]
+        n = len(tokens)
+        
+        # Current prices of every position in one JSON-RPC batch
+        prices = await self._batch_get_prices(
+            {t: self._position_dex(p) for t, p in zip(tokens, positions)}
+        )
+        current = np.fromiter((prices.get(t, np.nan) for t in tokens), dtype=np.float64, count=n)
+        
+        entry = np.fromiter((p.entry_price for p in positions), dtype=np.float64, count=n)
+        highest = np.fromiter((p.highest_price for p in positions), dtype=np.float64, count=n)
+        tp_hit = np.fromiter((p.tp_levels_hit for p in positions), dtype=np.int64, count=n)
+        
+        # Update highest price (NaN = no quote, keeps the previous value)
+        np.fmax(highest, current, out=highest)
+        for i in np.flatnonzero(highest != entry):
+            positions[i].highest_price = float(highest[i])
+        
+        # TP / stop loss / trailing stop for every position at once (NaN compares False)
+        profit_pct = (current - entry) / entry
+        tp_target = self._tp_levels[np.minimum(tp_hit, len(self._tp_levels) - 1)]
+        tp_mask = profit_pct >= tp_target
+        stop_loss = entry * (1 - self.config.stop_loss_pct)
+        sl_mask = current <= np.maximum(stop_loss, highest * (1 - self.config.trailing_stop_pct))
+        
+        # Only the positions with a firing condition go through the sell paths
+        for i in np.flatnonzero(tp_mask | sl_mask):
+            token, position = tokens[i], positions[i]
+            try:
+                if tp_mask[i]:
                     # Hit next TP level - sell portion
+                    current_tp_level = int(tp_hit[i])
                     await self._execute_partial_sell(token, position, 0.25)  # Sell 25%
-                    position['tp_levels_hit'] += 1
+                    position.tp_levels_hit = current_tp_level + 1
                     
-                    await self._send_tp_notification(token, target_tp, current_tp_level + 1)
-            
-            # Check stop loss
-            stop_loss_price = entry_price * (1 - self.config.stop_loss_pct)
-            trailing_stop_price = highest_price * (1 - self.config.trailing_stop_pct)
-            
-            if current_price <= max(stop_loss_price, trailing_stop_price):
-                # Stop loss triggered - sell all remaining
-                await self._execute_full_sell(token, position)
-                del self.active_positions[token]
+                    await self._send_tp_notification(token, float(tp_target[i]), current_tp_level + 1)
                 
-                stop_type = "Stop Loss" if current_price <= stop_loss_price else "Trailing Stop"
-                await self._send_stop_notification(token, stop_type, profit_pct)
-            
+                if sl_mask[i]:
+                    # Stop loss triggered - sell all remaining
+                    await self._execute_full_sell(token, position)
+                    del self.active_positions[token]
+                    self._dex_clients.pop(position.pair, None)
+                    
+                    stop_type = "Stop Loss" if current[i] <= stop_loss[i] else "Trailing Stop"
+                    await self._send_stop_notification(token, stop_type, float(profit_pct[i]))
+                    
+            except Exception as e:
+                log.error(f"Error managing position {token}: {e}")
+    
+    def _position_dex(self, position: Position) -> DexClient:
+        """DexClient used to quote a position (cached per pair)"""
+        dex = self._dex_clients.get(position.pair)
+        if dex is None:
+            dex = self._dex_clients[position.pair] = DexClient(_SHARED_ASYNC_W3, position.pair)
+        return dex
+    
+    async def _batch_get_prices(self, routes: Dict[str, DexClient]) -> Dict[str, float]:
+        """Prices (token -> WETH) for many tokens with a single JSON-RPC batch of getAmountsOut calls"""
+        tokens = list(routes)
+        if not tokens:
+            return {}
+        try:
+            weth = to_checksum(self.weth)
+            calls = [
+                (
+                    routes[t].router.address,
+                    routes[t].router.encodeABI(
+                        fn_name="getAmountsOut",
+                        args=[PRICE_QUOTE_AMOUNT, [to_checksum(t), weth]]
+                    )
+                )
+                for t in tokens
+            ]
+            raw = await asyncio.to_thread(batch_eth_call, calls)
         except Exception as e:
-            log.error(f"Error in position management for {token}: {e}")
+            # Node without batch support: one call per token, still concurrent
+            log.warning(f"Batch price request failed, falling back to single calls: {e}")
+            quotes = await asyncio.gather(
+                *(routes[t].get_token_price(t, self.weth) for t in tokens),
+                return_exceptions=True
+            )
+            return {t: float(q) for t, q in zip(tokens, quotes) if isinstance(q, (int, float, Decimal))}
+        
+        prices: Dict[str, float] = {}
+        for token, data in zip(tokens, raw):
+            if not data:
+                continue  # reverted (no route / no liquidity)
+            try:
+                amounts = self.w3.codec.decode(["uint256[]"], data)[0]
+                prices[token] = amounts[-1] / WEI_PER_ETH
+            except Exception as e:
+                log.warning(f"Could not decode price for {token}: {e}")
+        return prices
     
-    async def _execute_partial_sell(self, token: str, position: Dict, percentage: float):
+    async def _execute_partial_sell(self, token: str, position: Position, percentage: float):
         """Execute partial sell of position"""
         try:
             # Get current balance
-            balance = get_token_balance(
-                ExchangeClient(router_address=position.get('router')), 
+            balance_wei = to_wei(get_token_balance(
+                _get_exchange_client(position.router), 
                 token
-            )
+            ))
             
-            if balance <= 0:
+            if balance_wei <= 0:
                 return
             
-            sell_amount = Decimal(str(balance * percentage))
+            sell_amount_wei = balance_wei * int(percentage * PPM) // PPM
             
             # Execute sell
-            exch = ExchangeClient(router_address=position.get('router'))
-            te = TradeExecutor(exchange_client=exch, dry_run=config["DRY_RUN"])
-            safe = SafeTradeExecutor(executor=te, risk_manager=risk_manager)
+            safe = _get_safe_executor(position.router)
             
             tx_hash = safe.sell(
                 token_in=token,
                 token_out=self.weth,
-                amount_eth=sell_amount,
+                amount_eth=Decimal(sell_amount_wei) / WEI_DECIMAL,
                 current_price=None,  # Will be calculated
-                last_trade_price=position['entry_price']
+                last_trade_price=position.entry_price
             )
             
             if tx_hash:
                 self.total_trades += 1
                 # Update position amount
-                position['amount'] = position['amount'] * Decimal(str(1 - percentage))
+                position.amount_wei = position.amount_wei * int((1 - percentage) * PPM) // PPM
             
         except Exception as e:
             log.error(f"Error in partial sell: {e}")
     
-    async def _execute_full_sell(self, token: str, position: Dict):
+    async def _execute_full_sell(self, token: str, position: Position):
         """Execute full sell of position"""
         try:
-            balance = get_token_balance(
-                ExchangeClient(router_address=position.get('router')), 
+            balance_wei = to_wei(get_token_balance(
+                _get_exchange_client(position.router), 
                 token
-            )
+            ))
             
-            if balance <= 0:
+            if balance_wei <= 0:
                 return
             
             # Execute sell
-            exch = ExchangeClient(router_address=position.get('router'))
-            te = TradeExecutor(exchange_client=exch, dry_run=config["DRY_RUN"])
-            safe = SafeTradeExecutor(executor=te, risk_manager=risk_manager)
+            safe = _get_safe_executor(position.router)
             
             tx_hash = safe.sell(
                 token_in=token,
                 token_out=self.weth,
-                amount_eth=Decimal(str(balance)),
+                amount_eth=Decimal(balance_wei) / WEI_DECIMAL,
                 current_price=None,
-                last_trade_price=position['entry_price']
+                last_trade_price=position.entry_price
             )
             
             if tx_hash:
@@ -622,14 +898,7 @@ class AdvancedSniperStrategy:
         """Send take profit notification"""
         msg = f"💰 *TAKE PROFIT {tp_number}*\n\nToken: `{token}`\nNível: `{tp_level*100:.0f}%`\n25% da posição vendida!"
         
-        try:
-            await self.bot.send_message(
-                chat_id=self.chat_id,
-                text=escape_md_v2(msg),
-                parse_mode="MarkdownV2"
-            )
-        except Exception as e:
-            log.error(f"Error sending TP notification: {e}")
+        self._queue_alert(escape_md_v2(msg))
     
     async def _send_stop_notification(self, token: str, stop_type: str, profit_pct: float):
         """Send stop loss notification"""
@@ -640,14 +909,7 @@ class AdvancedSniperStrategy:
             f"Posição totalmente fechada!"
         )
         
-        try:
-            await self.bot.send_message(
-                chat_id=self.chat_id,
-                text=escape_md_v2(msg),
-                parse_mode="MarkdownV2"
-            )
-        except Exception as e:
-            log.error(f"Error sending stop notification: {e}")
+        self._queue_alert(escape_md_v2(msg))
     
     def get_performance_stats(self) -> Dict:
         """Get performance statistics"""
@@ -16,6 +16,10 @@ logging.basicConfig(
 def main():
     """Função principal de entrada"""
     try:
+        # uvloop (se disponível) antes de qualquer event loop ser criado
+        from utils import install_uvloop
+        install_uvloop()
+        
         # Importar e executar o bot principal
         from main import main as bot_main
         bot_main()
@@ -1,16 +1,105 @@
 import logging
 
+import numpy as np
+
+from utils import njit
+
 logger = logging.getLogger(__name__)
 
+RSI_PERIOD = 14
+MOMENTUM_WINDOW = 5
+
+@njit(cache=True, fastmath=True)
+def _rsi_rolling_njit(prices, period):
+    """RSI simples em janela deslizante (somas incrementais de ganhos/perdas)"""
+    n = prices.shape[0]
+    out = np.full(n, 50.0)
+    gain = 0.0
+    loss = 0.0
+    for i in range(1, n):
+        d = prices[i] - prices[i - 1]
+        if d > 0:
+            gain += d
+        else:
+            loss -= d
+        if i > period:
+            d_old = prices[i - period] - prices[i - period - 1]
+            if d_old > 0:
+                gain -= d_old
+            else:
+                loss += d_old
+        if i >= period:
+            out[i] = 100.0 if loss <= 0 else 100.0 - 100.0 / (1.0 + gain / loss)
+    return out
+
+def _momentum(prices: np.ndarray, window: int) -> np.ndarray:
+    """Momentum (atual - primeiro) / primeiro da janela, vetorizado"""
+    out = np.zeros_like(prices)
+    first = prices[:-window + 1] if window > 1 else prices
+    np.divide(prices[window - 1:] - first, first, out=out[window - 1:], where=first > 0)
+    return out
+
 class Backtester:
-    def __init__(self, strategy_class, historical_prices, token_address):
+    def __init__(self, strategy_class, historical_prices, token_address,
+                 take_profit: float = 0.15, stop_loss: float = 0.08, legacy: bool = False):
         self.strategy_class = strategy_class
-        self.historical_prices = historical_prices
+        self.historical_prices = np.asarray(historical_prices, dtype=np.float64)
         self.token_address = token_address
+        self.take_profit = take_profit
+        self.stop_loss = stop_loss
+        self.legacy = legacy
         self.trades = []
         self.last_price = None
 
     def run(self):
+        if self.legacy:
+            self._run_legacy()
+        else:
+            self._run_vectorized()
+
+        self.report()
+
+    def _run_vectorized(self):
+        """Indicadores e sinais pré-calculados sobre todo o histórico de uma vez"""
+        prices = self.historical_prices
+        if prices.shape[0] < 2:
+            return
+
+        rsi = _rsi_rolling_njit(prices, RSI_PERIOD)
+        momentum = _momentum(prices, MOMENTUM_WINDOW)
+        entries = np.flatnonzero((rsi < 30) & (momentum > 0))
+
+        i = 0
+        while i < entries.shape[0]:
+            entry_idx = entries[i]
+            entry_price = prices[entry_idx]
+
+            # Primeira barra seguinte que cruza o take profit ou o stop loss
+            after = prices[entry_idx + 1:]
+            crossed = (after >= entry_price * (1 + self.take_profit)) | (after <= entry_price * (1 - self.stop_loss))
+            if not crossed.any():
+                break  # posição ainda aberta no fim do histórico
+            exit_idx = entry_idx + 1 + int(crossed.argmax())
+            exit_price = prices[exit_idx]
+
+            pnl_pct = (exit_price - entry_price) / entry_price
+            self.trades.append({
+                "type": "round_trip",
+                "entry_index": int(entry_idx),
+                "exit_index": int(exit_idx),
+                "entry_price": float(entry_price),
+                "exit_price": float(exit_price),
+                "pnl_pct": float(pnl_pct),
+                "result": "win" if pnl_pct > 0 else "loss",
+            })
+
+            # Próxima entrada só depois da saída
+            i = int(np.searchsorted(entries, exit_idx, side="right"))
+
+        self.last_price = float(prices[-1])
+
+    def _run_legacy(self):
+        """Modo de compatibilidade: instancia a estratégia a cada barra"""
         for price in self.historical_prices:
             strategy = self.strategy_class(
                 dex_client=MockDex(price),
@@ -21,8 +110,6 @@ class Backtester:
             strategy.run()
             self.last_price = price
 
-        self.report()
-
     def report(self):
         total_trades = len(self.trades)
         wins = sum(1 for t in self.trades if t["result"] == "win")
@@ -1,49 +1,206 @@
 # check_balance.py
 
+import asyncio
+import functools
 import logging
+import random
 import time
+from decimal import Decimal
+from threading import Lock
+from typing import Dict, List, Tuple
 try:
-    from web3 import Web3
+    from web3 import AsyncWeb3, AsyncHTTPProvider
+    from web3.exceptions import ContractLogicError
     WEB3_AVAILABLE = True
 except ImportError:
     WEB3_AVAILABLE = False
-    Web3 = None
+    AsyncWeb3 = None
+    ContractLogicError = Exception
+
+try:
+    import diskcache
+    DISKCACHE_AVAILABLE = True
+except ImportError:
+    DISKCACHE_AVAILABLE = False
 
 from config import config
+from utils import MULTICALL3, MULTICALL3_ABI, to_checksum
 
 logger = logging.getLogger("balance")
 
+ERC20_BALANCE_ABI = [{
+    "name": "balanceOf", "type": "function", "stateMutability": "view",
+    "inputs": [{"name":"owner","type":"address"}],
+    "outputs":[{"type":"uint256"}]
+}]
+BALANCE_OF_SELECTOR = bytes.fromhex("70a08231")  # keccak("balanceOf(address)")[:4]
+ERC20_METADATA_ABI = [
+    {"name": "decimals", "type": "function", "stateMutability": "view", "inputs": [], "outputs": [{"type": "uint8"}]},
+    {"name": "symbol", "type": "function", "stateMutability": "view", "inputs": [], "outputs": [{"type": "string"}]}
+]
+
+RETRY_MAX_DELAY = 2.0   # teto do backoff exponencial (s)
+RETRY_JITTER = 0.05     # jitter máximo somado a cada espera (s)
+
+# Cache de saldos: (token, carteira) -> (instante monotônico, saldo em wei)
+TTL_BALANCE = config.get("TTL_BALANCE", 30.0)
+_balance_cache: Dict[Tuple[str, str], Tuple[float, int]] = {}
+_balance_lock = Lock()
+
+# Cache em disco (sobrevive a restarts): saldos com TTL, metadados de token sem expiração
+DISK_CACHE_DIR = "./.cache/balances"
+_disk = diskcache.Cache(DISK_CACHE_DIR) if DISKCACHE_AVAILABLE else None
+_metadata_cache: Dict[str, Dict] = {}
+
 if WEB3_AVAILABLE:
-    w3 = Web3(Web3.HTTPProvider(config["RPC_URL"]))
+    w3 = AsyncWeb3(AsyncHTTPProvider(config["RPC_URL"]))
+    multicall = w3.eth.contract(address=MULTICALL3, abi=MULTICALL3_ABI)
     DEFAULT_WALLET = config["WALLET"]
     WETH_ADDR = config["WETH"]
 else:
     w3 = None
+    multicall = None
     DEFAULT_WALLET = None
     WETH_ADDR = None
     logger.warning("Web3 não disponível - funcionalidades de balance limitadas")
 
-def get_token_balance(token_address: str, wallet: str, retries: int = 3, delay: float = 0.5) -> float:
+@functools.lru_cache(maxsize=512)
+def _token_contract(token_address: str):
+    """Contrato ERC20 (só balanceOf) reaproveitado por token"""
+    return w3.eth.contract(address=to_checksum(token_address), abi=ERC20_BALANCE_ABI)
+
+@functools.lru_cache(maxsize=64)
+def _balance_of_calldata(wallet: str) -> bytes:
+    """Calldata de balanceOf(wallet): seletor + endereço em 32 bytes, codificado uma vez por carteira"""
+    return BALANCE_OF_SELECTOR + bytes(12) + bytes.fromhex(wallet[2:])
+
+def format_ether(wei: int, decimals: int = 6) -> str:
+    """Formata um valor em wei como ETH/token de 18 casas (só para exibição)"""
+    return f"{Decimal(wei) / Decimal(10**18):.{decimals}f}"
+
+async def get_token_balance(token_address: str, wallet: str, retries: int = 3, delay: float = 0.5) -> int:
+    """
+    Saldo do token em wei (unidades base, sem conversão para float).
+    Erros de rede são repetidos com backoff exponencial; um balanceOf que
+    reverte (token quebrado) é propagado em vez de virar saldo 0.
+    """
     if not WEB3_AVAILABLE or not w3:
         logger.warning("Web3 não disponível - retornando balance 0")
-        return 0.0
+        return 0
         
-    abi = [{
-        "name": "balanceOf", "type": "function", "stateMutability": "view",
-        "inputs": [{"name":"owner","type":"address"}],
-        "outputs":[{"type":"uint256"}]
-    }]
-    token = w3.eth.contract(address=token_address, abi=abi)
+    key = (token_address.lower(), wallet.lower())
+    cached = _balance_cache.get(key)
+    if cached and time.monotonic() - cached[0] < TTL_BALANCE:
+        return cached[1]
+    if _disk is not None:
+        balance = _disk.get(("balance_wei",) + key)
+        if balance is not None:
+            return balance
+
+    tx = {"to": _token_contract(token_address).address, "data": _balance_of_calldata(wallet)}
     for i in range(retries):
         try:
-            raw = token.functions.balanceOf(wallet).call()
-            return raw / 1e18
+            balance = int.from_bytes(await w3.eth.call(tx), "big")
+            _store_balance(key, balance)
+            return balance
+        except ContractLogicError:
+            raise
         except Exception as e:
             logger.error(f"[{i+1}/{retries}] Erro balanceOf: {e}")
-            time.sleep(delay)
-    return 0.0
+            if i < retries - 1:
+                await asyncio.sleep(min(delay * 2**i, RETRY_MAX_DELAY) + random.random() * RETRY_JITTER)
+    return 0
+
+def get_token_balance_sync(token_address: str, wallet: str, retries: int = 3, delay: float = 0.5) -> int:
+    """Wrapper síncrono de get_token_balance para chamadores fora de um event loop"""
+    return asyncio.run(get_token_balance(token_address, wallet, retries, delay))
+
+def _store_balance(key: Tuple[str, str], balance: int) -> None:
+    with _balance_lock:
+        _balance_cache[key] = (time.monotonic(), balance)
+    if _disk is not None:
+        _disk.set(("balance_wei",) + key, balance, expire=TTL_BALANCE)
 
-def get_wallet_status(wallet_address: str = None) -> str:
+def invalidate_balance(token_address: str, wallet: str = None) -> None:
+    """
+    Descarta o saldo em cache de um token (de uma carteira ou de todas).
+    Chamado após swaps para que a próxima leitura vá ao nó.
+    """
+    token = token_address.lower()
+    with _balance_lock:
+        if wallet:
+            _balance_cache.pop((token, wallet.lower()), None)
+        else:
+            for key in [k for k in _balance_cache if k[0] == token]:
+                del _balance_cache[key]
+    if _disk is not None:
+        if wallet:
+            _disk.delete(("balance_wei", token, wallet.lower()))
+        else:
+            for key in [k for k in _disk.iterkeys() if k[:2] == ("balance_wei", token)]:
+                _disk.delete(key)
+
+async def get_token_metadata(token_address: str) -> Dict:
+    """
+    decimals/symbol de um token. Imutáveis: lidos do nó uma única vez e
+    guardados em memória e em disco sem expiração.
+    """
+    token = token_address.lower()
+    metadata = _metadata_cache.get(token)
+    if metadata is None and _disk is not None:
+        metadata = _disk.get(("metadata", token))
+    if metadata is None:
+        contract = w3.eth.contract(address=to_checksum(token_address), abi=ERC20_METADATA_ABI)
+        decimals, symbol = await asyncio.gather(
+            contract.functions.decimals().call(),
+            contract.functions.symbol().call()
+        )
+        metadata = {"decimals": int(decimals), "symbol": symbol}
+        if _disk is not None:
+            _disk.set(("metadata", token), metadata, expire=None)
+    _metadata_cache[token] = metadata
+    return metadata
+
+async def warm_balance_cache(token_addrs: List[str], wallet: str = None) -> None:
+    """
+    Pré-carrega os saldos de vários tokens (uma chamada Multicall3), usado no
+    startup para as posições restauradas.
+    """
+    wallet = wallet or DEFAULT_WALLET
+    if not WEB3_AVAILABLE or not w3 or not wallet or not token_addrs:
+        return
+    try:
+        _, balances = await get_balances_batch(wallet, token_addrs)
+        for token, balance in balances.items():
+            _store_balance((token.lower(), wallet.lower()), balance)
+        logger.info(f"Cache de saldos aquecido para {len(balances)} tokens")
+    except Exception as e:
+        logger.warning(f"Falha ao aquecer cache de saldos: {e}")
+
+async def get_balances_batch(wallet: str, token_addrs: List[str]) -> Tuple[int, Dict[str, int]]:
+    """
+    Saldo de ETH e de vários tokens numa única chamada Multicall3 (aggregate).
+    Retorna (eth, {token: saldo}), tudo em wei.
+    """
+    wallet = to_checksum(wallet)
+    calls = [(MULTICALL3, multicall.encodeABI(fn_name="getEthBalance", args=[wallet]))]
+    calldata = _balance_of_calldata(wallet)
+    for addr in token_addrs:
+        calls.append((_token_contract(addr).address, calldata))
+
+    _, return_data = await multicall.functions.aggregate(calls).call()
+    # Cada retorno é um único uint256: decodificado direto dos bytes, sem o decoder ABI
+    eth, *balances = (int.from_bytes(ret[-32:], "big") for ret in return_data)
+    return eth, dict(zip(token_addrs, balances))
+
+async def _get_eth_balance(wallet: str) -> int:
+    try:
+        return await w3.eth.get_balance(wallet)
+    except Exception as e:
+        logger.error(f"Erro ETH balance: {e}")
+        return 0
+
+async def get_wallet_status(wallet_address: str = None) -> str:
     if not WEB3_AVAILABLE or not w3:
         return "❌ Web3 não disponível - não é possível verificar balance"
         
@@ -52,13 +209,17 @@ def get_wallet_status(wallet_address: str = None) -> str:
         return "❌ Endereço da carteira não configurado"
         
     try:
-        eth = w3.eth.get_balance(wallet) / 1e18
+        eth, balances = await get_balances_batch(wallet, [WETH_ADDR])
+        weth = balances[WETH_ADDR]
     except Exception as e:
-        logger.error(f"Erro ETH balance: {e}")
-        eth = 0.0
-    weth = get_token_balance(WETH_ADDR, wallet)
+        # Multicall indisponível: ETH e WETH consultados em paralelo
+        logger.warning(f"Multicall falhou, consultando saldos em paralelo: {e}")
+        eth, weth = await asyncio.gather(
+            _get_eth_balance(wallet),
+            get_token_balance(WETH_ADDR, wallet)
+        )
     return (
         f"📍 Carteira: {wallet}\n"
-        f"💰 ETH:  {eth:.6f}\n"
-        f"💰 WETH: {weth:.6f}"
+        f"💰 ETH:  {format_ether(eth)}\n"
+        f"💰 WETH: {format_ether(weth)}"
     )
@@ -1,37 +1,71 @@
 # classifier.py
 
-import asyncio
-from typing import Any
+import functools
+from typing import Any, Sequence
 
-from config import config
-from exchange_client import ExchangeClient
+try:
+    from eth_abi import encode as abi_encode
+    from eth_utils import function_signature_to_4byte_selector
+    WEB3_AVAILABLE = True
+except ImportError:
+    WEB3_AVAILABLE = False
+
+from config import config, CONFIG
+from exchange_client import ExchangeClient, InsufficientOutputError, ContractLogicError, BadFunctionCallOutput
+from utils import MULTICALL3, MULTICALL3_ABI, shared_async_web3, to_checksum
+
+HONEYPOT_SAMPLE_IN = 10**6  # pequena amostra
+GET_AMOUNTS_OUT_SELECTOR = function_signature_to_4byte_selector("getAmountsOut(uint256,address[])")
+
+@functools.lru_cache(maxsize=32)
+def _client(router: str) -> ExchangeClient:
+    """ExchangeClient reaproveitado por router (o construtor faz chamadas RPC)"""
+    return ExchangeClient(router)
+
+@functools.lru_cache(maxsize=1)
+def _multicall():
+    """Contrato Multicall3 assíncrono compartilhado"""
+    return shared_async_web3().eth.contract(address=MULTICALL3, abi=MULTICALL3_ABI)
 
 async def is_honeypot(token: str, router: str) -> bool:
     """
     Simula swap token→WETH para detectar honeypot.
+    Só reverts / saída nula contam como honeypot; erros de RPC são propagados.
     """
-    client = ExchangeClient(router)
-    loop = asyncio.get_event_loop()
+    client = _client(router)
     try:
-        await loop.run_in_executor(
-            None,
-            lambda: client._calc_amounts(
-                amount_in=10**6,  # pequena amostra
-                path=[token, config["WETH"]],
-                slippage_bps=0
-            )
+        await client._calc_amounts_async(
+            amount_in=HONEYPOT_SAMPLE_IN,
+            path=[token, config["WETH"]],
+            slippage_bps=0
         )
         return False
-    except Exception:
+    except (ContractLogicError, BadFunctionCallOutput, InsufficientOutputError):
         return True
 
+async def is_honeypot_multi(token: str, routers: Sequence[str]) -> bool:
+    """
+    Simula swap token→WETH em todos os routers numa única chamada Multicall3
+    (tryAggregate permissivo). Não é honeypot se qualquer router cotar saída > 0.
+    """
+    if len(routers) == 1:
+        return await is_honeypot(token, routers[0])
+
+    path = [to_checksum(token), to_checksum(config["WETH"])]
+    calldata = GET_AMOUNTS_OUT_SELECTOR + abi_encode(["uint256", "address[]"], [HONEYPOT_SAMPLE_IN, path])
+    calls = [(to_checksum(router), calldata) for router in routers]
+    results = await _multicall().functions.tryAggregate(False, calls).call()
+    # Último uint256 do array retornado = saída em WETH
+    return not any(ok and int.from_bytes(ret[-32:], "big") > 0 for ok, ret in results)
+
 async def should_buy(
     pair_addr: str,
     token0: str,
     token1: str,
     dex_info: Any
 ) -> bool:
-    token = token1 if token0.lower() == config["WETH"].lower() else token0
-    if await is_honeypot(token, dex_info.router):
+    token = token1 if int(token0, 16) == CONFIG.WETH_INT else token0
+    routers = getattr(dex_info, "routers", ()) or (dex_info.router,)
+    if await is_honeypot_multi(token, routers):
         return False
     return True
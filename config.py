@@ -14,21 +14,45 @@ Responsabilidades:
 - Fornecer um objeto `config` centralizado para toda a aplicação.
 """
 import os
+import re
 import logging
+import functools
+from dataclasses import dataclass
+from types import SimpleNamespace
 from decimal import Decimal, InvalidOperation
-from dotenv import load_dotenv
+from typing import Dict, List, Optional
 
-# Carrega as variáveis de ambiente do arquivo .env (se existir)
-load_dotenv()
+# Carrega as variáveis do arquivo .env (se existir) uma única vez por processo
+import _bootstrap_env  # noqa: F401 (import pelo efeito colateral)
+
+try:
+    from web3 import Web3
+    WEB3_AVAILABLE = True
+except ImportError:
+    WEB3_AVAILABLE = False
+
+# Snapshot do ambiente: get_env lê de um dict simples em vez do proxy os.environ
+_ENV = dict(os.environ)
+
+def refresh_env():
+    """
+    Recarrega o snapshot do ambiente (para variáveis alteradas em tempo de execução).
+    """
+    global _ENV
+    _ENV = dict(os.environ)
 
 # Configuração básica de logging
 logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s')
 
+@functools.lru_cache(maxsize=64)
+def _parse_bool(value: str) -> bool:
+    return value.lower() in ('true', '1', 't', 'y', 'yes')
+
 def get_env(key, default=None, required=False, var_type=str):
     """
     Busca uma variável de ambiente, com validação e conversão de tipo.
     """
-    value = os.getenv(key, default)
+    value = _ENV.get(key, default)
 
     if required and value is None:
         logging.error(f"Variável de ambiente obrigatória '{key}' não foi definida.")
@@ -41,7 +65,7 @@ def get_env(key, default=None, required=False, var_type=str):
         if var_type == bool:
             # **CORREÇÃO APLICADA AQUI**
             # Converte o valor para string antes de chamar .lower() para evitar o AttributeError
-            return str(value).lower() in ('true', '1', 't', 'y', 'yes')
+            return _parse_bool(str(value))
         if var_type == Decimal:
             return Decimal(str(value))
         if value == '': # Retorna default se a variável de ambiente estiver vazia
@@ -51,6 +75,47 @@ def get_env(key, default=None, required=False, var_type=str):
         logging.error(f"Não foi possível converter a variável '{key}' com valor '{value}' para o tipo '{var_type.__name__}'. Erro: {e}")
         raise ValueError(f"Variável '{key}' possui um formato inválido.") from e
 
+@dataclass(frozen=True)
+class DexConfig:
+    name: str
+    factory: str
+    router: str
+    type: str
+    init_code_hash: Optional[str] = None  # permite calcular o par (V2) / pool (V3) via CREATE2 sem RPC
+
+_DEX_KEY_RE = re.compile(r"^DEX_(\d+)_(NAME|FACTORY|ROUTER|TYPE|INIT_CODE_HASH)$")
+
+@functools.lru_cache(maxsize=8192)
+def _cs(addr_lower: str) -> str:
+    return Web3.to_checksum_address(addr_lower) if WEB3_AVAILABLE else addr_lower
+
+def load_dexes() -> List[DexConfig]:
+    """
+    Monta as DEXes a partir de DEX_<n>_NAME/FACTORY/ROUTER/TYPE (e do opcional
+    DEX_<n>_INIT_CODE_HASH) numa única passada pelo snapshot do ambiente,
+    ordenadas por <n>.
+    """
+    groups: Dict[int, Dict[str, str]] = {}
+    for key, value in _ENV.items():
+        m = _DEX_KEY_RE.match(key)
+        if m and value:
+            groups.setdefault(int(m.group(1)), {})[m.group(2)] = value
+
+    dexes = []
+    for idx in sorted(groups):
+        fields = groups[idx]
+        if not {"NAME", "FACTORY", "ROUTER"} <= fields.keys():
+            logging.warning(f"DEX_{idx}_* incompleta (NAME, FACTORY e ROUTER são obrigatórios); ignorada.")
+            continue
+        dexes.append(DexConfig(
+            name=fields["NAME"],
+            factory=_cs(fields["FACTORY"].lower()),
+            router=_cs(fields["ROUTER"].lower()),
+            type=fields.get("TYPE", "v2").lower(),
+            init_code_hash=fields.get("INIT_CODE_HASH")
+        ))
+    return dexes
+
 # --- Dicionário de Configuração ---
 config = {}
 
@@ -58,7 +123,17 @@ config = {}
 config["TELEGRAM_BOT_TOKEN"] = get_env("TELEGRAM_BOT_TOKEN", required=True)
 config["TELEGRAM_CHAT_ID"] = get_env("TELEGRAM_CHAT_ID", required=True)
 config["PRIVATE_KEY"] = get_env("PRIVATE_KEY", required=True)
+
+# Carteira: WALLET_ADDRESS ou derivada offline da PRIVATE_KEY (secp256k1 + keccak, sem provider/RPC)
+config["WALLET"] = get_env("WALLET_ADDRESS", required=False)
+if not config["WALLET"]:
+    try:
+        from eth_account import Account
+    except ImportError as e:
+        raise RuntimeError("eth_account é necessário para derivar WALLET da PRIVATE_KEY (ou defina WALLET_ADDRESS)") from e
+    config["WALLET"] = Account.from_key(config["PRIVATE_KEY"]).address
 config["BASE_RPC_URL"] = get_env("BASE_RPC_URL", required=True)
+config["WETH"] = get_env("WETH", default="0x4200000000000000000000000000000000000006")  # WETH na Base
 config["BASESCAN_API_KEY"] = get_env("BASESCAN_API_KEY", required=True)
 
 # --- Configurações de Estratégia de Trading ---
@@ -95,6 +170,15 @@ config["HONEYPOT_CHECK_ENABLED"] = get_env("HONEYPOT_CHECK_ENABLED", default=Tru
 config["DISCOVERY_INTERVAL"] = get_env("DISCOVERY_INTERVAL", default=1, var_type=int)
 config["MEMPOOL_MONITOR_INTERVAL"] = get_env("MEMPOOL_MONITOR_INTERVAL", default=0.2, var_type=float)
 config["EXIT_POLL_INTERVAL"] = get_env("EXIT_POLL_INTERVAL", default=3, var_type=int)
+config["WS_URL"] = get_env("WS_URL", required=False)  # WebSocket RPC para eventos de pares
+config["RPC_CONCURRENCY"] = get_env("RPC_CONCURRENCY", default=8, var_type=int)
+config["EXIT_RPC_CONCURRENCY"] = get_env("EXIT_RPC_CONCURRENCY", default=4, var_type=int)
+config["STATE_FILE"] = get_env("STATE_FILE", default="./.cache/sniper_state.json")  # snapshot de posições (vazio desativa)
+config["TTL_BALANCE"] = get_env("TTL_BALANCE", default=30, var_type=float)  # segundos de cache de saldo por (token, carteira)
+config["REDIS_URL"] = get_env("REDIS_URL", required=False)  # cache L2 compartilhado entre processos (vazio desativa)
+
+# --- DEXes (DEX_<n>_NAME / _FACTORY / _ROUTER / _TYPE) ---
+config["DEXES"] = load_dexes()
 
 # --- Configurações de Autenticação (Opcionais) ---
 config["AUTH0_DOMAIN"]        = get_env("AUTH0_DOMAIN",        required=False)
@@ -103,5 +187,14 @@ config["AUTH0_CLIENT_SECRET"] = get_env("AUTH0_CLIENT_SECRET", required=False)
 config["AUTH0_AUDIENCE"]      = get_env("AUTH0_AUDIENCE",      required=False)
 config["FLASK_SECRET_KEY"]    = get_env("FLASK_SECRET_KEY",    default="uma-chave-secreta-default")
 
+# --- Visão por atributo com valores pré-normalizados (hot paths) ---
+# Snapshot tirado no import: alterações posteriores em `config` não se refletem aqui
+_chat_id = str(config.get("TELEGRAM_CHAT_ID") or "")
+CONFIG = SimpleNamespace(**{
+    **config,
+    "WETH_INT": int(config["WETH"], 16),  # comparação de endereço sem alocar strings
+    "TELEGRAM_CHAT_ID": int(_chat_id) if _chat_id.lstrip("-").isdigit() else _chat_id,
+})
+
 # --- Log de verificação ---
 logging.info("Módulo de configuração carregado. %d variáveis processadas.", len(config))
\ No newline at end of file
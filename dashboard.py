@@ -1,11 +1,27 @@
-from flask import Flask, render_template_string
+import asyncio
+import time
+
+from flask import Flask
 from strategy import TradingStrategy
 from dex import DexClient
 from paper_trader import PaperTrader
 from telegram_alert import TelegramAlert
 
+try:
+    from flask_caching import Cache
+    FLASK_CACHING_AVAILABLE = True
+except ImportError:
+    FLASK_CACHING_AVAILABLE = False
+
 app = Flask(__name__)
 
+# Refreshes em rajada são servidos da memória por 1 s
+if FLASK_CACHING_AVAILABLE:
+    cache = Cache(app, config={"CACHE_TYPE": "SimpleCache"})
+    cached_route = cache.cached(timeout=1)
+else:
+    cached_route = lambda f: f
+
 # Instâncias simuladas (substitua pelas reais)
 dex = DexClient()
 trader = PaperTrader()
@@ -25,19 +41,36 @@ TEMPLATE = """
 </ul>
 """
 
+# Template compilado uma vez (mesmo ambiente Jinja do Flask, com autoescape)
+app.jinja_env.auto_reload = False
+_TPL = app.jinja_env.from_string(TEMPLATE)
+
+# Fallback por RPC (só antes do primeiro ciclo da estratégia), limitado a 1 chamada a cada 500 ms
+PRICE_FALLBACK_TTL = 0.5
+_fallback = {"ts": 0.0, "price": None}
+
+def _fallback_price():
+    now = time.monotonic()
+    if _fallback["price"] is None or now - _fallback["ts"] >= PRICE_FALLBACK_TTL:
+        _fallback["price"] = asyncio.run(dex.get_token_price(strategy.token_address))
+        _fallback["ts"] = now
+    return _fallback["price"]
+
 @app.route("/")
+@cached_route
 def dashboard():
-    price = dex.get_token_price(strategy.token_address)
+    price = strategy.last_seen_price
+    if price is None:
+        price = _fallback_price()
     last = strategy.last_price or price
     change = ((price - last) / last * 100) if last else 0
     trades = strategy.risk.daily_trades
     losses = strategy.risk.loss_streak
 
-    return render_template_string(TEMPLATE,
-                                  price=f"{price:.6f}",
-                                  change=f"{change:.2f}",
-                                  trades=trades,
-                                  losses=losses)
+    return _TPL.render(price=f"{price:.6f}",
+                       change=f"{change:.2f}",
+                       trades=trades,
+                       losses=losses)
 
 if __name__ == "__main__":
     app.run(debug=True)
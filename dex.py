@@ -1,42 +1,46 @@
 # dex_client.py
 
-import json
+import asyncio
 import logging
 from enum import Enum
-from functools import lru_cache
 from decimal import Decimal
-from pathlib import Path
-from typing import Dict, List, Tuple, Union
+from typing import Dict, Tuple, Union
 
 try:
-    from web3 import Web3
-    from web3.contract import Contract
+    from web3 import AsyncWeb3
+    from web3.contract import AsyncContract as Contract
     from web3.exceptions import BadFunctionCallOutput, ABIFunctionNotFound, ContractLogicError
     WEB3_AVAILABLE = True
 except ImportError:
     WEB3_AVAILABLE = False
-    Web3 = None
+    AsyncWeb3 = None
     Contract = None
     BadFunctionCallOutput = Exception
     ABIFunctionNotFound = Exception
     ContractLogicError = Exception
 
 from config import config
+from math_kernels import dynamic_slippage
+from utils import load_abi, to_checksum
 
 
-# CONFIGURAÇÃO DE PATHS PARA OS ABIS
-BASE_DIR = Path(__file__).parent
-ABIS_DIR = BASE_DIR / "abis"
-
-with open(ABIS_DIR / "uniswap_router.json", encoding="utf-8") as f:
-    ROUTER_ABI = json.load(f)
-with open(ABIS_DIR / "uniswap_v2_pair.json", encoding="utf-8") as f:
-    V2_PAIR_ABI = json.load(f)
-with open(ABIS_DIR / "uniswap_v3_pool.json", encoding="utf-8") as f:
-    V3_POOL_ABI = json.load(f)
+# ABIs em abis/<nome>.json, carregadas sob demanda por utils.load_abi
+ROUTER_ABI = "uniswap_router"
+V2_PAIR_ABI = "uniswap_v2_pair"
+V3_POOL_ABI = "uniswap_v3_pool"
 
 logger = logging.getLogger(__name__)
 
+WEI_PER_ETH = 10**18
+
+
+def _to_wei(amount_eth: Union[float, Decimal]) -> int:
+    return int(Decimal(str(amount_eth)) * WEI_PER_ETH)
+
+
+# Liquidez mínima em wei, convertida uma vez (comparações só com inteiros)
+MIN_LIQ_WETH_WEI = _to_wei(config.get("MIN_LIQ_WETH", 0.5))
+
 
 class DexVersion(str, Enum):
     V2 = "v2"
@@ -44,64 +48,80 @@ class DexVersion(str, Enum):
     UNKNOWN = "unknown"
 
 
+# Versão de cada pool (nunca muda): cache do processo, compartilhado entre
+# instâncias, com um lock por endereço para que só uma sondagem vá ao nó
+_VERSION_CACHE: Dict[str, DexVersion] = {}
+_VERSION_LOCKS: Dict[str, asyncio.Lock] = {}
+
+
 class DexClient:
     """
     Cliente on-chain para pares/pools:
       - detecta versão (V2 ou V3) via ABI;
-      - lê reservas ou liquidez;
+      - lê reservas ou liquidez (inteiros brutos, em wei);
       - checa condição mínima (usando config['MIN_LIQ_WETH']);
       - calcula slippage dinâmica.
+
+    Todas as leituras on-chain são corrotinas sobre AsyncWeb3: `web3` deve ser
+    um AsyncWeb3 (ex.: AsyncWeb3(utils.async_http_provider())).
     """
-    def __init__(self, web3: Web3, router_address: str):
+    def __init__(self, web3: AsyncWeb3, router_address: str):
         self.web3 = web3
-        self._contract_cache: Dict[Tuple[str, Tuple[str, ...]], Contract] = {}
+        self._contract_cache: Dict[Tuple[str, str], Contract] = {}
         self.router = self._contract(router_address, ROUTER_ABI)
 
-    def _contract(self, address: str, abi: List[dict]) -> Contract:
-        checksum = Web3.to_checksum_address(address)
-        key = (checksum, tuple(sorted(item.get("name", "") for item in abi)))
+    def _contract(self, address: str, abi_name: str) -> Contract:
+        checksum = to_checksum(address)
+        key = (checksum, abi_name)
         if key not in self._contract_cache:
-            logger.debug(f"Caching new contract {checksum}")
+            logger.debug("Caching new contract %s", checksum)
             self._contract_cache[key] = self.web3.eth.contract(
                 address=checksum,
-                abi=abi
+                abi=load_abi(abi_name)
             )
         return self._contract_cache[key]
 
-    @lru_cache(maxsize=128)
-    def detect_version(self, pair_address: str) -> DexVersion:
-        addr = Web3.to_checksum_address(pair_address)
-        # V2?
-        try:
-            c = self._contract(addr, V2_PAIR_ABI)
-            c.functions.getReserves().call()
-            return DexVersion.V2
-        except (BadFunctionCallOutput, ABIFunctionNotFound):
-            pass
-        except Exception as e:
-            logger.debug(f"detect_version V2 check falhou: {e}")
-        # V3?
-        try:
-            c = self._contract(addr, V3_POOL_ABI)
-            c.functions.liquidity().call()
-            return DexVersion.V3
-        except (BadFunctionCallOutput, ABIFunctionNotFound):
-            pass
-        except Exception as e:
-            logger.debug(f"detect_version V3 check falhou: {e}")
+    async def detect_version(self, pair_address: str) -> DexVersion:
+        addr = to_checksum(pair_address)
+        version = _VERSION_CACHE.get(addr)
+        if version is not None:
+            return version
+
+        lock = _VERSION_LOCKS.setdefault(addr, asyncio.Lock())
+        async with lock:
+            version = _VERSION_CACHE.get(addr)
+            if version is None:
+                version = await self._probe_version(addr)
+                # UNKNOWN pode ser falha transitória de RPC: não fica em cache
+                if version != DexVersion.UNKNOWN:
+                    _VERSION_CACHE[addr] = version
+        _VERSION_LOCKS.pop(addr, None)
+        return version
+
+    async def _probe_version(self, addr: str) -> DexVersion:
+        # Sondas V2 (getReserves) e V3 (liquidity) em paralelo; V2 tem prioridade
+        v2, v3 = await asyncio.gather(
+            self._contract(addr, V2_PAIR_ABI).functions.getReserves().call(),
+            self._contract(addr, V3_POOL_ABI).functions.liquidity().call(),
+            return_exceptions=True
+        )
+        for version, result in ((DexVersion.V2, v2), (DexVersion.V3, v3)):
+            if not isinstance(result, BaseException):
+                return version
+            if not isinstance(result, (BadFunctionCallOutput, ABIFunctionNotFound)):
+                logger.debug("detect_version %s check falhou: %s", version.value.upper(), result)
         return DexVersion.UNKNOWN
 
-    def _get_reserves(self, pair_address: str) -> Tuple[Decimal, Decimal]:
+    async def _get_reserves(self, pair_address: str) -> Tuple[int, int]:
         contract = self._contract(pair_address, V2_PAIR_ABI)
-        r0, r1, _ = contract.functions.getReserves().call()
-        return Decimal(r0) / Decimal(1e18), Decimal(r1) / Decimal(1e18)
+        r0, r1, _ = await contract.functions.getReserves().call()
+        return r0, r1
 
-    def _get_liquidity_v3(self, pool_address: str) -> Decimal:
+    async def _get_liquidity_v3(self, pool_address: str) -> int:
         contract = self._contract(pool_address, V3_POOL_ABI)
-        liq = contract.functions.liquidity().call()
-        return Decimal(liq) / Decimal(1e18)
+        return await contract.functions.liquidity().call()
 
-    def has_min_liquidity(
+    async def has_min_liquidity(
         self,
         pair_address: str,
         min_liq_weth: Union[float, Decimal] = None
@@ -110,54 +130,47 @@ class DexClient:
         Verifica se o par/pool tem liquidez mínima em WETH.
         Se min_liq_weth não for passado, usa config["MIN_LIQ_WETH"].
         """
-        if min_liq_weth is None:
-            min_liq_weth = config["MIN_LIQ_WETH"]
+        min_wei = MIN_LIQ_WETH_WEI if min_liq_weth is None else _to_wei(min_liq_weth)
 
-        version = self.detect_version(pair_address)
+        version = await self.detect_version(pair_address)
         try:
             if version == DexVersion.V2:
-                r0, r1 = self._get_reserves(pair_address)
-                reserve_weth = max(r0, r1)
-                logger.info(f"[{pair_address}] V2 liquidez = {reserve_weth:.4f} WETH")
-                return reserve_weth >= Decimal(min_liq_weth)
+                reserve_wei = max(await self._get_reserves(pair_address))
+                logger.info("[%s] V2 liquidez = %.4f WETH", pair_address, reserve_wei / WEI_PER_ETH)
+                return reserve_wei >= min_wei
             if version == DexVersion.V3:
-                reserve_eq = self._get_liquidity_v3(pair_address)
-                logger.info(f"[{pair_address}] V3 liquidez eq = {reserve_eq:.4f} WETH")
-                return reserve_eq >= Decimal(min_liq_weth)
-            logger.warning(f"[{pair_address}] Tipo de pool desconhecido: {version}")
+                liquidity = await self._get_liquidity_v3(pair_address)
+                logger.info("[%s] V3 liquidez eq = %.4f WETH", pair_address, liquidity / WEI_PER_ETH)
+                return liquidity >= min_wei
+            logger.warning("[%s] Tipo de pool desconhecido: %s", pair_address, version)
             return False
         except Exception as e:
-            logger.error(f"Erro ao verificar liquidez ({version}): {e}", exc_info=True)
+            logger.error("Erro ao verificar liquidez (%s): %s", version, e, exc_info=True)
             return False
 
-    def calc_dynamic_slippage(
+    async def calc_dynamic_slippage(
         self,
         pair_address: str,
         amount_in_eth: Union[float, Decimal]
-    ) -> Decimal:
+    ) -> float:
         """
         Retorna slippage dinâmica (fracional) com base na liquidez.
         """
-        version = self.detect_version(pair_address)
-        amt_in = Decimal(str(amount_in_eth))
+        version = await self.detect_version(pair_address)
+        amt_in_wei = float(amount_in_eth) * WEI_PER_ETH
         try:
             if version == DexVersion.V2:
-                r0, r1 = self._get_reserves(pair_address)
-                reserve = max(r0, r1)
-                impact = amt_in / reserve
-                sl = (impact * Decimal("1.5")).quantize(Decimal("0.00000001"))
-                return min(max(sl, Decimal("0.002")), Decimal("0.02"))
+                depth = float(max(await self._get_reserves(pair_address)))
+                return dynamic_slippage(amt_in_wei, depth, 1.5, 0.002, 0.02)
             if version == DexVersion.V3:
-                reserve = self._get_liquidity_v3(pair_address)
-                impact = amt_in / reserve
-                sl = (impact * Decimal("2")).quantize(Decimal("0.00000001"))
-                return min(max(sl, Decimal("0.0025")), Decimal("0.025"))
+                depth = float(await self._get_liquidity_v3(pair_address))
+                return dynamic_slippage(amt_in_wei, depth, 2.0, 0.0025, 0.025)
         except Exception as e:
-            logger.error(f"Erro ao calcular slippage ({version}): {e}", exc_info=True)
+            logger.error("Erro ao calcular slippage (%s): %s", version, e, exc_info=True)
         # fallback genérico
-        return Decimal("0.005")
+        return 0.005
 
-    def get_token_price(
+    async def get_token_price(
         self,
         token_address: str,
         weth_address: str,
@@ -169,22 +182,20 @@ class DexClient:
         """
         try:
             path = [
-                Web3.to_checksum_address(token_address),
-                Web3.to_checksum_address(weth_address)
+                to_checksum(token_address),
+                to_checksum(weth_address)
             ]
-            amounts = self.router.functions.getAmountsOut(amount_tokens, path).call()
+            amounts = await self.router.functions.getAmountsOut(amount_tokens, path).call()
             price_weth = Decimal(amounts[-1]) / Decimal(1e18)
-            logger.info(
-                f"[Price] {Decimal(amount_tokens) / Decimal(1e18):.4f} token = "
-                f"{price_weth:.6f} WETH"
-            )
+            # Decimal só vira texto se o nível INFO estiver ativo
+            logger.info("[Price] %.4f token = %.6f WETH", amount_tokens / 1e18, price_weth)
             return price_weth
         except ContractLogicError as e:
-            logger.warning(f"Revert ao obter preço do token {token_address}: {e}")
+            logger.warning("Revert ao obter preço do token %s: %s", token_address, e)
             return None
         except Exception as e:
             logger.error(
-                f"Erro inesperado ao obter preço do token {token_address}: {e}",
+                "Erro inesperado ao obter preço do token %s: %s", token_address, e,
                 exc_info=True
             )
             return None
@@ -4,20 +4,119 @@ Suporta múltiplas DEXs na rede Base com otimização automática
 """
 
 import asyncio
+import functools
 import logging
+import threading
+import time
 from typing import Dict, List, Optional, Tuple
 from dataclasses import dataclass
 from decimal import Decimal
 from enum import Enum
 
-from web3 import Web3
-from eth_utils import to_checksum_address
+import numpy as np
+
+from web3 import AsyncWeb3
+from eth_abi import decode, encode
+from eth_utils import function_signature_to_4byte_selector, keccak
+
+try:
+    from cachetools import TTLCache
+    CACHETOOLS_AVAILABLE = True
+except ImportError:
+    CACHETOOLS_AVAILABLE = False
 
 from config import config
-from utils import get_token_info
+from math_kernels import (
+    GAS_CAP, LIQUIDITY_CAP_ETH, W_AMOUNT, W_GAS, W_IMPACT, W_LIQUIDITY,
+    efficiency_score, price_impact_v2, price_impact_v3,
+)
+from l2_cache import L2Cache, TTL_GAS_PRICE, TTL_PAIR, TTL_RESERVES, TTL_V3_QUOTE
+from utils import MULTICALL3, RpcBatcher, async_http_provider, get_token_info, to_checksum
 
 logger = logging.getLogger(__name__)
 
+# Seletores de 4 bytes calculados uma vez: o calldata é montado direto com
+# seletor + eth_abi.encode, sem objetos Contract nem parsing de ABI por chamada
+AGGREGATE3_SELECTOR = function_signature_to_4byte_selector("aggregate3((address,bool,bytes)[])")
+GET_AMOUNTS_OUT_SELECTOR = function_signature_to_4byte_selector("getAmountsOut(uint256,address[])")
+GET_PAIR_SELECTOR = function_signature_to_4byte_selector("getPair(address,address)")
+GET_RESERVES_SELECTOR = function_signature_to_4byte_selector("getReserves()")
+GET_POOL_SELECTOR = function_signature_to_4byte_selector("getPool(address,address,uint24)")
+SLOT0_SELECTOR = function_signature_to_4byte_selector("slot0()")
+QUOTE_EXACT_INPUT_SINGLE_SELECTOR = function_signature_to_4byte_selector(
+    "quoteExactInputSingle(address,address,uint24,uint256,uint160)"
+)
+# Swap de venda V2 - layout idêntico em todos os routers estilo Uniswap V2
+SWAP_EXACT_TOKENS_FOR_ETH_SELECTOR = function_signature_to_4byte_selector(
+    "swapExactTokensForETHSupportingFeeOnTransferTokens(uint256,uint256,address[],address,uint256)"
+)
+
+# Pesos do efficiency score: amount, liquidity, impact, gas
+EFFICIENCY_WEIGHTS = np.array([W_AMOUNT, W_LIQUIDITY, W_IMPACT, W_GAS])
+
+def _calldata(selector: bytes, types: Tuple[str, ...] = (), args: Tuple = ()) -> bytes:
+    """Calldata = seletor + argumentos codificados em ABI"""
+    return selector + encode(list(types), list(args)) if types else selector
+
+# Reservas mudam no máximo uma vez por bloco (~2 s na Base)
+RESERVES_CACHE_SIZE = 4096
+RESERVES_CACHE_TTL = 2
+BLOCK_NUMBER_TTL = 1.0
+
+# Fees comuns no V3 (0.05%, 0.3%, 1%) e validade do tier já descoberto por par
+V3_FEE_TIERS = (500, 3000, 10000)
+FEE_TIER_TTL = 300.0
+
+# Quoters V3 por DEX (checksum calculado uma vez no import)
+V3_QUOTERS = {
+    "UniswapV3": "0x61fFE014bA17989E743c5F6cB21bF9697530B21e",
+    "SushiSwapV3": "0x64e8802FE490fa7cc61d3463958199161Bb608A7",
+    "PancakeSwapV3": "0xB048Bbc1Ee6b733FFfCFb9e9CeF7375518e25997",
+    # Adicionar outros conforme necessário
+}
+
+@functools.lru_cache(maxsize=4096)
+def compute_pair_address_v2(factory: str, token_a: str, token_b: str, init_code_hash: str) -> str:
+    """
+    Endereço do par V2 via CREATE2, sem RPC:
+    keccak(0xff ++ factory ++ keccak(token0 ++ token1) ++ init_code_hash)[12:]
+    """
+    token0, token1 = sorted((token_a.lower(), token_b.lower()))
+    salt = keccak(bytes.fromhex(token0[2:]) + bytes.fromhex(token1[2:]))
+    digest = keccak(
+        b"\xff"
+        + bytes.fromhex(factory.lower()[2:])
+        + salt
+        + bytes.fromhex(init_code_hash[2:] if init_code_hash.startswith("0x") else init_code_hash)
+    )
+    return to_checksum("0x" + digest[12:].hex())
+
+@functools.lru_cache(maxsize=4096)
+def compute_pool_address_v3(factory: str, token_a: str, token_b: str, fee: int, init_code_hash: str) -> str:
+    """
+    Endereço da pool V3 via CREATE2, sem RPC:
+    keccak(0xff ++ factory ++ keccak(abi.encode(token0, token1, fee)) ++ init_code_hash)[12:]
+    """
+    token0, token1 = sorted((token_a.lower(), token_b.lower()))
+    salt = keccak(encode(["address", "address", "uint24"], [token0, token1, fee]))
+    digest = keccak(
+        b"\xff"
+        + bytes.fromhex(factory.lower()[2:])
+        + salt
+        + bytes.fromhex(init_code_hash[2:] if init_code_hash.startswith("0x") else init_code_hash)
+    )
+    return to_checksum("0x" + digest[12:].hex())
+
+def spot_price_from_sqrt_price_x96(sqrt_price_x96: int, token_in: str, token_out: str) -> float:
+    """
+    Preço spot (unidades brutas de token_out por token_in) a partir do slot0.
+    sqrtPriceX96 codifica token1/token0; inverte quando token_in é o token1.
+    """
+    price = (sqrt_price_x96 / 2**96) ** 2
+    if token_in.lower() > token_out.lower():
+        return 1 / price if price else 0.0
+    return price
+
 class DexType(Enum):
     UNISWAP_V2 = "v2"
     UNISWAP_V3 = "v3"
@@ -48,10 +147,34 @@ class DexAggregator:
     """Agregador de DEXs para otimização de preços"""
     
     def __init__(self):
-        self.w3 = Web3(Web3.HTTPProvider(config["RPC_URL"]))
+        self.w3 = AsyncWeb3(async_http_provider())
+        self.rpc_batch = RpcBatcher()
         self.dexes = config["DEXES"]
-        self.gas_price_cache = {}
         self.cache_ttl = 30  # 30 segundos
+        # Gas price mantido por um poller em background (sem RPC no caminho do trade)
+        self._gas_price: Optional[int] = None
+        self._gas_task: Optional[asyncio.Task] = None
+        
+        # Endereços de par são imutáveis: cache sem expiração
+        # (factory, (token_a, token_b)) -> par; (factory, (token_a, token_b), fee) -> pool V3
+        self._pair_cache: Dict[tuple, str] = {}
+        # (par, bloco) -> (reserve0, reserve1); sem cachetools, limpo a cada bloco novo
+        self._reserves_cache = (
+            TTLCache(maxsize=RESERVES_CACHE_SIZE, ttl=RESERVES_CACHE_TTL)
+            if CACHETOOLS_AVAILABLE else {}
+        )
+        # (pool V3, bloco) -> sqrtPriceX96 do slot0
+        self._slot0_cache = (
+            TTLCache(maxsize=RESERVES_CACHE_SIZE, ttl=RESERVES_CACHE_TTL)
+            if CACHETOOLS_AVAILABLE else {}
+        )
+        self._block = (0.0, None)  # (instante, número do bloco)
+        # Leituras em andamento (single-flight): chave -> task compartilhada
+        self._inflight: Dict[tuple, asyncio.Task] = {}
+        # (dex, token_in, token_out) -> (instante, fee tier com melhor cotação)
+        self._fee_tier_cache: Dict[Tuple[str, str, str], Tuple[float, int]] = {}
+        # L2 compartilhado entre processos (Redis, opcional via REDIS_URL)
+        self.l2 = L2Cache()
         
         # Configurações de otimização
         self.max_slippage = config.get("SLIPPAGE_BPS", 500) / 10000  # 5%
@@ -67,21 +190,25 @@ class DexAggregator:
     ) -> Optional[BestQuote]:
         """Encontra a melhor cotação entre todas as DEXs"""
         
-        logger.info(f"🔍 Buscando melhor preço para {amount_in} tokens...")
+        logger.info("🔍 Buscando melhor preço para %d tokens...", amount_in)
+        
+        # Bloco lido uma vez: todas as leituras internas usam a mesma época do cache
+        block_number = await self._get_block_number()
         
         # Obtém cotações de todas as DEXs em paralelo
-        tasks = []
-        for dex in self.dexes:
-            task = self._get_dex_quote(dex, token_in, token_out, amount_in, is_buy)
-            tasks.append(task)
-            
-        quotes = await asyncio.gather(*tasks, return_exceptions=True)
+        tasks = {
+            asyncio.ensure_future(self._get_dex_quote(dex, token_in, token_out, amount_in, is_buy, block_number)): i
+            for i, dex in enumerate(self.dexes)
+        }
+        quotes = await self._collect_quotes(tasks, token_in, token_out, block_number)
         
         # Filtra cotações válidas
         valid_quotes = []
         for i, quote in enumerate(quotes):
+            if isinstance(quote, asyncio.CancelledError):
+                continue  # DEX descartada: não tinha como superar a melhor
             if isinstance(quote, Exception):
-                logger.debug(f"Erro na DEX {self.dexes[i].name}: {quote}")
+                logger.debug("Erro na DEX %s: %s", self.dexes[i].name, quote)
                 continue
             if quote and quote.is_available:
                 valid_quotes.append(quote)
@@ -96,30 +223,184 @@ class DexAggregator:
         if best_quote:
             dex_name = best_quote.dex_quote.dex_name
             amount_out = best_quote.dex_quote.amount_out
-            logger.info(f"✅ Melhor preço: {dex_name} - {amount_out} tokens")
+            logger.info("✅ Melhor preço: %s - %d tokens", dex_name, amount_out)
             
         return best_quote
         
+    async def _collect_quotes(
+        self,
+        tasks: Dict["asyncio.Task", int],
+        token_in: str,
+        token_out: str,
+        block_number: Optional[int]
+    ) -> list:
+        """
+        Aguarda as cotações conforme chegam. Quando a melhor cotação válida já
+        supera o teto de score de todas as DEXs pendentes (teto derivado das
+        reservas em cache do bloco), cancela as pendentes em vez de esperá-las.
+        """
+        results: list = [None] * len(tasks)
+        bounds = {
+            task: self._score_upper_bound(self.dexes[i], token_in, token_out, block_number)
+            for task, i in tasks.items()
+        }
+        best_score = float("-inf")
+        pending = set(tasks)
+        
+        try:
+            while pending:
+                done, pending = await asyncio.wait(pending, return_when=asyncio.FIRST_COMPLETED)
+                for task in done:
+                    try:
+                        quote = task.result()
+                    except Exception as e:
+                        results[tasks[task]] = e
+                        continue
+                    results[tasks[task]] = quote
+                    if quote and quote.is_available and self._passes_filters(quote):
+                        slippage_cost = int(quote.amount_out * quote.slippage)
+                        best_score = max(best_score, self._calculate_efficiency_score(
+                            quote, quote.amount_out - slippage_cost, 0
+                        ))
+                        
+                if pending and best_score > max(bounds[task] for task in pending):
+                    for task in pending:
+                        results[tasks[task]] = asyncio.CancelledError()
+                    logger.debug("Saída antecipada: %d DEX(s) pendente(s) canceladas", len(pending))
+                    break
+        finally:
+            # Saída antecipada (ou get_best_quote cancelado): nada fica rodando solto
+            for task in pending:
+                task.cancel()
+                
+        return results
+        
+    def _passes_filters(self, quote: DexQuote) -> bool:
+        """Mesmos filtros de _select_best_quote"""
+        return quote.price_impact <= self.max_price_impact and quote.liquidity >= self.min_liquidity
+        
+    def _score_upper_bound(self, dex_config, token_in: str, token_out: str, block_number: Optional[int]) -> float:
+        """
+        Teto do efficiency score que uma DEX ainda pode atingir. Para V2 com
+        reservas do bloco em cache, amount_out < reserve_out; sem informação
+        (V3, par ou reservas desconhecidos) o teto é infinito.
+        """
+        if dex_config.type != "v2" or block_number is None:
+            return float("inf")
+        pair_key = self._pair_key(dex_config.factory, token_in, token_out)
+        pair_address = self._pair_cache.get(pair_key) or self._create2_pair(dex_config, token_in, token_out)
+        if pair_address is None:
+            return float("inf")
+        reserves = self._reserves_cache.get((pair_address.lower(), block_number))
+        if reserves is None:
+            return float("inf")
+            
+        if token_in.lower() > token_out.lower():
+            reserves = (reserves[1], reserves[0])
+        liquidity = float(self._liquidity_from_reserves(reserves, token_in, token_out))
+        # Melhor caso: todo o reserve_out, sem impact nem gas
+        factors = np.array([reserves[1] / 1e18, min(liquidity, LIQUIDITY_CAP_ETH) / LIQUIDITY_CAP_ETH, 1.0, 1.0])
+        return float(factors @ EFFICIENCY_WEIGHTS)
+        
+    async def batch_get_prices(
+        self,
+        token_addresses: List[str],
+        weth: str,
+        amount_in: int = int(1e18)
+    ) -> Dict[str, float]:
+        """
+        Cota vários tokens → WETH em uma única chamada Multicall3 (aggregate3)
+        
+        Cada token é cotado em todos os routers V2 configurados e o maior
+        amount_out é mantido. Retorna {token_address: preço em ETH}.
+        """
+        if not token_addresses:
+            return {}
+            
+        try:
+            routers = [to_checksum(dex.router) for dex in self.dexes if dex.type == "v2"]
+            if not routers:
+                return {}
+                
+            weth = to_checksum(weth)
+            
+            # Monta uma chamada getAmountsOut por (token, router)
+            calls = []
+            call_tokens = []
+            for token_address in token_addresses:
+                path = [to_checksum(token_address), weth]
+                call_data = _calldata(GET_AMOUNTS_OUT_SELECTOR, ("uint256", "address[]"), (amount_in, path))
+                for router in routers:
+                    calls.append((router, True, call_data))
+                    call_tokens.append(token_address)
+                    
+            results = await self._aggregate3(calls)
+            
+            # Decodifica returnData por índice e mantém a melhor cotação
+            prices: Dict[str, float] = {}
+            for token_address, (success, return_data) in zip(call_tokens, results):
+                if not success or not return_data:
+                    continue
+                amounts = decode(["uint256[]"], return_data)[0]
+                price = amounts[-1] / 1e18
+                if price > prices.get(token_address, 0.0):
+                    prices[token_address] = price
+                    
+            return prices
+            
+        except Exception as e:
+            logger.error("❌ Erro no multicall de preços: %s", e)
+            return {}
+            
+    async def _aggregate3(self, calls: List[Tuple[str, bool, bytes]]) -> List[Tuple[bool, bytes]]:
+        """Executa um lote de Call3 (target, allowFailure, callData) em um único eth_call"""
+        data = await self._eth_call(
+            MULTICALL3, _calldata(AGGREGATE3_SELECTOR, ("(address,bool,bytes)[]",), (calls,))
+        )
+        if not data:
+            raise ValueError("aggregate3 reverteu")
+        return decode(["(bool,bytes)[]"], data)[0]
+        
+    async def _singleflight(self, key: tuple, coro_factory):
+        """
+        Coalesce leituras idênticas concorrentes: enquanto a primeira está em
+        andamento, as demais aguardam o mesmo resultado em vez de repetir o RPC.
+        """
+        task = self._inflight.get(key)
+        if task is None:
+            task = asyncio.ensure_future(coro_factory())
+            self._inflight[key] = task
+            task.add_done_callback(
+                lambda t: self._inflight.pop(key, None) if self._inflight.get(key) is t else None
+            )
+        # shield: cancelar um dos chamadores não cancela a leitura dos outros
+        return await asyncio.shield(task)
+        
+    def _eth_call(self, to: str, data: bytes) -> "asyncio.Future":
+        """Enfileira um eth_call com calldata bruto no lote JSON-RPC"""
+        return self.rpc_batch.eth_call(to, "0x" + data.hex())
+        
     async def _get_dex_quote(
         self, 
         dex_config, 
         token_in: str, 
         token_out: str, 
         amount_in: int,
-        is_buy: bool
+        is_buy: bool,
+        block_number: Optional[int] = None
     ) -> DexQuote:
         """Obtém cotação de uma DEX específica"""
         
         try:
             if dex_config.type == "v2":
-                return await self._get_v2_quote(dex_config, token_in, token_out, amount_in, is_buy)
+                return await self._get_v2_quote(dex_config, token_in, token_out, amount_in, is_buy, block_number)
             elif dex_config.type == "v3":
-                return await self._get_v3_quote(dex_config, token_in, token_out, amount_in, is_buy)
+                return await self._get_v3_quote(dex_config, token_in, token_out, amount_in, is_buy, block_number)
             else:
                 raise ValueError(f"Tipo de DEX não suportado: {dex_config.type}")
                 
         except Exception as e:
-            logger.debug(f"Erro obtendo cotação da {dex_config.name}: {e}")
+            logger.debug("Erro obtendo cotação da %s: %s", dex_config.name, e)
             return DexQuote(
                 dex_name=dex_config.name,
                 dex_type=DexType.UNISWAP_V2 if dex_config.type == "v2" else DexType.UNISWAP_V3,
@@ -133,46 +414,74 @@ class DexAggregator:
                 error=str(e)
             )
             
-    async def _get_v2_quote(self, dex_config, token_in: str, token_out: str, amount_in: int, is_buy: bool) -> DexQuote:
-        """Obtém cotação de DEX V2 (Uniswap V2 style)"""
-        
-        # ABI do router V2
-        router_abi = [
-            {
-                "inputs": [
-                    {"internalType": "uint256", "name": "amountIn", "type": "uint256"},
-                    {"internalType": "address[]", "name": "path", "type": "address[]"}
-                ],
-                "name": "getAmountsOut",
-                "outputs": [{"internalType": "uint256[]", "name": "amounts", "type": "uint256[]"}],
-                "stateMutability": "view",
-                "type": "function"
-            }
-        ]
-        
-        router = self.w3.eth.contract(
-            address=to_checksum_address(dex_config.router),
-            abi=router_abi
-        )
+    async def _get_v2_quote(
+        self,
+        dex_config,
+        token_in: str,
+        token_out: str,
+        amount_in: int,
+        is_buy: bool,
+        block_number: Optional[int] = None
+    ) -> DexQuote:
+        """
+        Obtém cotação de DEX V2 (Uniswap V2 style)
         
+        Na primeira cotação do par, getPair + getAmountsOut saem num lote
+        Multicall3 e getReserves no seguinte. Com o par já em cache (ou
+        calculado via CREATE2), getAmountsOut e getReserves vão juntos no
+        mesmo POST do RpcBatcher (e as reservas do bloco atual podem nem sair
+        do cache). Par inexistente no endereço CREATE2 = getReserves vazio.
+        """
         # Path do trade
-        path = [to_checksum_address(token_in), to_checksum_address(token_out)]
+        path = [to_checksum(token_in), to_checksum(token_out)]
+        calls = [(
+            to_checksum(dex_config.router),
+            True,
+            _calldata(GET_AMOUNTS_OUT_SELECTOR, ("uint256", "address[]"), (amount_in, path))
+        )]
         
-        # Obtém amounts out
-        amounts = router.functions.getAmountsOut(amount_in, path).call()
-        amount_out = amounts[-1]
+        pair_key = self._pair_key(dex_config.factory, token_in, token_out)
+        pair_address = self._pair_cache.get(pair_key) or self._create2_pair(dex_config, token_in, token_out)
+        if pair_address is None and self.l2.enabled:
+            pair_address = await self._l2_pair_address(pair_key)
+        reserves = None
+        if pair_address is None:
+            # 1º lote: amounts out + endereço do par
+            calls.append((
+                to_checksum(dex_config.factory),
+                True,
+                _calldata(GET_PAIR_SELECTOR, ("address", "address"), path)
+            ))
+            results = await self._aggregate3(calls)
+        else:
+            results, reserves = await asyncio.gather(
+                self._aggregate3(calls),
+                self._read_reserves_v2(pair_address, token_in, token_out, block_number)
+            )
+            
+        amounts_ok, amounts_data = results[0]
+        if not amounts_ok or not amounts_data:
+            raise ValueError("getAmountsOut reverteu")
+        amount_out = decode(["uint256[]"], amounts_data)[0][-1]
         
-        # Calcula price impact
-        price_impact = await self._calculate_price_impact_v2(
-            dex_config, token_in, token_out, amount_in, amount_out
-        )
+        # 2º lote: reservas do par recém-descoberto (se existir)
+        if pair_address is None:
+            pair_ok, pair_data = results[1]
+            if pair_ok and pair_data:
+                pair_address = decode(["address"], pair_data)[0]
+                if int(pair_address, 16):
+                    self._pair_cache[pair_key] = pair_address
+                    await self.l2.set(self._l2_pair_key(pair_key), pair_address, TTL_PAIR)
+                    reserves = await self._read_reserves_v2(pair_address, token_in, token_out, block_number)
+                    
+
+        # Price impact e liquidez derivados das mesmas reservas
+        price_impact = self._price_impact_from_reserves(reserves, amount_in, amount_out)
+        liquidity = self._liquidity_from_reserves(reserves, token_in, token_out)
         
         # Estima gas
         gas_estimate = await self._estimate_swap_gas_v2(dex_config, path, amount_in, is_buy)
         
-        # Obtém liquidez do par
-        liquidity = await self._get_pair_liquidity_v2(dex_config, token_in, token_out)
-        
         # Calcula slippage esperado
         slippage = min(price_impact * 1.5, self.max_slippage)  # 50% buffer
         
@@ -188,7 +497,15 @@ class DexAggregator:
             is_available=True
         )
         
-    async def _get_v3_quote(self, dex_config, token_in: str, token_out: str, amount_in: int, is_buy: bool) -> DexQuote:
+    async def _get_v3_quote(
+        self,
+        dex_config,
+        token_in: str,
+        token_out: str,
+        amount_in: int,
+        is_buy: bool,
+        block_number: Optional[int] = None
+    ) -> DexQuote:
         """Obtém cotação de DEX V3 (Uniswap V3 style)"""
         
         # Para V3, usamos quoter se disponível
@@ -199,63 +516,53 @@ class DexAggregator:
             return await self._get_v3_quoter_quote(dex_config, token_in, token_out, amount_in, is_buy)
         except:
             # Fallback para estimativa V2
-            logger.debug(f"Fallback para V2 na {dex_config.name}")
-            return await self._get_v2_quote(dex_config, token_in, token_out, amount_in, is_buy)
+            logger.debug("Fallback para V2 na %s", dex_config.name)
+            return await self._get_v2_quote(dex_config, token_in, token_out, amount_in, is_buy, block_number)
             
     async def _get_v3_quoter_quote(self, dex_config, token_in: str, token_out: str, amount_in: int, is_buy: bool) -> DexQuote:
-        """Obtém cotação usando Quoter V3"""
-        
-        # ABI simplificado do quoter V3
-        quoter_abi = [
-            {
-                "inputs": [
-                    {"internalType": "address", "name": "tokenIn", "type": "address"},
-                    {"internalType": "address", "name": "tokenOut", "type": "address"},
-                    {"internalType": "uint24", "name": "fee", "type": "uint24"},
-                    {"internalType": "uint256", "name": "amountIn", "type": "uint256"},
-                    {"internalType": "uint160", "name": "sqrtPriceLimitX96", "type": "uint160"}
-                ],
-                "name": "quoteExactInputSingle",
-                "outputs": [{"internalType": "uint256", "name": "amountOut", "type": "uint256"}],
-                "stateMutability": "nonpayable",
-                "type": "function"
-            }
-        ]
+        """Obtém cotação usando Quoter V3 (cotações idênticas em andamento são compartilhadas)"""
+        key = ("quoteV3", dex_config.name, token_in.lower(), token_out.lower(), amount_in, is_buy)
+        return await self._singleflight(
+            key, lambda: self._fetch_v3_quoter_quote(dex_config, token_in, token_out, amount_in, is_buy)
+        )
+        
+    async def _fetch_v3_quoter_quote(self, dex_config, token_in: str, token_out: str, amount_in: int, is_buy: bool) -> DexQuote:
+        """Cotação via Quoter V3 + métricas da pool"""
         
         # Endereço do quoter (pode variar por DEX)
         quoter_address = self._get_quoter_address(dex_config.name)
         if not quoter_address:
             raise ValueError("Quoter não disponível")
             
-        quoter = self.w3.eth.contract(
-            address=to_checksum_address(quoter_address),
-            abi=quoter_abi
-        )
-        
-        # Fees comuns no V3 (0.05%, 0.3%, 1%)
-        fees = [500, 3000, 10000]
-        best_amount_out = 0
-        best_fee = fees[0]
-        
-        for fee in fees:
-            try:
-                amount_out = quoter.functions.quoteExactInputSingle(
-                    to_checksum_address(token_in),
-                    to_checksum_address(token_out),
-                    fee,
-                    amount_in,
-                    0  # sqrtPriceLimitX96 = 0 (sem limite)
-                ).call()
-                
-                if amount_out > best_amount_out:
-                    best_amount_out = amount_out
-                    best_fee = fee
-                    
-            except:
-                continue
-                
+        # Tier já conhecido: cota só ele; senão sonda todos num único aggregate3
+        fee_key = (dex_config.name, token_in.lower(), token_out.lower())
+        l2_key = "quoteV3:%s:%s:%s:%d" % (fee_key + (amount_in,))
+        cached = self._fee_tier_cache.get(fee_key)
+        now = time.monotonic()
+        shared = await self.l2.get(l2_key) if self.l2.enabled else None
+        if shared:
+            # Outro processo cotou o mesmo valor há menos de TTL_V3_QUOTE
+            best_amount_out, best_fee = shared
+        elif cached and now - cached[0] < FEE_TIER_TTL:
+            best_amount_out, best_fee = await self._probe_v3_fees(
+                quoter_address, token_in, token_out, amount_in, (cached[1],)
+            )
+            if best_amount_out == 0:
+                # Pool do tier em cache deixou de cotar: volta a sondar todos
+                best_amount_out, best_fee = await self._probe_v3_fees(
+                    quoter_address, token_in, token_out, amount_in, V3_FEE_TIERS
+                )
+        else:
+            best_amount_out, best_fee = await self._probe_v3_fees(
+                quoter_address, token_in, token_out, amount_in, V3_FEE_TIERS
+            )
+            
         if best_amount_out == 0:
+            self._fee_tier_cache.pop(fee_key, None)
             raise ValueError("Nenhuma pool V3 disponível")
+        self._fee_tier_cache[fee_key] = (now, best_fee)
+        if not shared:
+            await self.l2.set(l2_key, [best_amount_out, best_fee], TTL_V3_QUOTE)
             
         # Calcula métricas
         price_impact = await self._calculate_price_impact_v3(
@@ -278,35 +585,102 @@ class DexAggregator:
             is_available=True
         )
         
-    def _get_quoter_address(self, dex_name: str) -> Optional[str]:
-        """Retorna endereço do quoter para cada DEX"""
-        quoters = {
-            "UniswapV3": "0x61fFE014bA17989E743c5F6cB21bF9697530B21e",
-            "SushiSwapV3": "0x64e8802FE490fa7cc61d3463958199161Bb608A7",
-            "PancakeSwapV3": "0xB048Bbc1Ee6b733FFfCFb9e9CeF7375518e25997",
-            # Adicionar outros conforme necessário
-        }
-        return quoters.get(dex_name)
+    async def _probe_v3_fees(
+        self,
+        quoter_address: str,
+        token_in: str,
+        token_out: str,
+        amount_in: int,
+        fees: Tuple[int, ...]
+    ) -> Tuple[int, int]:
+        """
+        Cota os fee tiers num único aggregate3 (allowFailure: pool inexistente
+        reverte) e devolve (maior amount_out, fee correspondente).
+        """
+        token_in_cs, token_out_cs = to_checksum(token_in), to_checksum(token_out)
+        results = await self._aggregate3([
+            (quoter_address, True, _calldata(
+                QUOTE_EXACT_INPUT_SINGLE_SELECTOR,
+                ("address", "address", "uint24", "uint256", "uint160"),
+                (token_in_cs, token_out_cs, fee, amount_in, 0)  # sqrtPriceLimitX96 = 0 (sem limite)
+            ))
+            for fee in fees
+        ])
+        
+        best_amount_out, best_fee = 0, fees[0]
+        for fee, (success, data) in zip(fees, results):
+            if not success or not data:
+                continue
+            amount_out = decode(["uint256"], data)[0]
+            if amount_out > best_amount_out:
+                best_amount_out, best_fee = amount_out, fee
+        return best_amount_out, best_fee
+        
+    @staticmethod
+    @functools.lru_cache(maxsize=None)
+    def _get_quoter_address(dex_name: str) -> Optional[str]:
+        """Retorna endereço do quoter (checksum) para cada DEX"""
+        address = V3_QUOTERS.get(dex_name)
+        return to_checksum(address) if address else None
+        
+    @staticmethod
+    def _pair_key(factory: str, token_a: str, token_b: str) -> Tuple[str, Tuple[str, str]]:
+        """Chave do cache de pares: factory + tokens ordenados"""
+        a, b = token_a.lower(), token_b.lower()
+        return factory.lower(), ((a, b) if a < b else (b, a))
+        
+    @staticmethod
+    def _create2_pair(dex_config, token_a: str, token_b: str) -> Optional[str]:
+        """Endereço do par calculado localmente, se a DEX (V2) tiver init_code_hash"""
+        init_code_hash = getattr(dex_config, "init_code_hash", None)
+        if not init_code_hash or dex_config.type != "v2":
+            return None
+        return compute_pair_address_v2(dex_config.factory, token_a, token_b, init_code_hash)
+        
+    async def _get_block_number(self) -> Optional[int]:
+        """Número do bloco atual, relido no máximo a cada BLOCK_NUMBER_TTL"""
+        try:
+            now = asyncio.get_event_loop().time()
+            cached_time, cached_block = self._block
+            if cached_block is not None and now - cached_time < BLOCK_NUMBER_TTL:
+                return cached_block
+                
+            block_number = await self.w3.eth.block_number
+            if not CACHETOOLS_AVAILABLE and block_number != cached_block:
+                self._reserves_cache.clear()
+                self._slot0_cache.clear()
+            self._block = (now, block_number)
+            return block_number
+            
+        except Exception as e:
+            logger.debug("Erro obtendo número do bloco: %s", e)
+            return None
         
     async def _calculate_price_impact_v2(self, dex_config, token_in: str, token_out: str, amount_in: int, amount_out: int) -> float:
         """Calcula price impact para DEX V2"""
         try:
             # Obtém reservas do par
             reserves = await self._get_pair_reserves_v2(dex_config, token_in, token_out)
-            if not reserves:
-                return 0.5  # Assume alto impact se não conseguir obter reservas
-                
-            reserve_in, reserve_out = reserves
+            return self._price_impact_from_reserves(reserves, amount_in, amount_out)
             
-            # Calcula preço antes e depois
-            price_before = reserve_out / reserve_in
-            price_after = (reserve_out - amount_out) / (reserve_in + amount_in)
+        except Exception as e:
+            logger.debug("Erro calculando price impact V2: %s", e)
+            return 0.5
             
-            price_impact = abs(price_before - price_after) / price_before
-            return min(price_impact, 1.0)
+    @staticmethod
+    def _price_impact_from_reserves(reserves: Optional[Tuple[int, int]], amount_in: int, amount_out: int) -> float:
+        """Price impact V2 a partir de (reserve_in, reserve_out) já lidas"""
+        if not reserves:
+            return 0.5  # Assume alto impact se não conseguir obter reservas
+            
+        try:
+            reserve_in, reserve_out = reserves
+            
+            # Preço antes e depois (kernel JIT, em float64)
+            return price_impact_v2(float(reserve_in), float(reserve_out), float(amount_in), float(amount_out))
             
         except Exception as e:
-            logger.debug(f"Erro calculando price impact V2: {e}")
+            logger.debug("Erro calculando price impact V2: %s", e)
             return 0.5
             
     async def _calculate_price_impact_v3(self, dex_config, token_in: str, token_out: str, amount_in: int, amount_out: int, fee: int) -> float:
@@ -320,14 +694,11 @@ class DexAggregator:
             if not spot_price:
                 return 0.3
                 
-            # Calcula preço efetivo do trade
-            effective_price = amount_out / amount_in
-            
-            price_impact = abs(spot_price - effective_price) / spot_price
-            return min(price_impact, 1.0)
+            # Preço efetivo do trade vs spot (kernel JIT, em float64)
+            return price_impact_v3(spot_price, float(amount_in), float(amount_out))
             
         except Exception as e:
-            logger.debug(f"Erro calculando price impact V3: {e}")
+            logger.debug("Erro calculando price impact V3: %s", e)
             return 0.3
             
     async def _select_best_quote(self, quotes: List[DexQuote], is_buy: bool) -> Optional[BestQuote]:
@@ -336,119 +707,144 @@ class DexAggregator:
         if not quotes:
             return None
             
-        best_quotes = []
         gas_price = await self._get_current_gas_price()
         
-        for quote in quotes:
-            # Filtra cotações com problemas
-            if quote.price_impact > self.max_price_impact:
-                continue
-            if quote.liquidity < self.min_liquidity:
-                continue
-                
-            # Calcula custo total (gas + slippage)
-            gas_cost = quote.gas_estimate * gas_price
-            slippage_cost = int(quote.amount_out * quote.slippage)
-            total_cost = gas_cost + slippage_cost
-            
-            # Amount líquido após custos
-            net_amount = quote.amount_out - slippage_cost
-            
-            # Score de eficiência (maior = melhor)
-            efficiency_score = self._calculate_efficiency_score(quote, net_amount, total_cost)
-            
-            best_quotes.append(BestQuote(
-                dex_quote=quote,
-                net_amount=net_amount,
-                total_cost=total_cost,
-                efficiency_score=efficiency_score
-            ))
-            
-        if not best_quotes:
+        # Layout SoA: um array por campo, score calculado numa única passada
+        amount_out = np.array([q.amount_out for q in quotes], dtype=np.float64)
+        liquidity = np.array([float(q.liquidity) for q in quotes], dtype=np.float64)
+        price_impact = np.array([q.price_impact for q in quotes], dtype=np.float64)
+        gas_estimate = np.array([q.gas_estimate for q in quotes], dtype=np.float64)
+        slippage = np.array([q.slippage for q in quotes], dtype=np.float64)
+        
+        # Filtra cotações com problemas
+        valid = (price_impact <= self.max_price_impact) & (liquidity >= float(self.min_liquidity))
+        if not valid.any():
             return None
             
-        # Ordena por efficiency score
-        best_quotes.sort(key=lambda x: x.efficiency_score, reverse=True)
+        # Amount líquido após slippage (maior = melhor)
+        net_amount = amount_out - amount_out * slippage
+        factors = np.stack([
+            net_amount / 1e18,                              # Normaliza para ETH
+            np.minimum(liquidity, LIQUIDITY_CAP_ETH) / LIQUIDITY_CAP_ETH,  # Max 10 ETH
+            1.0 - price_impact,                             # Menor impact = melhor
+            1.0 - np.minimum(gas_estimate / GAS_CAP, 1.0),  # Normaliza gas
+        ], axis=1)
+        scores = np.where(valid, factors @ EFFICIENCY_WEIGHTS, -np.inf)
         
-        return best_quotes[0]
+        # Só a vencedora vira BestQuote (custos recalculados em int)
+        idx = int(np.argmax(scores))
+        quote = quotes[idx]
+        gas_cost = quote.gas_estimate * gas_price
+        slippage_cost = int(quote.amount_out * quote.slippage)
+        
+        return BestQuote(
+            dex_quote=quote,
+            net_amount=quote.amount_out - slippage_cost,
+            total_cost=gas_cost + slippage_cost,
+            efficiency_score=float(scores[idx])
+        )
         
     def _calculate_efficiency_score(self, quote: DexQuote, net_amount: int, total_cost: int) -> float:
         """Calcula score de eficiência da cotação"""
         
-        # Fatores do score
-        amount_score = net_amount / 1e18  # Normaliza para ETH
-        liquidity_score = min(float(quote.liquidity), 10.0) / 10.0  # Max 10 ETH
-        impact_score = 1.0 - quote.price_impact  # Menor impact = melhor
-        gas_score = 1.0 - min(quote.gas_estimate / 500000, 1.0)  # Normaliza gas
-        
-        # Pesos dos fatores
-        weights = {
-            "amount": 0.4,
-            "liquidity": 0.2,
-            "impact": 0.3,
-            "gas": 0.1
-        }
-        
-        score = (
-            amount_score * weights["amount"] +
-            liquidity_score * weights["liquidity"] +
-            impact_score * weights["impact"] +
-            gas_score * weights["gas"]
+        # Mesma fórmula vetorizada em _select_best_quote (kernel JIT, em float64)
+        return efficiency_score(
+            float(net_amount), float(quote.liquidity), float(quote.price_impact), float(quote.gas_estimate)
         )
         
-        return score
-        
     async def _get_current_gas_price(self) -> int:
-        """Obtém preço atual do gas com cache"""
-        try:
-            current_time = asyncio.get_event_loop().time()
+        """
+        Preço atual do gas (com buffer), lido do valor mantido pelo poller.
+        Só a primeira chamada vai ao nó; ela também inicia o poller no loop atual.
+        """
+        if self._gas_price is None:
+            await self._singleflight(("gas_price",), self._refresh_gas_price)
             
-            # Verifica cache
-            if "gas_price" in self.gas_price_cache:
-                cached_time, cached_price = self.gas_price_cache["gas_price"]
-                if current_time - cached_time < self.cache_ttl:
-                    return cached_price
-                    
-            # Obtém preço atual
-            gas_price = self.w3.eth.gas_price
+        loop = asyncio.get_running_loop()
+        if self._gas_task is None or self._gas_task.done() or self._gas_task.get_loop() is not loop:
+            self._gas_task = loop.create_task(self._gas_price_poller())
+            
+        if self._gas_price is None:
+            return 20_000_000_000  # 20 gwei default
+        return self._gas_price
+        
+    async def _refresh_gas_price(self) -> None:
+        """Relê o gas price do nó; em caso de erro mantém o último valor"""
+        try:
+            # Outro processo pode já ter lido o gas price neste intervalo
+            shared = await self.l2.get("gas_price") if self.l2.enabled else None
+            if shared:
+                self._gas_price = shared
+                return
+                
+            gas_price = await self.w3.eth.gas_price
             
             # Adiciona buffer para congestionamento
-            gas_price = int(gas_price * 1.1)  # +10%
+            self._gas_price = int(gas_price * 1.1)  # +10%
+            await self.l2.set("gas_price", self._gas_price, TTL_GAS_PRICE)
             
-            # Salva no cache
-            self.gas_price_cache["gas_price"] = (current_time, gas_price)
+        except Exception as e:
+            logger.error("❌ Erro obtendo gas price: %s", e)
             
-            return gas_price
+    async def _gas_price_poller(self) -> None:
+        """Atualiza o gas price a cada cache_ttl segundos"""
+        while True:
+            await asyncio.sleep(self.cache_ttl)
+            await self._refresh_gas_price()
             
-        except Exception as e:
-            logger.error(f"❌ Erro obtendo gas price: {e}")
-            return 20_000_000_000  # 20 gwei default
+    async def close(self) -> None:
+        """Para o poller de gas e fecha as conexões do agregador"""
+        task, self._gas_task = self._gas_task, None
+        if task is not None and not task.done():
+            task.cancel()
+            if task.get_loop() is asyncio.get_running_loop():
+                try:
+                    await task
+                except asyncio.CancelledError:
+                    pass
+        await self.rpc_batch.close()
+        await self.l2.close()
             
-    async def _get_pair_reserves_v2(self, dex_config, token_in: str, token_out: str) -> Optional[Tuple[int, int]]:
+    async def _get_pair_reserves_v2(
+        self,
+        dex_config,
+        token_in: str,
+        token_out: str,
+        block_number: Optional[int] = None
+    ) -> Optional[Tuple[int, int]]:
         """Obtém reservas de um par V2"""
         try:
-            # ABI do par V2
-            pair_abi = [
-                {
-                    "inputs": [],
-                    "name": "getReserves",
-                    "outputs": [
-                        {"internalType": "uint112", "name": "_reserve0", "type": "uint112"},
-                        {"internalType": "uint112", "name": "_reserve1", "type": "uint112"},
-                        {"internalType": "uint32", "name": "_blockTimestampLast", "type": "uint32"}
-                    ],
-                    "stateMutability": "view",
-                    "type": "function"
-                }
-            ]
-            
             # Calcula endereço do par
             pair_address = await self._get_pair_address_v2(dex_config, token_in, token_out)
             if not pair_address:
                 return None
                 
-            pair = self.w3.eth.contract(address=pair_address, abi=pair_abi)
-            reserves = pair.functions.getReserves().call()
+            return await self._read_reserves_v2(pair_address, token_in, token_out, block_number)
+                
+        except Exception as e:
+            logger.debug("Erro obtendo reservas V2: %s", e)
+            return None
+            
+    async def _read_reserves_v2(
+        self,
+        pair_address: str,
+        token_in: str,
+        token_out: str,
+        block_number: Optional[int] = None
+    ) -> Optional[Tuple[int, int]]:
+        """
+        Lê getReserves de um par conhecido e devolve (reserve_in, reserve_out).
+        Com block_number, reaproveita as reservas já lidas no mesmo bloco.
+        """
+        try:
+            cache_key = (pair_address.lower(), block_number)
+            reserves = self._reserves_cache.get(cache_key) if block_number is not None else None
+            if reserves is None:
+                reserves = await self._singleflight(
+                    ("getReserves",) + cache_key, lambda: self._fetch_reserves_v2(pair_address, block_number)
+                )
+                if reserves is None:
+                    return None
             
             # Determina ordem dos tokens
             token0 = min(token_in.lower(), token_out.lower())
@@ -458,67 +854,109 @@ class DexAggregator:
                 return reserves[1], reserves[0]  # reserve_in, reserve_out
                 
         except Exception as e:
-            logger.debug(f"Erro obtendo reservas V2: {e}")
+            logger.debug("Erro obtendo reservas V2: %s", e)
             return None
             
+    async def _fetch_reserves_v2(self, pair_address: str, block_number: Optional[int]) -> Optional[Tuple[int, int]]:
+        """getReserves bruto (reserve0, reserve1); grava no cache do bloco (local e L2)"""
+        l2_key = f"reserves:{pair_address.lower()}:{block_number}"
+        if block_number is not None and self.l2.enabled:
+            shared = await self.l2.get(l2_key)
+            if shared:
+                reserves = tuple(shared)
+                self._reserves_cache[(pair_address.lower(), block_number)] = reserves
+                return reserves
+                
+        data = await self._eth_call(to_checksum(pair_address), _calldata(GET_RESERVES_SELECTOR))
+        if not data:
+            return None
+        reserves = decode(["uint112", "uint112", "uint32"], data)[:2]
+        if block_number is not None:
+            self._reserves_cache[(pair_address.lower(), block_number)] = reserves
+            await self.l2.set(l2_key, list(reserves), TTL_RESERVES)
+        return reserves
+        
     async def _get_pair_address_v2(self, dex_config, token_in: str, token_out: str) -> Optional[str]:
-        """Calcula endereço do par V2"""
-        try:
-            # ABI da factory V2
-            factory_abi = [
-                {
-                    "inputs": [
-                        {"internalType": "address", "name": "tokenA", "type": "address"},
-                        {"internalType": "address", "name": "tokenB", "type": "address"}
-                    ],
-                    "name": "getPair",
-                    "outputs": [{"internalType": "address", "name": "pair", "type": "address"}],
-                    "stateMutability": "view",
-                    "type": "function"
-                }
-            ]
-            
-            factory = self.w3.eth.contract(
-                address=to_checksum_address(dex_config.factory),
-                abi=factory_abi
-            )
-            
-            pair_address = factory.functions.getPair(
-                to_checksum_address(token_in),
-                to_checksum_address(token_out)
-            ).call()
+        """
+        Calcula endereço do par V2: via CREATE2 quando a DEX tem init_code_hash
+        (sem garantia de que o par já foi criado), senão via factory.getPair
+        """
+        pair_key = self._pair_key(dex_config.factory, token_in, token_out)
+        cached = self._pair_cache.get(pair_key) or self._create2_pair(dex_config, token_in, token_out)
+        if cached is not None:
+            return cached
             
-            if pair_address == "0x0000000000000000000000000000000000000000":
+        return await self._singleflight(
+            ("getPair",) + pair_key, lambda: self._fetch_pair_address_v2(dex_config, token_in, token_out, pair_key)
+        )
+        
+    async def _fetch_pair_address_v2(self, dex_config, token_in: str, token_out: str, pair_key) -> Optional[str]:
+        """factory.getPair (ou L2); grava no cache apenas pares já criados"""
+        try:
+            if self.l2.enabled:
+                pair_address = await self._l2_pair_address(pair_key)
+                if pair_address:
+                    return pair_address
+                    
+            data = await self._eth_call(to_checksum(dex_config.factory), _calldata(
+                GET_PAIR_SELECTOR,
+                ("address", "address"),
+                (to_checksum(token_in), to_checksum(token_out))
+            ))
+            if not data:
                 return None
                 
+            pair_address = decode(["address"], data)[0]
+            if not int(pair_address, 16):
+                return None  # par ainda não criado: não entra no cache
+                
+            self._pair_cache[pair_key] = pair_address
+            await self.l2.set(self._l2_pair_key(pair_key), pair_address, TTL_PAIR)
             return pair_address
             
         except Exception as e:
-            logger.debug(f"Erro obtendo endereço do par: {e}")
+            logger.debug("Erro obtendo endereço do par: %s", e)
             return None
             
+    @staticmethod
+    def _l2_pair_key(pair_key) -> str:
+        factory, (token_a, token_b) = pair_key
+        return f"pair:{factory}:{token_a}:{token_b}"
+        
+    async def _l2_pair_address(self, pair_key) -> Optional[str]:
+        """Endereço de par gravado no L2 por outro processo (promovido ao cache local)"""
+        pair_address = await self.l2.get(self._l2_pair_key(pair_key))
+        if pair_address:
+            self._pair_cache[pair_key] = pair_address
+        return pair_address
+            
     async def _get_pair_liquidity_v2(self, dex_config, token_in: str, token_out: str) -> Decimal:
         """Obtém liquidez de um par V2"""
         try:
             reserves = await self._get_pair_reserves_v2(dex_config, token_in, token_out)
-            if not reserves:
-                return Decimal("0")
-                
-            # Assume que um dos tokens é WETH
-            weth = config["WETH"].lower()
-            if token_in.lower() == weth:
-                return Decimal(str(reserves[0] / 1e18))
-            elif token_out.lower() == weth:
-                return Decimal(str(reserves[1] / 1e18))
-            else:
-                # Converte para ETH usando preço
-                # Simplificação: assume liquidez média
-                return Decimal("1.0")
+            return self._liquidity_from_reserves(reserves, token_in, token_out)
                 
         except Exception as e:
-            logger.debug(f"Erro obtendo liquidez V2: {e}")
+            logger.debug("Erro obtendo liquidez V2: %s", e)
             return Decimal("0")
             
+    @staticmethod
+    def _liquidity_from_reserves(reserves: Optional[Tuple[int, int]], token_in: str, token_out: str) -> Decimal:
+        """Liquidez em ETH a partir de (reserve_in, reserve_out) já lidas"""
+        if not reserves:
+            return Decimal("0")
+            
+        # Assume que um dos tokens é WETH
+        weth = config["WETH"].lower()
+        if token_in.lower() == weth:
+            return Decimal(str(reserves[0] / 1e18))
+        elif token_out.lower() == weth:
+            return Decimal(str(reserves[1] / 1e18))
+        else:
+            # Converte para ETH usando preço
+            # Simplificação: assume liquidez média
+            return Decimal("1.0")
+            
     async def _estimate_swap_gas_v2(self, dex_config, path: List[str], amount_in: int, is_buy: bool) -> int:
         """Estima gas para swap V2"""
         # Estimativas baseadas em dados históricos
@@ -545,33 +983,138 @@ class DexAggregator:
             return Decimal("0")
             
     async def _get_v3_spot_price(self, dex_config, token_in: str, token_out: str, fee: int) -> Optional[float]:
-        """Obtém preço spot de pool V3"""
+        """
+        Preço spot de pool V3 lido do slot0().sqrtPriceX96: um único eth_call
+        (endereço da pool via CREATE2 quando a DEX tem init_code_hash),
+        reaproveitado por todas as cotações do mesmo bloco
+        """
         try:
-            # Simplificação: usa cotação pequena para estimar preço spot
-            small_amount = 1000  # 1000 wei
-            quote = await self._get_v3_quoter_quote(dex_config, token_in, token_out, small_amount, True)
-            if quote.is_available:
-                return quote.amount_out / small_amount
+            pool_address = await self._get_pool_address_v3(dex_config, token_in, token_out, fee)
+            if not pool_address:
+                return None
+                
+            block_number = await self._get_block_number()
+            cache_key = (pool_address.lower(), block_number)
+            sqrt_price_x96 = self._slot0_cache.get(cache_key) if block_number is not None else None
+            if sqrt_price_x96 is None:
+                sqrt_price_x96 = await self._singleflight(
+                    ("slot0",) + cache_key, lambda: self._fetch_slot0(pool_address, block_number)
+                )
+            if not sqrt_price_x96:
+                return None
+            return spot_price_from_sqrt_price_x96(sqrt_price_x96, token_in, token_out)
+        except Exception as e:
+            logger.debug("Erro obtendo preço spot V3: %s", e)
             return None
-        except:
+            
+    async def _fetch_slot0(self, pool_address: str, block_number: Optional[int]) -> Optional[int]:
+        """sqrtPriceX96 bruto do slot0; grava no cache do bloco"""
+        data = await self._eth_call(to_checksum(pool_address), _calldata(SLOT0_SELECTOR))
+        if not data:
+            return None  # pool inexistente no endereço calculado
+        sqrt_price_x96 = decode(["uint160"], data[:32])[0]
+        if block_number is not None:
+            self._slot0_cache[(pool_address.lower(), block_number)] = sqrt_price_x96
+        return sqrt_price_x96
+        
+    async def _get_pool_address_v3(self, dex_config, token_in: str, token_out: str, fee: int) -> Optional[str]:
+        """Endereço da pool V3: CREATE2 com init_code_hash, senão factory.getPool (em cache)"""
+        init_code_hash = getattr(dex_config, "init_code_hash", None)
+        if init_code_hash:
+            return compute_pool_address_v3(dex_config.factory, token_in, token_out, fee, init_code_hash)
+            
+        pool_key = self._pair_key(dex_config.factory, token_in, token_out) + (fee,)
+        cached = self._pair_cache.get(pool_key)
+        if cached is not None:
+            return cached
+            
+        data = await self._singleflight(
+            ("getPool",) + pool_key,
+            lambda: self._eth_call(to_checksum(dex_config.factory), _calldata(
+                GET_POOL_SELECTOR,
+                ("address", "address", "uint24"),
+                (to_checksum(token_in), to_checksum(token_out), fee)
+            ))
+        )
+        if not data:
             return None
+        pool_address = decode(["address"], data)[0]
+        if not int(pool_address, 16):
+            return None  # pool ainda não criada: não entra no cache
+        self._pair_cache[pool_key] = pool_address
+        return pool_address
+
+# Instância global, criada no primeiro uso (importar o módulo não monta provider)
+dex_aggregator: Optional[DexAggregator] = None
+_aggregator_lock = threading.Lock()
 
-# Instância global
-dex_aggregator = DexAggregator()
+def get_aggregator() -> DexAggregator:
+    """Retorna o DexAggregator do processo, criando-o na primeira chamada"""
+    global dex_aggregator
+    if dex_aggregator is None:
+        with _aggregator_lock:
+            if dex_aggregator is None:
+                dex_aggregator = DexAggregator()
+    return dex_aggregator
+
+async def close_aggregator() -> None:
+    """Encerra o DexAggregator do processo, se já foi criado"""
+    global dex_aggregator
+    with _aggregator_lock:
+        aggregator, dex_aggregator = dex_aggregator, None
+    if aggregator is not None:
+        await aggregator.close()
 
 async def get_best_price(token_in: str, token_out: str, amount_in: int, is_buy: bool = True) -> Optional[BestQuote]:
     """Função principal para obter melhor preço"""
-    return await dex_aggregator.get_best_quote(token_in, token_out, amount_in, is_buy)
+    return await get_aggregator().get_best_quote(token_in, token_out, amount_in, is_buy)
+    
+def encode_sell_template(token_address: str, weth: str, wallet: str) -> bytes:
+    """
+    Pré-codifica o calldata de venda token → ETH com amountIn, amountOutMin e
+    deadline zerados. Seletor, path e destinatário ficam prontos; na execução
+    só as três palavras numéricas são substituídas (fill_sell_calldata).
+    """
+    return _calldata(
+        SWAP_EXACT_TOKENS_FOR_ETH_SELECTOR,
+        ("uint256", "uint256", "address[]", "address", "uint256"),
+        (0, 0, [to_checksum(token_address), to_checksum(weth)], to_checksum(wallet), 0)
+    )
+
+def fill_sell_calldata(template: bytes, amount_in: int, amount_out_min: int, deadline: int) -> bytes:
+    """Completa o template de venda com amountIn, amountOutMin e deadline"""
+    # Layout: seletor(4) | amountIn | amountOutMin | offset(path) | to | deadline | path
+    return (
+        template[:4]
+        + amount_in.to_bytes(32, "big")
+        + amount_out_min.to_bytes(32, "big")
+        + template[68:132]
+        + deadline.to_bytes(32, "big")
+        + template[164:]
+    )
+
+async def batch_get_prices(token_addresses: List[str], weth: str, amount_in: int = int(1e18)) -> Dict[str, float]:
+    """Obtém preços de vários tokens em um único round-trip (Multicall3)"""
+    return await get_aggregator().batch_get_prices(token_addresses, weth, amount_in)
     
-async def execute_best_trade(token_in: str, token_out: str, amount_in: int, is_buy: bool = True) -> dict:
-    """Executa trade na DEX com melhor preço"""
+async def execute_best_trade(
+    token_in: str,
+    token_out: str,
+    amount_in: int,
+    is_buy: bool = True,
+    calldata_template: Optional[bytes] = None
+) -> dict:
+    """
+    Executa trade na DEX com melhor preço. Em vendas para ETH, `calldata_template`
+    (encode_sell_template) é completado e assinado direto pelo executor.
+    """
     best_quote = await get_best_price(token_in, token_out, amount_in, is_buy)
     
     if not best_quote:
         return {"success": False, "error": "Nenhuma DEX disponível"}
         
     # Executa trade na DEX selecionada
-    from trade_executor import execute_trade
+    from trade_executor_advanced import execute_trade
     
     return await execute_trade(
         dex_name=best_quote.dex_quote.dex_name,
@@ -579,5 +1122,6 @@ async def execute_best_trade(token_in: str, token_out: str, amount_in: int, is_b
         token_out=token_out,
         amount_in=amount_in,
         min_amount_out=best_quote.net_amount,
-        is_buy=is_buy
-    )
\ No newline at end of file
+        is_buy=is_buy,
+        sell_template=calldata_template
+    )
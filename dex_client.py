@@ -2,12 +2,15 @@
 
 try:
     from web3 import Web3
+    from eth_abi import decode
     WEB3_AVAILABLE = True
 except ImportError:
     WEB3_AVAILABLE = False
     Web3 = None
 
-from typing import Optional
+from typing import Dict, List, Optional
+
+from utils import MULTICALL3, MULTICALL3_ABI, to_checksum
 
 ROUTER_ABI = [
     {
@@ -35,14 +38,16 @@ class DexClient:
             address=Web3.to_checksum_address(router_address),
             abi=ROUTER_ABI
         )
+        self.multicall = self.web3.eth.contract(address=MULTICALL3, abi=MULTICALL3_ABI)
 
     def get_token_price(
         self,
         token_address: str,
         weth_address: str
     ) -> Optional[float]:
-        token = Web3.to_checksum_address(token_address)
-        weth  = Web3.to_checksum_address(weth_address)
+        # to_checksum memoiza o keccak: endereços repetidos não recalculam
+        token = to_checksum(token_address)
+        weth  = to_checksum(weth_address)
         try:
             amounts = self.router.functions.getAmountsOut(
                 10**18, [token, weth]
@@ -50,3 +55,27 @@ class DexClient:
             return amounts[-1] / 10**18
         except Exception:
             return None
+
+    def get_token_prices(
+        self,
+        token_addresses: List[str],
+        weth_address: str
+    ) -> Dict[str, Optional[float]]:
+        """
+        Preço token→WETH de vários tokens num único tryAggregate do Multicall3.
+        Tokens cuja chamada reverteu ficam com None. Erros do próprio multicall
+        sobem para quem chamou (que pode cair no get_token_price por token).
+        """
+        weth = to_checksum(weth_address)
+        calls = [
+            (self.router.address, self.router.encodeABI(
+                fn_name="getAmountsOut", args=[10**18, [to_checksum(token), weth]]
+            ))
+            for token in token_addresses
+        ]
+        results = self.multicall.functions.tryAggregate(False, calls).call()
+
+        prices: Dict[str, Optional[float]] = {}
+        for token, (success, data) in zip(token_addresses, results):
+            prices[token] = decode(["uint256[]"], data)[0][-1] / 10**18 if success and data else None
+        return prices
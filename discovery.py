@@ -1,19 +1,27 @@
+import json
 import logging
 import threading
 import time
+from concurrent.futures import ThreadPoolExecutor
 from dataclasses import dataclass
 from decimal import Decimal
-from typing import Any, Awaitable, Dict, List, Optional, Callable
+from typing import Any, Awaitable, Dict, List, Optional, Callable, Tuple
+
+import requests
+import websockets
 
 try:
     from web3 import Web3
     from web3.types import LogReceipt
+    from eth_abi import decode
     WEB3_AVAILABLE = True
 except ImportError:
     WEB3_AVAILABLE = False
     Web3 = None
     LogReceipt = None
 from config import config
+from exchange_client import get_cached_decimals, store_decimals
+from utils import MULTICALL3, MULTICALL3_ABI
 from metrics import (
     PAIRS_DISCOVERED,
     PAIRS_SKIPPED_NO_BASE,
@@ -24,9 +32,50 @@ import asyncio
 
 logger = logging.getLogger(__name__)
 
-FACTORY_ABI = [{ ... }]  # mesmo ABI
-RESERVES_V2_ABI = [{ ... }]
-ERC20_DECIMALS_ABI = [{ ... }]
+# Evento do _topic (PoolCreated(address,address,address,uint24)): tokens indexados nos topics 1/2
+FACTORY_ABI = [{
+    "anonymous": False,
+    "name": "PoolCreated",
+    "type": "event",
+    "inputs": [
+        {"indexed": True, "name": "token0", "type": "address"},
+        {"indexed": True, "name": "token1", "type": "address"},
+        {"indexed": False, "name": "pool", "type": "address"},
+        {"indexed": False, "name": "fee", "type": "uint24"}
+    ]
+}]
+RESERVES_V2_ABI = [{
+    "name": "getReserves",
+    "type": "function",
+    "stateMutability": "view",
+    "inputs": [],
+    "outputs": [
+        {"name": "reserve0", "type": "uint112"},
+        {"name": "reserve1", "type": "uint112"},
+        {"name": "blockTimestampLast", "type": "uint32"}
+    ]
+}]
+ERC20_DECIMALS_ABI = [{
+    "name": "decimals",
+    "type": "function",
+    "stateMutability": "view",
+    "inputs": [],
+    "outputs": [{"name": "", "type": "uint8"}]
+}]
+
+# Checagem de liquidez em lote: getReserves do par + decimals do token base por par
+GET_RESERVES_SELECTOR = bytes.fromhex("0902f1ac")  # keccak("getReserves()")[:4]
+DECIMALS_SELECTOR = bytes.fromhex("313ce567")      # keccak("decimals()")[:4]
+MULTICALL_MAX_CALLS = 50  # chamadas por tryAggregate (nós públicos limitam o gas do eth_call)
+LIQ_CHECK_WORKERS = 16    # checagens par a par simultâneas quando o multicall falha
+
+# Janela adaptativa do get_logs: encolhe pela metade em timeout, cresce 25% a cada sucesso
+LOGS_RANGE_INITIAL = 500
+LOGS_RANGE_MIN = 5
+LOGS_RANGE_MAX = 2000
+LOGS_RANGE_ERRORS = (TimeoutError, ValueError, requests.exceptions.Timeout)
+
+WS_RECONNECT_DELAY = 5  # segundos entre reconexões do stream de logs
 
 @dataclass(frozen=True)
 class DexInfo:
@@ -34,9 +83,11 @@ class DexInfo:
     factory: str
     router: str
     type: str
+    routers: Tuple[str, ...] = ()  # routers simulados no filtro de honeypot (vazio = só `router`)
 
 @dataclass
 class PairInfo:
+    """Endereços já em checksum (EIP-55): repassados adiante sem nova conversão"""
     dex: DexInfo
     address: str
     token0: str
@@ -51,11 +102,18 @@ class SniperDiscovery:
         min_liq_weth: Decimal,
         interval_sec: int,
         callback: Callable[[str, str, str, DexInfo], Awaitable[Any]],
-        loop: asyncio.AbstractEventLoop
+        loop: asyncio.AbstractEventLoop,
+        ws_url: Optional[str] = None
     ):
         self.web3 = web3
         self.dexes = dexes
-        self.base_tokens = [t.lower() for t in base_tokens]
+        # Todas as factories numa única get_logs; o log volta à sua dex por raw["address"]
+        self._all_factories = [d.factory for d in dexes]
+        self._dex_by_factory = {d.factory.lower(): d for d in dexes}
+        self.ws_url = ws_url
+        self.base_tokens = frozenset(t.lower() for t in base_tokens)
+        # Mesmos tokens como 20 bytes: comparados direto com os topics dos logs
+        self._base_bytes = frozenset(bytes.fromhex(t[2:] if t.startswith("0x") else t) for t in self.base_tokens)
         self.min_liq_weth = min_liq_weth
         self.interval = interval_sec
         self.callback = callback
@@ -64,13 +122,27 @@ class SniperDiscovery:
         self._topic = self.web3.to_hex(
             self.web3.keccak(text="PoolCreated(address,address,address,uint24)")
         )
+        self._multicall = self.web3.eth.contract(address=MULTICALL3, abi=MULTICALL3_ABI)
+        # Decoder do evento pré-montado: nomes/tipos extraídos do ABI uma única vez
+        inputs = FACTORY_ABI[0]["inputs"]
+        self._indexed_names = [i["name"] for i in inputs if i.get("indexed")]
+        self._indexed_types = [i["type"] for i in inputs if i.get("indexed")]
+        self._data_names = [i["name"] for i in inputs if not i.get("indexed")]
+        self._data_types = [i["type"] for i in inputs if not i.get("indexed")]
+        self._max_range = LOGS_RANGE_INITIAL
         self._running = False
         self._thread: Optional[threading.Thread] = None
+        self._stream_future = None
+        # Pares já processados pelo stream em blocos > _last_block (par -> bloco):
+        # a recuperação via get_logs após reconexão não os entrega de novo
+        self._streamed: Dict[str, int] = {}
+        # Pool reaproveitado entre ciclos: as .call() bloqueantes se sobrepõem
+        self._liq_pool = ThreadPoolExecutor(max_workers=LIQ_CHECK_WORKERS, thread_name_prefix="discovery-liq")
 
     def _schedule(self, coro):
         self.loop.call_soon_threadsafe(asyncio.create_task, coro)
 
-    async def _has_min_liq(self, pair: PairInfo) -> bool:
+    def _has_min_liq(self, pair: PairInfo) -> bool:
         if pair.dex.type.lower() != "v2":
             return True
         try:
@@ -82,7 +154,10 @@ class SniperDiscovery:
                 amt, tok = Decimal(r1), pair.token1
             else:
                 return False
-            dec = self.web3.eth.contract(tok, ERC20_DECIMALS_ABI).functions.decimals().call()
+            dec = get_cached_decimals(tok)
+            if dec is None:
+                dec = self.web3.eth.contract(tok, ERC20_DECIMALS_ABI).functions.decimals().call()
+                store_decimals(tok, dec)
             norm = amt / Decimal(10**dec)
             logger.debug("Liquidez %s: %s >= %s ?",
                          tok, norm, self.min_liq_weth)
@@ -91,48 +166,227 @@ class SniperDiscovery:
             logger.error("Erro check_liq %s: %s", pair.address, e, exc_info=True)
             return False
 
+    def _base_side(self, pair: PairInfo) -> Optional[Tuple[int, str]]:
+        """(índice da reserva, token base) do par, ou None se nenhum lado é base"""
+        if pair.token0.lower() in self.base_tokens:
+            return 0, pair.token0
+        if pair.token1.lower() in self.base_tokens:
+            return 1, pair.token1
+        return None
+
+    def _filter_pairs(self, pairs: List[PairInfo]) -> List[PairInfo]:
+        """
+        Mantém os pares com liquidez mínima. Os V2 são checados em lote: getReserves
+        de cada par (+ decimals dos tokens base fora do cache) saem num único
+        tryAggregate do Multicall3 (até MULTICALL_MAX_CALLS chamadas por lote). Lote que falha cai na checagem
+        par a par, em paralelo.
+        """
+        passed = {id(p) for p in pairs if p.dex.type.lower() != "v2"}
+        v2 = [p for p in pairs if p.dex.type.lower() == "v2" and self._base_side(p)]
+        per_batch = MULTICALL_MAX_CALLS // 2  # pior caso: getReserves + decimals por par
+        for i in range(0, len(v2), per_batch):
+            chunk = v2[i:i + per_batch]
+            try:
+                flags = self._check_liq_batch(chunk)
+            except Exception as e:
+                logger.warning("Multicall de liquidez falhou (%d pares), checando em paralelo: %s", len(chunk), e)
+                flags = list(self._liq_pool.map(self._has_min_liq, chunk))
+            passed.update(id(p) for p, ok in zip(chunk, flags) if ok)
+        return [p for p in pairs if id(p) in passed]
+
+    def _check_liq_batch(self, pairs: List[PairInfo]) -> List[bool]:
+        # decimals só entra no lote para tokens base ainda fora do cache
+        calls = [(pair.address, GET_RESERVES_SELECTOR) for pair in pairs]
+        dec_slots: Dict[str, int] = {}
+        for pair in pairs:
+            tok = self._base_side(pair)[1]
+            if get_cached_decimals(tok) is None and tok.lower() not in dec_slots:
+                dec_slots[tok.lower()] = len(calls)
+                calls.append((tok, DECIMALS_SELECTOR))
+        results = self._multicall.functions.tryAggregate(False, calls).call()
+
+        for tok_lower, slot in dec_slots.items():
+            dec_ok, dec_data = results[slot]
+            if dec_ok and dec_data:
+                store_decimals(tok_lower, decode(["uint8"], dec_data)[0])
+
+        flags = []
+        for pair, (res_ok, res_data) in zip(pairs, results):
+            idx, tok = self._base_side(pair)
+            dec = get_cached_decimals(tok)
+            if not (res_ok and res_data) or dec is None:
+                flags.append(False)
+                continue
+            reserve = decode(["uint112", "uint112", "uint32"], res_data)[idx]
+            norm = Decimal(reserve) / Decimal(10**dec)
+            logger.debug("Liquidez %s: %s >= %s ?", tok, norm, self.min_liq_weth)
+            flags.append(norm >= self.min_liq_weth)
+        return flags
+
     def _parse_log(self, dex: DexInfo, raw: Dict[str, Any]) -> PairInfo:
-        decoded = self.web3.codec.decode_event_log(FACTORY_ABI[0], raw["data"], raw["topics"])
+        topics = raw["topics"]
+        data = raw["data"]
+        if isinstance(data, str):
+            data = bytes.fromhex(data[2:] if data.startswith("0x") else data)
+        decoded = dict(zip(
+            self._indexed_names,
+            decode(self._indexed_types, b"".join(topics[1:1 + len(self._indexed_types)]))
+        ))
+        decoded.update(zip(self._data_names, decode(self._data_types, data)))
+        # eth_abi já devolve endereços em checksum; o keccak é feito uma única vez aqui
         return PairInfo(dex, decoded["pool"], decoded["token0"], decoded["token1"])
 
+    def _poll_once(self) -> bool:
+        """
+        Processa uma fatia de blocos via get_logs. Retorna True se ainda há
+        atraso em relação à cadeia (chamar de novo sem esperar).
+        """
+        curr = self.web3.eth.block_number
+        if curr <= self._last_block:
+            return False
+
+        # Depois de uma pausa, varre o atraso em fatias de no máximo _max_range blocos
+        end = min(self._last_block + self._max_range, curr)
+        try:
+            logs = self.web3.eth.get_logs({
+                "fromBlock": self._last_block + 1,
+                "toBlock": end,
+                "address": self._all_factories,
+                "topics": [self._topic]
+            })
+        except LOGS_RANGE_ERRORS as e:
+            if self._max_range <= LOGS_RANGE_MIN:
+                # Falha mesmo na janela mínima: erro persistente (rate limit, params),
+                # espera o próximo ciclo em vez de repetir de imediato
+                logger.error("get_logs (%d blocos) na janela mínima: %s", end - self._last_block, e)
+                return False
+            # Nó não deu conta da janela: refaz a fatia inteira menor
+            self._max_range = max(LOGS_RANGE_MIN, self._max_range // 2)
+            logger.warning("get_logs (%d blocos): %s; janela reduzida para %d",
+                           end - self._last_block, e, self._max_range)
+            return True
+        except Exception as e:
+            logger.error("get_logs: %s", e)
+            return False
+
+        candidates: List[PairInfo] = []
+        skipped_no_base = 0
+        for raw in logs:
+            dex = self._dex_by_factory.get(raw["address"].lower())
+            if dex is None:
+                continue
+            pair = self._candidate(dex, raw)
+            if pair is None:
+                skipped_no_base += 1
+            else:
+                candidates.append(pair)
+
+        self._max_range = min(LOGS_RANGE_MAX, int(self._max_range * 1.25))
+        if skipped_no_base:
+            PAIRS_SKIPPED_NO_BASE.inc(skipped_no_base)
+        if self._streamed:
+            candidates = [p for p in candidates if p.address.lower() not in self._streamed]
+        self._process(candidates)
+
+        self._advance(end)
+        return end < curr
+
+    def _advance(self, block: int) -> None:
+        """Marca os blocos até `block` como completos e descarta o registro do stream"""
+        self._last_block = max(self._last_block, block)
+        if self._streamed:
+            self._streamed = {a: b for a, b in self._streamed.items() if b > self._last_block}
+
+    def _candidate(self, dex: DexInfo, raw: Dict[str, Any]) -> Optional[PairInfo]:
+        """Par do log, ou None se nenhum dos tokens é base"""
+        # token0/token1 são topics indexados: filtra antes de decodificar o log
+        topics = raw["topics"]
+        base = self._base_bytes
+        if base and not (topics[1][-20:] in base or topics[2][-20:] in base):
+            return None
+        return self._parse_log(dex, raw)
+
+    def _process(self, candidates: List[PairInfo]) -> None:
+        """Liquidez dos candidatos checada em lote; os aprovados vão para o callback"""
+        survivors = self._filter_pairs(candidates) if candidates else []
+        if len(candidates) > len(survivors):
+            PAIRS_SKIPPED_LOW_LIQ.inc(len(candidates) - len(survivors))
+        for pair in survivors:
+            PAIRS_DISCOVERED.inc()
+            send(f"🔍 Par: {pair.address} tokens {pair.token0}/{pair.token1}")
+            self._schedule(self.callback(pair.address, pair.token0, pair.token1, pair.dex))
+
     def _run(self):
+        """Modo polling (sem WS_URL): get_logs a cada `interval` segundos"""
         self._running = True
         while self._running:
-            curr = self.web3.eth.block_number
-            if curr <= self._last_block:
-                time.sleep(self.interval)
-                continue
+            if not self._poll_once():
+                time.sleep(self.interval)  # em dia com a cadeia; senão segue direto para a próxima fatia
+
+    async def _stream(self):
+        """
+        Modo push: eth_subscribe("logs") das factories no WebSocket; cada par é
+        processado assim que o nó vê o log, sem o piso de latência do polling.
+        A cada (re)conexão, o intervalo perdido é recuperado via get_logs.
+        """
+        while self._running:
+            try:
+                async with websockets.connect(self.ws_url) as websocket:
+                    await websocket.send(json.dumps({
+                        "id": 1,
+                        "method": "eth_subscribe",
+                        "params": ["logs", {
+                            "address": self._all_factories,
+                            "topics": [self._topic]
+                        }]
+                    }))
+                    logger.info("✅ WebSocket conectado para novos pares")
+
+                    # Logs que chegam durante a recuperação ficam no buffer do WebSocket
+                    while await asyncio.to_thread(self._poll_once):
+                        pass
+                    caught_up = self._last_block
 
-            for dex in self.dexes:
-                try:
-                    logs = self.web3.eth.get_logs({
-                        "fromBlock": self._last_block + 1,
-                        "toBlock": curr,
-                        "address": dex.factory,
-                        "topics": [self._topic]
-                    })
-                except Exception as e:
-                    logger.error("get_logs %s: %s", dex.name, e)
-                    continue
-
-                for raw in logs:
-                    pair = self._parse_log(dex, raw)
-                    t0, t1 = pair.token0.lower(), pair.token1.lower()
-                    if self.base_tokens and not (t0 in self.base_tokens or t1 in self.base_tokens):
-                        PAIRS_SKIPPED_NO_BASE.inc()
-                        continue
-                    has_liq = asyncio.run(self._has_min_liq(pair))
-                    if not has_liq:
-                        PAIRS_SKIPPED_LOW_LIQ.inc()
-                        continue
-                    PAIRS_DISCOVERED.inc()
-                    send(f"🔍 Par: {pair.address} tokens {pair.token0}/{pair.token1}")
-                    self._schedule(self.callback(pair.address, pair.token0, pair.token1, dex))
-
-            self._last_block = curr
-            time.sleep(self.interval)
+                    while self._running:
+                        data = json.loads(await websocket.recv())
+                        log = data.get("params", {}).get("result")
+                        if not log or log.get("removed"):
+                            continue
+                        block = int(log["blockNumber"], 16)
+                        if block <= caught_up:
+                            continue  # já coberto pela recuperação via get_logs
+                        dex = self._dex_by_factory.get(log["address"].lower())
+                        if dex is None:
+                            continue
+                        raw = {
+                            "topics": [bytes.fromhex(t[2:]) for t in log["topics"]],
+                            "data": log["data"]
+                        }
+                        pair = self._candidate(dex, raw)
+                        if pair is None:
+                            PAIRS_SKIPPED_NO_BASE.inc()
+                            continue
+                        self._streamed[pair.address.lower()] = block
+                        await asyncio.to_thread(self._process, [pair])
+                        # Reconexão recupera a partir deste bloco (outros logs dele podem
+                        # vir); os pares já vistos nele são pulados pela recuperação
+                        self._advance(block - 1)
+
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                logger.error("Erro no WebSocket de novos pares: %s", e)
+                await asyncio.sleep(WS_RECONNECT_DELAY)
 
     def start(self):
+        if self._liq_pool is None:
+            self._liq_pool = ThreadPoolExecutor(max_workers=LIQ_CHECK_WORKERS, thread_name_prefix="discovery-liq")
+        if self.ws_url:
+            if self._stream_future and not self._stream_future.done():
+                return
+            self._running = True
+            self._stream_future = asyncio.run_coroutine_threadsafe(self._stream(), self.loop)
+            return
         if self._thread and self._thread.is_alive():
             return
         self._thread = threading.Thread(target=self._run, daemon=True)
@@ -140,18 +394,34 @@ class SniperDiscovery:
 
     def stop(self):
         self._running = False
+        if self._stream_future:
+            self._stream_future.cancel()
         if self._thread:
             self._thread.join(1)
+        if self._liq_pool is not None:
+            self._liq_pool.shutdown(wait=False)
+            self._liq_pool = None
 
 _discovery: Optional[SniperDiscovery] = None
 
+def _dex_infos(dexes) -> List[DexInfo]:
+    """DexInfo por DEX configurada; as V2 simulam o honeypot em todos os routers V2"""
+    v2_routers = [d.router for d in dexes if d.type.lower() == "v2"]
+    return [
+        DexInfo(
+            d.name, d.factory, d.router, d.type,
+            tuple(dict.fromkeys([d.router, *v2_routers])) if d.type.lower() == "v2" else ()
+        )
+        for d in dexes
+    ]
+
 def subscribe_new_pairs(callback, loop=None):
     global _discovery
     if loop is None:
         loop = asyncio.get_event_loop()
     if _discovery and _discovery._running:
         return
-    dexes = [DexInfo(d.name, d.factory, d.router, d.type) for d in config["DEXES"]]
+    dexes = _dex_infos(config["DEXES"])
     _discovery = SniperDiscovery(
         Web3(Web3.HTTPProvider(config["RPC_URL"])),
         dexes,
@@ -159,7 +429,8 @@ def subscribe_new_pairs(callback, loop=None):
         config["MIN_LIQ_WETH"],
         config["DISCOVERY_INTERVAL"],
         callback,
-        loop
+        loop,
+        ws_url=config.get("WS_URL")
     )
     _discovery.start()
 
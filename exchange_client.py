@@ -2,6 +2,8 @@
 
 import json
 import logging
+import os
+import threading
 import time
 from pathlib import Path
 from typing import Any, Dict, List, Optional, Tuple
@@ -9,21 +11,61 @@ from typing import Any, Dict, List, Optional, Tuple
 try:
     from eth_account import Account
     from web3 import Web3
-    from web3.exceptions import BadFunctionCallOutput
+    from web3.exceptions import BadFunctionCallOutput, ContractLogicError
     WEB3_AVAILABLE = True
 except ImportError:
     WEB3_AVAILABLE = False
     Account = None
     Web3 = None
     BadFunctionCallOutput = Exception
+    ContractLogicError = Exception
 
 from config import config
+from utils import batch_rpc, load_abi, shared_async_web3, to_checksum
 
 logger = logging.getLogger(__name__)
 
+# Decimais de token são imutáveis: um dict do processo, persistido em disco
+# (sobrevive a restarts) e compartilhado por todas as instâncias e pela discovery
+DECIMALS_FILE = Path.home() / ".sniperbot" / "decimals.json"
+_decimals_lock = threading.Lock()
+
+def _load_decimals() -> Dict[str, int]:
+    try:
+        return {k.lower(): int(v) for k, v in json.loads(DECIMALS_FILE.read_text()).items()}
+    except FileNotFoundError:
+        return {}
+    except Exception as e:
+        logger.warning("Cache de decimais ignorado (%s): %s", DECIMALS_FILE, e)
+        return {}
+
+_DECIMALS: Dict[str, int] = _load_decimals()
+
+def get_cached_decimals(token_address: str) -> Optional[int]:
+    """Decimais já conhecidos do token (None = ainda não lidos)"""
+    return _DECIMALS.get(token_address.lower())
+
+def store_decimals(token_address: str, decimals: int) -> None:
+    """Grava no cache e persiste o arquivo de forma atômica (tmp + os.replace)"""
+    key = token_address.lower()
+    with _decimals_lock:
+        if _DECIMALS.get(key) == decimals:
+            return
+        _DECIMALS[key] = decimals
+        try:
+            DECIMALS_FILE.parent.mkdir(parents=True, exist_ok=True)
+            tmp = DECIMALS_FILE.with_suffix(".tmp")
+            tmp.write_text(json.dumps(_DECIMALS))
+            os.replace(tmp, DECIMALS_FILE)
+        except OSError as e:
+            logger.warning("Falha ao persistir cache de decimais: %s", e)
+
 def _codigo_vazio(codigo: bytes) -> bool:
     return codigo is None or len(codigo) == 0
 
+class InsufficientOutputError(ValueError):
+    """getAmountsOut retornou saída nula (amountOutMin ≤ 0)"""
+
 class ExchangeClient:
     """
     Swap ETH↔token via Uniswap/PancakeSwap routers (v2/v3).
@@ -54,32 +96,97 @@ class ExchangeClient:
             raise ValueError(f"Router não implantado: {self.router_address}")
 
         if not ExchangeClient._abis_carregados:
-            base = Path(__file__).parent / "abis"
-            with open(base / "uniswap_router.json") as f:
-                ExchangeClient._router_abi = json.load(f)
-            with open(base / "erc20.json") as f:
-                ExchangeClient._erc20_abi = json.load(f)
+            ExchangeClient._router_abi = load_abi("uniswap_router")
+            ExchangeClient._erc20_abi = load_abi("erc20")
             ExchangeClient._abis_carregados = True
 
         self.router = self.web3.eth.contract(
             address=self.router_address,
             abi=ExchangeClient._router_abi
         )
-        self._dec_cache: Dict[str, Tuple[int,float]] = {}
         self._allow_cache: Dict[Tuple[str,str], Tuple[int,float]] = {}
         self._ttl = int(config.get("CACHE_TTL_SEC", 300))
+        self._async_router = None  # criado sob demanda em _calc_amounts_async
+        # Taxas EIP-1559 mudam no máximo uma vez por bloco: (instante monotônico, params)
+        self._gas_cache: Tuple[float, Dict[str, int]] = (0.0, {})
+        self._gas_ttl = float(config.get("GAS_CACHE_TTL_SEC", 3))
 
-    def _param_gas(self) -> Dict[str,int]:
-        base_fee = self.web3.eth.gas_price
-        return {
-            "maxFeePerGas": int(base_fee * 2),
-            "maxPriorityFeePerGas": int(base_fee * 0.1)
+    def _cached_gas(self) -> Optional[Dict[str,int]]:
+        ts, cached = self._gas_cache
+        return cached if cached and time.monotonic() - ts < self._gas_ttl else None
+
+    def _store_fee_history(self, base_fees: List[Any], rewards: List[List[Any]]) -> Dict[str,int]:
+        """Gorjeta = mediana (percentil 50) das gorjetas dos últimos blocos; aceita int ou hex"""
+        to_int = lambda v: int(v, 16) if isinstance(v, str) else int(v)
+        base_fee = to_int(base_fees[-1])  # base fee do próximo bloco
+        tips = sorted(to_int(r[0]) for r in rewards)
+        priority = tips[len(tips) // 2] if tips else int(base_fee * 0.1)
+        params = {
+            "maxFeePerGas": int(base_fee * 2 + priority),
+            "maxPriorityFeePerGas": int(priority)
         }
+        self._gas_cache = (time.monotonic(), params)
+        return params
+
+    def _param_gas(self) -> Dict[str,int]:
+        cached = self._cached_gas()
+        if cached:
+            return cached
+        try:
+            hist = self.web3.eth.fee_history(5, "latest", [50])
+            return self._store_fee_history(hist["baseFeePerGas"], hist["reward"])
+        except Exception as e:
+            logger.debug("fee_history indisponível, usando gas_price: %s", e)
+            base_fee = self.web3.eth.gas_price
+            params = {
+                "maxFeePerGas": int(base_fee * 2),
+                "maxPriorityFeePerGas": int(base_fee * 0.1)
+            }
+        self._gas_cache = (time.monotonic(), params)
+        return params
 
     def _nonce(self) -> int:
         return self.web3.eth.get_transaction_count(self.wallet, "pending")
 
-    def _build_tx(self, fn_call, overrides: Dict[str,Any], default_gas: int):
+    def _tx_context(self, with_deadline: bool = True) -> Tuple[int, Dict[str,int], Optional[int]]:
+        """
+        (nonce, taxas, deadline) num único POST JSON-RPC em lote: nonce pendente,
+        bloco mais recente (deadline) e fee history (só se o cache de gas expirou).
+        Resposta que faltar no lote é buscada individualmente.
+        """
+        calls = [("eth_getTransactionCount", [self.wallet, "pending"])]
+        if with_deadline:
+            calls.append(("eth_getBlockByNumber", ["latest", False]))
+        gas = self._cached_gas()
+        if gas is None:
+            calls.append(("eth_feeHistory", [hex(5), "latest", [50]]))
+        try:
+            results = batch_rpc(calls, config["RPC_URL"])
+        except Exception as e:
+            logger.debug("Lote de pré-assinatura falhou: %s", e)
+            results = [None] * len(calls)
+
+        nonce = int(results[0], 16) if results[0] else self._nonce()
+
+        deadline = None
+        if with_deadline:
+            block = results[1]
+            timestamp = int(block["timestamp"], 16) if block else self.web3.eth.get_block("latest")["timestamp"]
+            deadline = timestamp + config["TX_DEADLINE_SEC"]
+
+        if gas is None:
+            hist = results[-1]
+            try:
+                gas = self._store_fee_history(hist["baseFeePerGas"], hist["reward"])
+            except Exception:
+                gas = self._param_gas()
+        return nonce, gas, deadline
+
+    def _build_tx(self, fn_call, overrides: Dict[str,Any], default_gas: int, fast: bool = True):
+        # Caminho rápido: router/approve têm teto de gas conhecido (default_gas), sem estimate_gas
+        # (passar "gas" também evita a estimativa implícita do build_transaction)
+        if fast:
+            return fn_call.build_transaction({**overrides, "gas": default_gas})
         tx = fn_call.build_transaction(overrides)
         try:
             est = self.web3.eth.estimate_gas(tx)
@@ -94,22 +201,20 @@ class ExchangeClient:
         return self.web3.to_hex(h)
 
     def get_decimals(self, token_address: str) -> int:
-        addr = Web3.to_checksum_address(token_address)
-        now = time.time()
-        if addr in self._dec_cache:
-            dec, ts = self._dec_cache[addr]
-            if now - ts < self._ttl:
-                return dec
+        dec = get_cached_decimals(token_address)
+        if dec is not None:
+            return dec
+        addr = to_checksum(token_address)
         try:
             token = self.web3.eth.contract(addr, abi=ExchangeClient._erc20_abi)
-            dec = token.functions.decimals().call()
+            dec = int(token.functions.decimals().call())
         except BadFunctionCallOutput:
-            dec = 18
-        self._dec_cache[addr] = (int(dec), now)
-        return int(dec)
+            return 18  # palpite: não entra no cache
+        store_decimals(addr, dec)
+        return dec
 
     def approve_token(self, token_address: str, amount: int) -> str:
-        addr = Web3.to_checksum_address(token_address)
+        addr = to_checksum(token_address)
         if config["DRY_RUN"]:
             logger.info("[DRY_RUN] approve ignorado")
             return "0xDRYRUN"
@@ -131,13 +236,14 @@ class ExchangeClient:
             return "0xALLOWOK"
         token = self.web3.eth.contract(addr, abi=ExchangeClient._erc20_abi)
         fn = token.functions.approve(self.router_address, amount)
+        nonce, gas, _ = self._tx_context(with_deadline=False)
         tx = self._build_tx(
             fn_call=fn,
             overrides={
                 "from": self.wallet,
                 "chainId": config["CHAIN_ID"],
-                **self._param_gas(),
-                "nonce": self._nonce()
+                **gas,
+                "nonce": nonce
             },
             default_gas=120_000
         )
@@ -147,11 +253,26 @@ class ExchangeClient:
         self, amount_in: int, path: List[str], slippage_bps: Optional[int]
     ) -> Tuple[int,int]:
         amounts = self.router.functions.getAmountsOut(amount_in, path).call()
-        expected = amounts[-1]
+        return self._min_out(amounts[-1], slippage_bps)
+
+    async def _calc_amounts_async(
+        self, amount_in: int, path: List[str], slippage_bps: Optional[int]
+    ) -> Tuple[int,int]:
+        """Mesmo cálculo de _calc_amounts, aguardando o RPC via AsyncWeb3 (sem thread do executor)"""
+        if self._async_router is None:
+            self._async_router = shared_async_web3().eth.contract(
+                address=self.router_address,
+                abi=ExchangeClient._router_abi
+            )
+        amounts = await self._async_router.functions.getAmountsOut(amount_in, path).call()
+        return self._min_out(amounts[-1], slippage_bps)
+
+    @staticmethod
+    def _min_out(expected: int, slippage_bps: Optional[int]) -> Tuple[int,int]:
         bps = slippage_bps if slippage_bps is not None else config["SLIPPAGE_BPS"]
         min_out = int(expected * (1 - bps/10_000))
         if min_out <= 0:
-            raise ValueError("amountOutMin ≤ 0")
+            raise InsufficientOutputError("amountOutMin ≤ 0")
         return min_out, expected
 
     def buy_token(
@@ -163,15 +284,15 @@ class ExchangeClient:
         slippage_bps: Optional[int] = None
     ) -> str:
         path = [
-            Web3.to_checksum_address(token_in_weth),
-            Web3.to_checksum_address(token_out),
+            to_checksum(token_in_weth),
+            to_checksum(token_out),
         ]
         if not amount_out_min or amount_out_min <= 0:
             amount_out_min, _ = self._calc_amounts(amount_in_wei, path, slippage_bps)
         if config["DRY_RUN"]:
             logger.info("[DRY_RUN] buy ignorado")
             return "0xDRYRUN"
-        deadline = self.web3.eth.get_block("latest")["timestamp"] + config["TX_DEADLINE_SEC"]
+        nonce, gas, deadline = self._tx_context()
         fn = self.router.functions.swapExactETHForTokens(
             amount_out_min, path, self.wallet, deadline
         )
@@ -181,8 +302,8 @@ class ExchangeClient:
                 "from": self.wallet,
                 "value": amount_in_wei,
                 "chainId": config["CHAIN_ID"],
-                **self._param_gas(),
-                "nonce": self._nonce()
+                **gas,
+                "nonce": nonce
             },
             default_gas=350_000
         )
@@ -197,8 +318,8 @@ class ExchangeClient:
         slippage_bps: Optional[int] = None
     ) -> str:
         path = [
-            Web3.to_checksum_address(token_in),
-            Web3.to_checksum_address(token_out_weth),
+            to_checksum(token_in),
+            to_checksum(token_out_weth),
         ]
         if not amount_out_min or amount_out_min <= 0:
             amount_out_min, _ = self._calc_amounts(amount_in, path, slippage_bps)
@@ -206,7 +327,7 @@ class ExchangeClient:
             logger.info("[DRY_RUN] sell ignorado")
             return "0xDRYRUN"
         self.approve_token(token_in, amount_in)
-        deadline = self.web3.eth.get_block("latest")["timestamp"] + config["TX_DEADLINE_SEC"]
+        nonce, gas, deadline = self._tx_context()
         fn = self.router.functions.swapExactTokensForETH(
             amount_in, amount_out_min, path, self.wallet, deadline
         )
@@ -215,8 +336,8 @@ class ExchangeClient:
             overrides={
                 "from": self.wallet,
                 "chainId": config["CHAIN_ID"],
-                **self._param_gas(),
-                "nonce": self._nonce()
+                **gas,
+                "nonce": nonce
             },
             default_gas=400_000
         )
@@ -1,7 +1,10 @@
 # exit_manager.py
 
 import asyncio
-from decimal import Decimal
+import logging
+
+import numpy as np
+
 try:
     from web3 import Web3
     WEB3_AVAILABLE = True
@@ -15,61 +18,97 @@ from storage import get_all_positions, remove_position
 from dex_client import DexClient
 from metrics import SELL_SUCCESSES, OPEN_POSITIONS
 from notifier import send
+from utils import njit, prange
+
+logger = logging.getLogger(__name__)
 
 RPC_URL = config["RPC_URL"]
 WETH    = config["WETH"]
 
+# Provider, cliente do router e WETH (checksum) montados uma vez no import,
+# não a cada ciclo/posição
+if WEB3_AVAILABLE:
+    _WEB3 = Web3(Web3.HTTPProvider(RPC_URL))
+    _DEX_ROUTER = config["DEXES"][0].router
+    _DEX = DexClient(_WEB3, _DEX_ROUTER)
+    _WETH_CS = Web3.to_checksum_address(WETH)
+else:
+    _WEB3 = None
+    _DEX_ROUTER = None
+    _DEX = None
+    _WETH_CS = None
+
+# Sinais de saída por posição
+HOLD, TAKE_PROFIT, STOP_LOSS = 0, 1, 2
+
+@njit(parallel=True, cache=True)
+def _tp_sl_kernel(prices, entries, tp, sl):
+    """Flag por posição (HOLD/TAKE_PROFIT/STOP_LOSS); preço NaN (sem cotação) = HOLD"""
+    n = prices.shape[0]
+    flags = np.zeros(n, dtype=np.int8)
+    for i in prange(n):
+        if prices[i] >= entries[i] * (1.0 + tp):
+            flags[i] = TAKE_PROFIT
+        elif prices[i] <= entries[i] * (1.0 - sl):
+            flags[i] = STOP_LOSS
+    return flags
+
 async def check_exits() -> None:
-    tp = Decimal(str(config["TAKE_PROFIT_PCT"]))
-    sl = Decimal(str(config["STOP_LOSS_PCT"]))
-    web3 = Web3(Web3.HTTPProvider(RPC_URL))
-    dex_router = config["DEXES"][0].router
+    tp = float(config["TAKE_PROFIT_PCT"])
+    sl = float(config["STOP_LOSS_PCT"])
+    dex_router = _DEX_ROUTER
 
-    for pair, amount, avg_price in get_all_positions():
-        price = DexClient(web3, dex_router) \
-            .get_token_price(token_address=pair, weth_address=WETH)
-        if price is None:
-            continue
+    positions = get_all_positions()
+    if not positions:
+        await asyncio.sleep(config["EXIT_POLL_INTERVAL"])
+        return
 
-        price_dec = Decimal(str(price))
-        entry_dec = Decimal(str(avg_price))
+    # Preços de todas as posições num único multicall (1 round-trip por ciclo)
+    try:
+        prices = _DEX.get_token_prices([pair for pair, _, _ in positions], _WETH_CS)
+    except Exception as e:
+        logger.warning("Multicall de preços falhou, consultando por posição: %s", e)
+        prices = {
+            pair: _DEX.get_token_price(token_address=pair, weth_address=_WETH_CS)
+            for pair, _, _ in positions
+        }
+
+    # TP/SL de todas as posições numa passada em float64 (sem Decimal por posição)
+    # Pares já gravados em checksum (storage.add_position): nenhum keccak no laço
+    price_arr = np.array(
+        [np.nan if prices.get(pair) is None else prices[pair] for pair, _, _ in positions],
+        dtype=np.float64
+    )
+    entry_arr = np.array([avg_price for _, _, avg_price in positions], dtype=np.float64)
+    flags = _tp_sl_kernel(price_arr, entry_arr, tp, sl)
+
+    for i in np.flatnonzero(flags):
+        pair, amount, _ = positions[i]
+        tx = await sell(
+            amount=amount,
+            token_in=pair,
+            dex_router=dex_router,
+            slippage_bps=config["SLIPPAGE_BPS"]
+        )
+        SELL_SUCCESSES.inc()
+        remove_position(pair)
+        OPEN_POSITIONS.dec()
 
         # Take Profit
-        if price_dec >= entry_dec * (1 + tp):
-            tx = await sell(
-                amount=amount,
-                token_in=pair,
-                dex_router=dex_router,
-                slippage_bps=config["SLIPPAGE_BPS"]
-            )
-            SELL_SUCCESSES.inc()
-            remove_position(pair)
-            OPEN_POSITIONS.dec()
+        if flags[i] == TAKE_PROFIT:
             send(
                 "📈 TAKE PROFIT atingido:\n"
                 f"• Token: {pair}\n"
                 f"• TX: {tx}\n"
                 f"• Lucro: +{tp*100:.1f}%"
             )
-            continue
-
         # Stop Loss
-        if price_dec <= entry_dec * (1 - sl):
-            tx = await sell(
-                amount=amount,
-                token_in=pair,
-                dex_router=dex_router,
-                slippage_bps=config["SLIPPAGE_BPS"]
-            )
-            SELL_SUCCESSES.inc()
-            remove_position(pair)
-            OPEN_POSITIONS.dec()
+        else:
             send(
                 "📉 STOP LOSS atingido:\n"
                 f"• Token: {pair}\n"
                 f"• TX: {tx}\n"
                 f"• Perda: –{sl*100:.1f}%"
             )
-            continue
 
     await asyncio.sleep(config["EXIT_POLL_INTERVAL"])
@@ -0,0 +1,114 @@
+# l2_cache.py
+
+import asyncio
+import json
+import logging
+import time
+from typing import Any, Dict, List, Optional
+
+logger = logging.getLogger(__name__)
+
+# Redis é opcional: sem ele (ou sem REDIS_URL) cada processo usa só seus caches locais
+try:
+    from redis.asyncio import Redis
+    REDIS_AVAILABLE = True
+except ImportError:
+    REDIS_AVAILABLE = False
+
+# ormsgpack é opcional: serialização binária 3-10x mais rápida e compacta que JSON
+try:
+    import ormsgpack
+    ORMSGPACK_AVAILABLE = True
+except ImportError:
+    ORMSGPACK_AVAILABLE = False
+
+from config import config
+
+# TTLs por tipo de dado (s); None = sem expiração
+TTL_PAIR = None        # endereço de par não muda depois de criado
+TTL_RESERVES = 2       # reservas valem ~1 bloco
+TTL_GAS_PRICE = 30     # mesmo intervalo do poller de gas
+TTL_V3_QUOTE = 1       # cotação do quoter V3
+
+KEY_PREFIX = "sniper:"
+RETRY_AFTER_ERROR = 30.0  # segundos sem tentar o Redis depois de uma falha
+
+def _packb(value: Any) -> bytes:
+    if ORMSGPACK_AVAILABLE:
+        return ormsgpack.packb(value)
+    return json.dumps(value).encode()
+
+def _unpackb(raw: bytes) -> Any:
+    if ORMSGPACK_AVAILABLE:
+        return ormsgpack.unpackb(raw)
+    return json.loads(raw)
+
+class L2Cache:
+    """
+    Cache L2 compartilhado entre processos (Redis). Complementa os caches
+    em memória: leituras de várias chaves saem num único MGET e escritas num
+    pipeline. Qualquer erro do Redis vira cache miss (nunca quebra a cotação).
+    """
+
+    def __init__(self, url: Optional[str] = None):
+        self.url = url if url is not None else config.get("REDIS_URL")
+        self._redis = None
+        self._redis_loop = None
+        self._retry_at = 0.0
+
+    @property
+    def enabled(self) -> bool:
+        return REDIS_AVAILABLE and bool(self.url) and time.monotonic() >= self._retry_at
+
+    def _client(self):
+        # As conexões do redis.asyncio ficam presas ao loop em que foram criadas
+        loop = asyncio.get_running_loop()
+        if self._redis is None or self._redis_loop is not loop:
+            self._redis = Redis.from_url(self.url)
+            self._redis_loop = loop
+        return self._redis
+
+    def _failed(self, e: Exception) -> None:
+        logger.debug(f"Cache L2 indisponível: {e}")
+        self._retry_at = time.monotonic() + RETRY_AFTER_ERROR
+
+    async def get(self, key: str) -> Any:
+        return (await self.get_many([key]))[0]
+
+    async def get_many(self, keys: List[str]) -> List[Any]:
+        """Lê várias chaves num único round trip; ausentes (ou erro) = None"""
+        if not keys or not self.enabled:
+            return [None] * len(keys)
+        try:
+            raws = await self._client().mget([KEY_PREFIX + k for k in keys])
+            return [None if raw is None else _unpackb(raw) for raw in raws]
+        except Exception as e:
+            self._failed(e)
+            return [None] * len(keys)
+
+    async def set(self, key: str, value: Any, ttl: Optional[float]) -> None:
+        await self.set_many({key: value}, ttl)
+
+    async def set_many(self, items: Dict[str, Any], ttl: Optional[float]) -> None:
+        """Grava várias chaves com o mesmo TTL num pipeline (sem TTL: MSETNX)"""
+        if not items or not self.enabled:
+            return
+        try:
+            packed = {KEY_PREFIX + k: _packb(v) for k, v in items.items()}
+            if ttl is None:
+                await self._client().msetnx(packed)
+                return
+            async with self._client().pipeline(transaction=False) as pipe:
+                for k, raw in packed.items():
+                    pipe.set(k, raw, px=int(ttl * 1000))
+                await pipe.execute()
+        except Exception as e:
+            self._failed(e)
+
+    async def close(self) -> None:
+        if self._redis is not None:
+            try:
+                await self._redis.aclose()
+            except Exception as e:
+                logger.debug(f"Erro fechando cache L2: {e}")
+            self._redis = None
@@ -49,7 +49,7 @@ except ImportError:
     Web3 = None
 
 from config import config
-from utils import escape_md_v2
+from utils import escape_md_v2, install_uvloop
 from discovery import subscribe_new_pairs, stop_discovery, is_discovery_running
 from pipeline import on_pair
 from exit_manager import check_exits
@@ -84,6 +84,9 @@ else:
 
 # Advanced Strategy já importada
 
+# uvloop (se instalado) antes de criar qualquer event loop
+install_uvloop()
+
 # Telegram Bot
 if TELEGRAM_AVAILABLE and TELE_TOKEN:
     loop = asyncio.new_event_loop()
@@ -199,7 +202,7 @@ async def menu_handler(update: Update, ctx: ContextTypes.DEFAULT_TYPE):
         await q.message.reply_text(status_msg)
 
     elif cmd == "menu_balance":
-        await q.message.reply_text(get_wallet_status())
+        await q.message.reply_text(await get_wallet_status())
 
     elif cmd == "menu_config":
         await q.message.edit_text(
@@ -623,6 +626,7 @@ def api_webhook():
 # Graceful shutdown
 def shutdown(sig, frame):
     stop_discovery()
+    advanced_sniper.save_state()
     fut = asyncio.run_coroutine_threadsafe(app_bot.shutdown(), loop)
     try: fut.result(10)
     except: pass
@@ -12,7 +12,7 @@ import json
 import signal
 from datetime import datetime, timedelta
 from threading import Thread, Event
-from typing import Dict, List, Optional, Any
+from typing import Dict, List, Optional, Any, Tuple
 import traceback
 
 # Configuração de logging
@@ -79,6 +79,14 @@ except ImportError:
 # Configurações
 from config import config
 
+try:
+    from check_balance import get_balances_batch, get_token_balance
+    MULTICALL_AVAILABLE = True
+except ImportError:
+    MULTICALL_AVAILABLE = False
+
+WETH_BASE = '0x4200000000000000000000000000000000000006'  # WETH Base
+
 # Estado global do bot
 class BotState:
     def __init__(self):
@@ -198,37 +206,54 @@ async def check_dex_status() -> Dict[str, Any]:
     bot_state.dex_status = results
     return results
 
+async def refresh_all_balances(wallet: str, tokens: List[str]) -> Tuple[int, Dict[str, int]]:
+    """
+    Saldo de ETH + balanceOf(wallet) de todos os tokens numa única eth_call
+    (check_balance.get_balances_batch). Se o multicall falhar, consulta os
+    tokens em paralelo. Retorna (eth_wei, {token: saldo_wei}).
+    """
+    if MULTICALL_AVAILABLE:
+        try:
+            return await get_balances_batch(wallet, tokens)
+        except Exception as e:
+            logger.warning(f"⚠️ Multicall falhou, consultando saldos individualmente: {e}")
+    
+    eth = w3.eth.get_balance(wallet)
+    if not MULTICALL_AVAILABLE:
+        return eth, {}
+    results = await asyncio.gather(
+        *(get_token_balance(token, wallet) for token in tokens), return_exceptions=True
+    )
+    balances = {}
+    for token, result in zip(tokens, results):
+        if isinstance(result, Exception):
+            logger.debug(f"balanceOf falhou para {token}: {result}")
+        else:
+            balances[token] = result
+    return eth, balances
+
 async def get_wallet_balance() -> Dict[str, float]:
-    """Obtém saldo da carteira"""
+    """Obtém saldo da carteira (ETH, WETH e tokens das posições numa única chamada)"""
     if not w3 or not config.get('WALLET_ADDRESS'):
         return {'eth': 0.0, 'weth': 0.0}
     
     try:
-        wallet_address = config['WALLET_ADDRESS']
-        
-        # ETH balance
-        eth_balance = w3.eth.get_balance(wallet_address)
-        eth_balance_ether = w3.from_wei(eth_balance, 'ether')
+        wallet_address = Web3.to_checksum_address(config['WALLET_ADDRESS'])
         
-        # WETH balance (contrato WETH na Base)
-        weth_address = '0x4200000000000000000000000000000000000006'  # WETH Base
-        weth_abi = [
-            {
-                "constant": True,
-                "inputs": [{"name": "_owner", "type": "address"}],
-                "name": "balanceOf",
-                "outputs": [{"name": "balance", "type": "uint256"}],
-                "type": "function"
-            }
-        ]
+        eth_balance, token_balances = await refresh_all_balances(
+            wallet_address, [WETH_BASE, *bot_state.positions]
+        )
+        weth_balance = token_balances.pop(WETH_BASE, 0)
         
-        weth_contract = w3.eth.contract(address=weth_address, abi=weth_abi)
-        weth_balance = weth_contract.functions.balanceOf(wallet_address).call()
-        weth_balance_ether = w3.from_wei(weth_balance, 'ether')
+        # Saldo (wei) de cada posição aberta
+        for token, position in bot_state.positions.items():
+            if isinstance(position, dict):
+                position['balance_wei'] = token_balances.get(token, 0)
         
         bot_state.wallet_balance = {
-            'eth': float(eth_balance_ether),
-            'weth': float(weth_balance_ether)
+            'eth': float(w3.from_wei(eth_balance, 'ether')),
+            'weth': float(w3.from_wei(weth_balance, 'ether')),
+            'tokens': token_balances
         }
         
         return bot_state.wallet_balance
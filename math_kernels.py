@@ -0,0 +1,47 @@
+# math_kernels.py
+
+"""
+Kernels numéricos puros das cotações (price impact, score, slippage).
+Entradas em float64: reservas uint112 não cabem em int64, então quem chama
+converte os inteiros antes. As assinaturas explícitas compilam na importação
+(sem stall na primeira cotação) e o cache=True evita recompilar a cada boot.
+"""
+
+from utils import njit
+
+# Pesos do efficiency score
+W_AMOUNT = 0.4
+W_LIQUIDITY = 0.2
+W_IMPACT = 0.3
+W_GAS = 0.1
+
+LIQUIDITY_CAP_ETH = 10.0
+GAS_CAP = 500000.0
+
+@njit('float64(float64, float64, float64, float64)', cache=True)
+def price_impact_v2(reserve_in, reserve_out, amount_in, amount_out):
+    """Variação relativa do preço x*y=k antes/depois do trade, limitada a 1"""
+    price_before = reserve_out / reserve_in
+    price_after = (reserve_out - amount_out) / (reserve_in + amount_in)
+    return min(abs(price_before - price_after) / price_before, 1.0)
+
+@njit('float64(float64, float64, float64)', cache=True)
+def price_impact_v3(spot_price, amount_in, amount_out):
+    """Desvio do preço efetivo do trade em relação ao spot, limitado a 1"""
+    effective_price = amount_out / amount_in
+    return min(abs(spot_price - effective_price) / spot_price, 1.0)
+
+@njit('float64(float64, float64, float64, float64)', cache=True)
+def efficiency_score(net_amount, liquidity, price_impact, gas_estimate):
+    """Score de eficiência (maior = melhor); net_amount em wei, liquidez em ETH"""
+    return (
+        net_amount / 1e18 * W_AMOUNT
+        + min(liquidity, LIQUIDITY_CAP_ETH) / LIQUIDITY_CAP_ETH * W_LIQUIDITY
+        + (1.0 - price_impact) * W_IMPACT
+        + (1.0 - min(gas_estimate / GAS_CAP, 1.0)) * W_GAS
+    )
+
+@njit('float64(float64, float64, float64, float64, float64)', cache=True)
+def dynamic_slippage(amount_in_wei, depth_wei, factor, floor, cap):
+    """Slippage = impacto (amount/profundidade) * fator, entre floor e cap"""
+    return min(max(round(amount_in_wei / depth_wei * factor, 8), floor), cap)
@@ -17,7 +17,7 @@ from web3 import Web3
 from eth_utils import to_checksum_address
 
 from config import config
-from utils import is_contract, get_token_info, calculate_liquidity
+from utils import is_contract, get_token_info, calculate_liquidity, http_provider
 
 logger = logging.getLogger(__name__)
 
@@ -39,7 +39,7 @@ class MempoolMonitor:
     """Monitor de mempool para detecção de novos tokens"""
     
     def __init__(self):
-        self.w3 = Web3(Web3.HTTPProvider(config["RPC_URL"]))
+        self.w3 = Web3(http_provider())
         self.ws_url = config["RPC_URL"].replace("https://", "wss://").replace("http://", "ws://")
         self.is_running = False
         self.callbacks: List[Callable] = []
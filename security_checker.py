@@ -15,7 +15,7 @@ from web3 import Web3
 from eth_utils import to_checksum_address
 
 from config import config
-from utils import get_token_info, simulate_trade
+from utils import get_token_info, simulate_trade, http_provider
 
 logger = logging.getLogger(__name__)
 
@@ -36,7 +36,7 @@ class SecurityChecker:
     """Verificador de segurança para tokens"""
     
     def __init__(self):
-        self.w3 = Web3(Web3.HTTPProvider(config["RPC_URL"]))
+        self.w3 = Web3(http_provider())
         self.cache: Dict[str, SecurityReport] = {}
         self.cache_ttl = 300  # 5 minutos
         
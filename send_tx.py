@@ -5,15 +5,12 @@ try:
 except ImportError:
     WEB3_AVAILABLE = False
     Web3 = None
-from dotenv import load_dotenv
 from telegram import Bot
 from config import config
 from telegram_alert import send_report
 from web3.exceptions import TransactionNotFound
 
-# Carrega variáveis do .env
-load_dotenv()
-
+# Variáveis do .env já carregadas pelo módulo config
 # Conecta à rede Base
 rpc_url = os.getenv("RPC_URL")
 web3 = Web3(Web3.HTTPProvider(rpc_url))
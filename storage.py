@@ -5,6 +5,7 @@ from threading import Lock
 from typing import List, Tuple
 
 from metrics import OPEN_POSITIONS
+from utils import to_checksum
 
 DB_PATH = "positions.db"
 _lock = Lock()
@@ -17,16 +18,37 @@ CREATE TABLE IF NOT EXISTS positions (
 );
 """
 
+_normalized = False
+
+def _normalize_pairs(conn):
+    # Linhas gravadas antes do checksum: reescritas uma vez para casar com remove_position
+    for pair, amount, avg_price in conn.execute(
+        "SELECT pair, amount, avg_price FROM positions"
+    ).fetchall():
+        checksummed = to_checksum(pair)
+        if checksummed != pair:
+            conn.execute("DELETE FROM positions WHERE pair = ?", (pair,))
+            conn.execute(
+                "REPLACE INTO positions(pair, amount, avg_price) VALUES (?, ?, ?)",
+                (checksummed, amount, avg_price)
+            )
+
 def _conn():
+    global _normalized
     c = sqlite3.connect(DB_PATH, check_same_thread=False)
     c.execute(_schema)
+    if not _normalized:
+        with c:
+            _normalize_pairs(c)
+        _normalized = True
     return c
 
 def add_position(pair: str, amount: int, avg_price: float):
+    # Gravado em checksum: quem lê as posições não precisa converter de novo
     with _lock, _conn() as conn:
         conn.execute(
             "REPLACE INTO positions(pair, amount, avg_price) VALUES (?, ?, ?)",
-            (pair, amount, avg_price)
+            (to_checksum(pair), amount, avg_price)
         )
     OPEN_POSITIONS.set(len(get_all_positions()))
 
@@ -36,5 +58,5 @@ def get_all_positions() -> List[Tuple[str,int,float]]:
 
 def remove_position(pair: str):
     with _lock, _conn() as conn:
-        conn.execute("DELETE FROM positions WHERE pair = ?", (pair,))
+        conn.execute("DELETE FROM positions WHERE pair = ?", (to_checksum(pair),))
     OPEN_POSITIONS.set(len(get_all_positions()))
@@ -63,6 +63,8 @@ class TradingStrategy:
         self.trail_pct = float(config.get("TRAIL_PCT", 0.01))
 
         self.last_price = _load_last_price()
+        # Última cotação lida pelo próprio loop (lida pelo dashboard sem novo RPC)
+        self.last_seen_price: Optional[float] = None
 
     def _get_amounts_out(self, amount_in_wei: int, path: list[str]) -> int:
         abi = [{
@@ -78,7 +80,8 @@ class TradingStrategy:
             return None
         try:
             out = self._get_amounts_out(10**18, [self.weth, self.usdc])
-            return out / 1e6  # USDC com 6 casas
+            self.last_seen_price = out / 1e6  # USDC com 6 casas
+            return self.last_seen_price
         except Exception as e:
             logger.warning(f"Falha ao obter preço ETH/USDC: {e}")
             return None
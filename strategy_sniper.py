@@ -8,11 +8,12 @@ from time import time
 from typing import Tuple
 
 try:
-    from web3 import Web3
+    from web3 import Web3, AsyncWeb3
     WEB3_AVAILABLE = True
 except ImportError:
     WEB3_AVAILABLE = False
     Web3 = None
+    AsyncWeb3 = None
 from telegram import Bot
 
 from config import config
@@ -31,6 +32,7 @@ from utils import (
     is_token_concentrated,
     rate_limiter,
     configure_rate_limiter_from_config,
+    async_http_provider,
 )
 
 log = logging.getLogger("sniper")
@@ -83,12 +85,15 @@ class StrategySniper:
         # Web3 + WETH
         prov = Web3.HTTPProvider(config["RPC_URL"])
         self.w3 = Web3(prov)
+        # Leituras de pares/preços (DexClient) sem bloquear o event loop
+        self.async_w3 = AsyncWeb3(async_http_provider())
         # corrigido: usa to_checksum_address
         self.weth = Web3.to_checksum_address(config["WETH"])
 
         # Parâmetros de configuração
         self.trade_size = Decimal(str(config.get("TRADE_SIZE_ETH", 0.1)))
         self.min_liq = Decimal(str(config.get("MIN_LIQ_WETH", 0.5)))
+        self.min_liq_wei = int(self.min_liq * 10**18)
         self.max_tax_bps = int(float(config.get("MAX_TAX_PCT", 10.0)) * 100)
         self.top_holder_limit = float(config.get("TOP_HOLDER_LIMIT", 30.0))
         self.tp_pct = float(config.get("TAKE_PROFIT_PCT", 0.2))
@@ -126,16 +131,17 @@ class StrategySniper:
         # 3) configuração inicial e filtros
         try:
             base, target = self._identificar_tokens(t0, t1)
-            dex = DexClient(self.w3, dex_info.router)
-            versao = dex.detect_version(pair)
+            dex = DexClient(self.async_w3, dex_info.router)
+            versao = await dex.detect_version(pair)
 
             # 3.1) liquidez
-            liq = (
-                max(*dex._get_reserves(pair))
+            liq_wei = (
+                max(await dex._get_reserves(pair))
                 if versao == DexVersion.V2
-                else dex._get_liquidity_v3(pair)
+                else await dex._get_liquidity_v3(pair)
             )
-            if liq < self.min_liq:
+            liq = liq_wei / 10**18
+            if liq_wei < self.min_liq_wei:
                 msg = f"Liquidez {liq:.4f} < mínimo {self.min_liq}"
                 risk_manager.record(
                     "pair_skipped", msg,
@@ -145,11 +151,11 @@ class StrategySniper:
                 return
 
             # 3.2) preço e slippage
-            preco = dex.get_token_price(target, base)
+            preco = await dex.get_token_price(target, base)
             if preco is None:
                 _notify(f"⚠️ Preço indisponível para {target}", via_alert=True)
                 return
-            slip = dex.calc_dynamic_slippage(pair, float(self.trade_size))
+            slip = await dex.calc_dynamic_slippage(pair, float(self.trade_size))
 
             # 3.3) notifica resumo
             resumo = (
@@ -286,7 +292,7 @@ class StrategySniper:
 
         while is_discovery_running():
             await asyncio.sleep(self.interval)
-            preco_atual = dex.get_token_price(target, base)
+            preco_atual = await dex.get_token_price(target, base)
             if preco_atual is None:
                 continue
 
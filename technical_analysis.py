@@ -2,7 +2,8 @@
 
 import numpy as np
 import pandas as pd
-from typing import List, Dict, Tuple, Optional
+from collections import defaultdict, deque
+from typing import Deque, List, Dict, Tuple, Optional
 from dataclasses import dataclass
 from enum import Enum
 import logging
@@ -10,6 +11,9 @@ from decimal import Decimal
 
 log = logging.getLogger("technical_analysis")
 
+# Pontos de preço mantidos por token
+PRICE_HISTORY_MAXLEN = 100
+
 class TrendDirection(Enum):
     STRONG_BULLISH = 5
     BULLISH = 4
@@ -38,19 +42,15 @@ class MarketAnalysis:
 
 class TechnicalAnalyzer:
     def __init__(self):
-        self.price_history: Dict[str, List[Tuple[float, float, int]]] = {}  # token -> [(price, volume, timestamp)]
+        # token -> [(price, volume, timestamp)]; deque descarta o mais antigo em O(1)
+        self.price_history: Dict[str, Deque[Tuple[float, float, int]]] = defaultdict(
+            lambda: deque(maxlen=PRICE_HISTORY_MAXLEN)
+        )
         self.min_data_points = 14  # Minimum data points for analysis
         
     def add_price_data(self, token: str, price: float, volume: float, timestamp: int):
         """Add price data point for a token"""
-        if token not in self.price_history:
-            self.price_history[token] = []
-        
         self.price_history[token].append((price, volume, timestamp))
-        
-        # Keep only last 100 data points
-        if len(self.price_history[token]) > 100:
-            self.price_history[token] = self.price_history[token][-100:]
     
     def calculate_rsi(self, prices: List[float], period: int = 14) -> float:
         """Calculate Relative Strength Index"""
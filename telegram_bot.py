@@ -221,7 +221,7 @@ class TelegramBot:
         
     async def balance_command(self, update: Update, context: ContextTypes.DEFAULT_TYPE):
         """Comando /balance"""
-        balance_info = get_wallet_status()
+        balance_info = await get_wallet_status()
         await update.message.reply_text(balance_info, parse_mode='MarkdownV2')
         
     async def positions_command(self, update: Update, context: ContextTypes.DEFAULT_TYPE):
@@ -745,7 +745,7 @@ class TelegramBot:
             )
             
         elif data == "show_balance":
-            balance_info = get_wallet_status()
+            balance_info = await get_wallet_status()
             await query.edit_message_text(balance_info, parse_mode='MarkdownV2')
             
         elif data == "show_positions":
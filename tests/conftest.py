@@ -24,7 +24,8 @@ os.environ.update({
     "TRADE_SIZE_ETH": "0.001",
     "SLIPPAGE_BPS": "500",
     "TAKE_PROFIT_PCT": "0.25",
-    "STOP_LOSS_PCT": "0.15"
+    "STOP_LOSS_PCT": "0.15",
+    "STATE_FILE": ""
 })
 
 @pytest.fixture(scope="session")
@@ -134,7 +135,6 @@ def sample_trade_result():
 def mock_position():
     """Mock de posição de trading"""
     from advanced_sniper_strategy import Position, StrategyType, PositionStatus
-    from decimal import Decimal
     import time
     
     return Position(
@@ -142,11 +142,11 @@ def mock_position():
         token_symbol="TEST",
         strategy_type=StrategyType.MEMECOIN_SNIPER,
         entry_price=0.000001,
-        entry_amount=Decimal("1000000"),
+        entry_amount=1_000_000 * 10**18,  # tokens em wei
         entry_time=int(time.time()) - 3600,  # 1 hora atrás
         current_price=0.0000012,
-        current_value=Decimal("1200000"),
-        pnl=200000.0,
+        current_value=12 * 10**17,  # 1.2 ETH em wei
+        pnl=0.2,
         pnl_percentage=20.0,
         status=PositionStatus.ACTIVE,
         take_profit_levels=[0.25, 0.50, 1.0, 2.0],
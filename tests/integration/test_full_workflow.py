@@ -7,7 +7,7 @@ import asyncio
 from unittest.mock import Mock, AsyncMock, patch
 from decimal import Decimal
 
-from advanced_sniper_strategy import advanced_sniper
+from advanced_sniper_strategy import advanced_sniper, _addr_key
 from mempool_monitor import NewTokenEvent
 from security_checker import SecurityReport
 from telegram_bot import telegram_bot
@@ -88,9 +88,9 @@ class TestFullWorkflow:
         
         # Verifica resultados
         assert len(advanced_sniper.positions) == 1
-        assert new_token_event.token_address in advanced_sniper.positions
+        assert _addr_key(new_token_event.token_address) in advanced_sniper.positions
         
-        position = advanced_sniper.positions[new_token_event.token_address]
+        position = advanced_sniper.positions[_addr_key(new_token_event.token_address)]
         assert position.token_symbol == "TMC"
         assert position.dex_name == "TestDEX"
         assert position.transaction_hash == "0xdef456"
@@ -154,11 +154,11 @@ class TestFullWorkflow:
             token_symbol="TEST",
             strategy_type=StrategyType.MEMECOIN_SNIPER,
             entry_price=0.000001,
-            entry_amount=Decimal("1000000"),
+            entry_amount=1_000_000 * 10**18,
             entry_time=int(time.time()) - 3600,
             current_price=0.0000025,  # 2.5x lucro
-            current_value=Decimal("2500000"),
-            pnl=1500000.0,
+            current_value=25 * 10**17,
+            pnl=1.5,
             pnl_percentage=150.0,
             status=PositionStatus.ACTIVE,
             take_profit_levels=[0.25, 0.50, 1.0, 2.0],
@@ -168,7 +168,7 @@ class TestFullWorkflow:
             transaction_hash="0xabc123"
         )
         
-        advanced_sniper.positions[position.token_address] = position
+        advanced_sniper.positions[_addr_key(position.token_address)] = position
         
         # Mock de execução de venda
         sell_result = {
@@ -184,7 +184,7 @@ class TestFullWorkflow:
                 await advanced_sniper._execute_exit(position, "Take Profit 150%")
         
         # Verifica que posição foi removida
-        assert position.token_address not in advanced_sniper.positions
+        assert _addr_key(position.token_address) not in advanced_sniper.positions
         
         # Verifica que lucro foi contabilizado
         assert advanced_sniper.stats["total_profit"] > 0
@@ -85,11 +85,11 @@ class TestPerformanceBenchmarks:
                 token_symbol=f"TEST{i}",
                 strategy_type=StrategyType.MEMECOIN_SNIPER,
                 entry_price=0.000001,
-                entry_amount=Decimal("1000000"),
+                entry_amount=1_000_000 * 10**18,
                 entry_time=int(time.time()) - 3600,
                 current_price=0.0000012,
-                current_value=Decimal("1200000"),
-                pnl=200000.0,
+                current_value=12 * 10**17,
+                pnl=0.2,
                 pnl_percentage=20.0,
                 status=PositionStatus.ACTIVE,
                 take_profit_levels=[0.25, 0.50, 1.0, 2.0],
@@ -98,9 +98,10 @@ class TestPerformanceBenchmarks:
                 dex_name="TestDEX",
                 transaction_hash=f"0x{i:064x}"
             )
-            strategy.positions[position.token_address] = position
+            strategy.positions[bytes.fromhex(position.token_address[2:])] = position
         
-        with patch.object(strategy, '_get_current_price', return_value=0.0000015):
+        prices = {position.token_address: 0.0000015 for position in strategy.positions.values()}
+        with patch('advanced_sniper_strategy.batch_get_prices', return_value=prices):
             
             async def run_position_update():
                 await strategy._update_positions()
@@ -293,7 +294,7 @@ class TestPerformanceBenchmarks:
             )
             
             # Adiciona ao cache de tokens processados
-            strategy.processed_tokens.add(event.token_address)
+            strategy._mark_processed(bytes.fromhex(event.token_address[2:]))
         
         final_memory = process.memory_info().rss
         memory_increase = final_memory - initial_memory
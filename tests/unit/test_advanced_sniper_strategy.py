@@ -2,12 +2,13 @@
 Testes unitários para a estratégia avançada de sniper
 """
 
+import asyncio
 import pytest
 from unittest.mock import Mock, AsyncMock, patch
 from decimal import Decimal
 import time
 
-from advanced_sniper_strategy import AdvancedSniperStrategy, Position, StrategyType, PositionStatus
+from advanced_sniper_strategy import AdvancedSniperStrategy, Position, StrategyType, PositionStatus, _addr_key
 
 
 class TestAdvancedSniperStrategy:
@@ -93,6 +94,27 @@ class TestAdvancedSniperStrategy:
         
         mock_execute.assert_not_called()  # Não deve executar para token inseguro
     
+    @pytest.mark.asyncio
+    async def test_on_new_token_cheap_reject(self, strategy, mock_new_token_event):
+        """Testa que o pré-filtro local evita a verificação de segurança"""
+        strategy.is_running = True
+        mock_new_token_event.token_address = "0x0000000000000000000000000000000000000000"
+        
+        with patch('advanced_sniper_strategy.check_token_safety') as mock_check:
+            await strategy._on_new_token(mock_new_token_event)
+        
+        mock_check.assert_not_called()
+        assert strategy.get_performance_stats()["rejected_cheap"] == 1
+    
+    def test_cheap_reject_symbols(self, strategy):
+        """Testa descarte de stablecoins/wrapped pelo símbolo"""
+        token_address = "0x1234567890123456789012345678901234567890"
+        
+        assert strategy._cheap_reject(token_address, "USDC")
+        assert strategy._cheap_reject(token_address, "WETH")
+        assert strategy._cheap_reject("0xnothex")
+        assert not strategy._cheap_reject(token_address, "PEPE")
+    
     @pytest.mark.asyncio
     async def test_on_new_token_max_positions(self, strategy, mock_new_token_event, mock_security_report):
         """Testa limite máximo de posições"""
@@ -100,7 +122,7 @@ class TestAdvancedSniperStrategy:
         strategy.max_positions = 1
         
         # Adiciona uma posição existente
-        strategy.positions["existing"] = Mock()
+        strategy.positions[bytes(20)] = Mock()
         
         with patch('advanced_sniper_strategy.check_token_safety', return_value=mock_security_report):
             with patch.object(strategy, '_execute_memecoin_strategy') as mock_execute:
@@ -108,6 +130,29 @@ class TestAdvancedSniperStrategy:
         
         mock_execute.assert_not_called()  # Não deve executar se atingiu limite
     
+    @pytest.mark.asyncio
+    async def test_on_new_token_already_processed(self, strategy, mock_new_token_event, mock_security_report):
+        """Testa que token repetido (qualquer capitalização) é ignorado"""
+        strategy.is_running = True
+        
+        with patch('advanced_sniper_strategy.check_token_safety', return_value=mock_security_report) as mock_check:
+            with patch.object(strategy, '_execute_memecoin_strategy'):
+                await strategy._on_new_token(mock_new_token_event)
+                mock_new_token_event.token_address = mock_new_token_event.token_address.upper().replace("0X", "0x")
+                await strategy._on_new_token(mock_new_token_event)
+        
+        mock_check.assert_called_once()
+    
+    def test_processed_tokens_bounded(self, strategy):
+        """Testa que o LRU de tokens processados é limitado"""
+        with patch('advanced_sniper_strategy.MAX_PROCESSED_TOKENS', 3):
+            for i in range(5):
+                strategy._mark_processed(i.to_bytes(20, "big"))
+        
+        assert len(strategy.processed_tokens) == 3
+        assert (0).to_bytes(20, "big") not in strategy.processed_tokens
+        assert (4).to_bytes(20, "big") in strategy.processed_tokens
+    
     @pytest.mark.asyncio
     async def test_execute_memecoin_strategy_success(self, strategy, mock_new_token_event, mock_security_report, mock_token_info):
         """Testa execução bem-sucedida da estratégia de memecoin"""
@@ -156,7 +201,8 @@ class TestAdvancedSniperStrategy:
                     )
         
         assert len(strategy.positions) == 1
-        assert token_address in strategy.positions
+        assert _addr_key(token_address) in strategy.positions
+        assert strategy.positions[_addr_key(token_address)].token_address == token_address
         mock_notify.assert_called_once()
     
     @pytest.mark.asyncio
@@ -177,36 +223,192 @@ class TestAdvancedSniperStrategy:
     @pytest.mark.asyncio
     async def test_update_positions(self, strategy, mock_position):
         """Testa atualização de posições"""
-        strategy.positions[mock_position.token_address] = mock_position
+        strategy.positions[_addr_key(mock_position.token_address)] = mock_position
         
-        with patch.object(strategy, '_get_current_price', return_value=0.0000015):
+        prices = {mock_position.token_address: 0.0000015}
+        with patch('advanced_sniper_strategy.batch_get_prices', return_value=prices) as mock_batch:
             await strategy._update_positions()
         
-        position = strategy.positions[mock_position.token_address]
+        mock_batch.assert_called_once()
+        position = strategy.positions[_addr_key(mock_position.token_address)]
         assert position.current_price == 0.0000015
         assert position.pnl_percentage > 0  # Lucro
+        assert isinstance(position.current_value, int)
+        assert position.current_value == int(0.0000015 * mock_position.entry_amount)
+    
+    @pytest.mark.asyncio
+    async def test_update_positions_falls_back_for_v3_only(self, strategy, mock_position):
+        """Testa cotação individual para tokens fora do multicall V2"""
+        strategy.positions[_addr_key(mock_position.token_address)] = mock_position
+        
+        mock_quote = Mock()
+        mock_quote.dex_quote.amount_out = 1500000000000  # 0.0000015 ETH
+        
+        with patch('advanced_sniper_strategy.batch_get_prices', return_value={}):
+            with patch('advanced_sniper_strategy.get_best_price', return_value=mock_quote) as mock_price:
+                await strategy._update_positions()
+        
+        mock_price.assert_called_once()
+        assert mock_position.current_price == 0.0000015
+    
+    @pytest.mark.asyncio
+    async def test_update_positions_concurrent_share_fallback_quote(self, strategy, mock_position):
+        """Testa que atualizações concorrentes dividem a mesma cotação de fallback"""
+        strategy.positions[_addr_key(mock_position.token_address)] = mock_position
+        
+        mock_quote = Mock()
+        mock_quote.dex_quote.amount_out = 1500000000000
+        
+        async def slow_quote(**kwargs):
+            await asyncio.sleep(0.01)
+            return mock_quote
+        
+        with patch('advanced_sniper_strategy.batch_get_prices', return_value={}):
+            with patch('advanced_sniper_strategy.get_best_price', side_effect=slow_quote) as mock_price:
+                await asyncio.gather(strategy._update_positions(), strategy._update_positions())
+        
+        assert mock_price.call_count == 1
+        assert mock_position.current_price == 0.0000015
+    
+    @pytest.mark.asyncio
+    async def test_update_one_skips_unchanged_price(self, strategy, mock_position):
+        """Testa que preço inalterado não recalcula PnL nem invalida a serialização"""
+        token_key = _addr_key(mock_position.token_address)
+        strategy.positions[token_key] = mock_position
+        cached = mock_position.to_dict()
+        
+        await strategy._update_one(token_key, mock_position, mock_position.current_price)
+        
+        assert mock_position.pnl == 0.2
+        assert not mock_position.dirty
+        assert mock_position.to_dict() is cached
+        
+        await strategy._update_one(token_key, mock_position, 0.0000015)
+        
+        assert mock_position.dirty
+        assert mock_position.to_dict()["current_price"] == 0.0000015
+    
+    @pytest.mark.asyncio
+    async def test_update_one_unchanged_price_wakes_task(self, strategy, mock_position):
+        """Testa que preço inalterado ainda acorda a tarefa para saídas por tempo"""
+        token_key = _addr_key(mock_position.token_address)
+        strategy.positions[token_key] = mock_position
+        strategy._price_updated[token_key] = asyncio.Event()
+        mock_position.to_dict()  # serializa e limpa o dirty inicial
+        
+        await strategy._update_one(token_key, mock_position, mock_position.current_price)
+        
+        assert strategy._price_updated[token_key].is_set()
+        assert not mock_position.dirty
+    
+    @pytest.mark.asyncio
+    async def test_on_sync_log_updates_price(self, strategy, mock_position):
+        """Testa cálculo local do preço a partir de evento Sync do par"""
+        mock_position.pair_address = "0x0987654321098765432109876543210987654321"
+        token_key = _addr_key(mock_position.token_address)
+        strategy.positions[token_key] = mock_position
+        strategy._pairs[_addr_key(mock_position.pair_address)] = token_key
+        strategy._weth_key = b"\xff" * 20  # token é o token0
+        
+        reserve_token = 1_000_000 * 10**18
+        reserve_weth = 2 * 10**18
+        log = {
+            "address": mock_position.pair_address,
+            "data": "0x" + reserve_token.to_bytes(32, "big").hex() + reserve_weth.to_bytes(32, "big").hex()
+        }
+        
+        await strategy._on_sync_log(log)
+        
+        expected = (997 * 10**18 * reserve_weth // (reserve_token * 1000 + 997 * 10**18)) / 1e18
+        assert mock_position.current_price == expected
+        assert strategy._get_cached_price(token_key) == expected
     
     @pytest.mark.asyncio
     async def test_check_exit_conditions_stop_loss(self, strategy, mock_position):
         """Testa saída por stop loss"""
         mock_position.current_price = 0.0000008  # Abaixo do stop loss
-        strategy.positions[mock_position.token_address] = mock_position
+        strategy.positions[_addr_key(mock_position.token_address)] = mock_position
         
         with patch.object(strategy, '_execute_exit') as mock_exit:
             await strategy._check_exit_conditions()
         
         mock_exit.assert_called_once_with(mock_position, "Stop Loss")
     
+    @pytest.mark.asyncio
+    async def test_check_exit_conditions_multiple_positions(self, strategy, mock_position):
+        """Testa verificação concorrente de várias posições"""
+        from dataclasses import replace
+        
+        other = replace(mock_position, token_address="0x0987654321098765432109876543210987654321")
+        mock_position.current_price = 0.0000008
+        other.current_price = 0.0000008
+        strategy.positions[_addr_key(mock_position.token_address)] = mock_position
+        strategy.positions[_addr_key(other.token_address)] = other
+        
+        with patch.object(strategy, '_execute_exit') as mock_exit:
+            await strategy._check_exit_conditions()
+        
+        assert mock_exit.call_count == 2
+    
+    @pytest.mark.asyncio
+    async def test_position_task_exits_on_price_update(self, strategy, mock_position):
+        """Testa que a tarefa da posição avalia saída ao receber novo preço"""
+        import asyncio
+        
+        strategy.is_running = True
+        token_key = _addr_key(mock_position.token_address)
+        strategy.positions[token_key] = mock_position
+        
+        async def close(position, reason):
+            position.status = PositionStatus.CLOSED
+        
+        with patch.object(strategy, '_execute_exit', side_effect=close) as mock_exit:
+            strategy._start_position_task(token_key, mock_position)
+            task = strategy._position_tasks[token_key]
+            
+            prices = {mock_position.token_address: 0.0000008}  # Abaixo do stop loss
+            with patch('advanced_sniper_strategy.batch_get_prices', return_value=prices):
+                await strategy._update_positions()
+            
+            await asyncio.wait_for(task, timeout=1)
+        
+        mock_exit.assert_called_once_with(mock_position, "Stop Loss")
+        assert token_key not in strategy._position_tasks
+        assert token_key not in strategy._price_updated
+    
+    @pytest.mark.asyncio
+    async def test_check_exit_conditions_no_candidates(self, strategy, mock_position):
+        """Testa que a máscara vetorizada descarta posições sem condição de saída"""
+        strategy.positions[_addr_key(mock_position.token_address)] = mock_position
+        
+        with patch.object(strategy, '_check_position_exit') as mock_check:
+            await strategy._check_exit_conditions()
+        
+        mock_check.assert_not_called()
+    
     @pytest.mark.asyncio
     async def test_check_exit_conditions_take_profit(self, strategy, mock_position):
         """Testa saída por take profit"""
-        mock_position.pnl_percentage = 30.0  # Acima do primeiro take profit (25%)
-        strategy.positions[mock_position.token_address] = mock_position
+        mock_position.current_price = 0.0000013  # Acima do primeiro take profit (25%)
+        mock_position.pnl_percentage = 30.0
+        strategy.positions[_addr_key(mock_position.token_address)] = mock_position
+        
+        with patch.object(strategy, '_execute_partial_exit') as mock_exit:
+            await strategy._check_exit_conditions()
+        
+        mock_exit.assert_called_once_with(mock_position, 0, 0.25)
+    
+    @pytest.mark.asyncio
+    async def test_check_exit_conditions_multiple_take_profits(self, strategy, mock_position):
+        """Testa disparo de vários níveis cruzados no mesmo tick"""
+        mock_position.current_price = 0.0000016  # Acima de 25% e 50%
+        mock_position.pnl_percentage = 60.0
+        strategy.positions[_addr_key(mock_position.token_address)] = mock_position
         
         with patch.object(strategy, '_execute_partial_exit') as mock_exit:
             await strategy._check_exit_conditions()
         
-        mock_exit.assert_called_once()
+        assert [c.args[1] for c in mock_exit.call_args_list] == [0, 1]
     
     @pytest.mark.asyncio
     async def test_execute_partial_exit_success(self, strategy, mock_position):
@@ -222,13 +424,16 @@ class TestAdvancedSniperStrategy:
                 await strategy._execute_partial_exit(mock_position, 0, 0.25)
         
         assert mock_position.status == PositionStatus.TAKING_PROFIT
+        assert mock_position.next_tp_idx == 1
+        assert mock_position.entry_amount == 750_000 * 10**18  # Vendeu 25%
+        assert mock_execute.call_args.kwargs["amount_in"] == 250_000 * 10**18
         mock_notify.assert_called_once()
     
     @pytest.mark.asyncio
     async def test_execute_exit_success(self, strategy, mock_position):
         """Testa saída completa bem-sucedida"""
         token_address = mock_position.token_address
-        strategy.positions[token_address] = mock_position
+        strategy.positions[_addr_key(token_address)] = mock_position
         
         with patch('advanced_sniper_strategy.execute_best_trade') as mock_execute:
             mock_execute.return_value = {
@@ -240,7 +445,7 @@ class TestAdvancedSniperStrategy:
             with patch.object(strategy, '_notify_position_closed') as mock_notify:
                 await strategy._execute_exit(mock_position, "Take Profit")
         
-        assert token_address not in strategy.positions
+        assert _addr_key(token_address) not in strategy.positions
         assert strategy.stats["total_profit"] > 0
         mock_notify.assert_called_once()
     
@@ -259,6 +464,7 @@ class TestAdvancedSniperStrategy:
         """Testa saída de memecoin por timeout"""
         # Simula posição de 25 horas atrás
         mock_position.entry_time = int(time.time()) - 25 * 3600
+        mock_position.entry_time_ns = time.monotonic_ns() - 25 * 3600 * 10**9
         mock_position.pnl_percentage = 30.0  # Menos de 50%
         
         with patch.object(strategy, '_execute_exit') as mock_exit:
@@ -266,6 +472,16 @@ class TestAdvancedSniperStrategy:
         
         mock_exit.assert_called_once_with(mock_position, "Timeout 24h")
     
+    @pytest.mark.asyncio
+    async def test_check_memecoin_exit_conditions_recent_position(self, strategy, mock_position):
+        """Testa que posição recente não sai por timeout"""
+        mock_position.pnl_percentage = 30.0
+        
+        with patch.object(strategy, '_execute_exit') as mock_exit:
+            await strategy._check_memecoin_exit_conditions(mock_position)
+        
+        mock_exit.assert_not_called()
+    
     @pytest.mark.asyncio
     async def test_rebalance_portfolio(self, strategy):
         """Testa rebalanceamento do portfólio"""
@@ -293,13 +509,52 @@ class TestAdvancedSniperStrategy:
     
     def test_get_active_positions(self, strategy, mock_position):
         """Testa obtenção de posições ativas"""
-        strategy.positions[mock_position.token_address] = mock_position
+        strategy.positions[_addr_key(mock_position.token_address)] = mock_position
         
         positions = strategy.get_active_positions()
         
         assert len(positions) == 1
         assert positions[0]["token_symbol"] == "TEST"
         assert positions[0]["strategy_type"] == "memecoin_sniper"
+        assert positions[0]["entry_amount"] == "1000000"
+        assert positions[0]["current_value"] == "1.2"
+        assert positions[0]["status"] == "active"
+        assert "sell_calldata_prefix" not in positions[0]
+    
+    def test_next_poll_interval_follows_volatility(self, strategy, mock_position):
+        """Testa intervalo de polling longo com preço parado e curto com volatilidade"""
+        strategy.positions[_addr_key(mock_position.token_address)] = mock_position
+        
+        mock_position.returns.extend([0.0] * 10)
+        assert strategy._next_poll_interval() == 30.0
+        
+        mock_position.returns.extend([0.2, -0.2] * 10)
+        assert strategy._next_poll_interval() == 0.5
+    
+    def test_save_and_load_state(self, strategy, mock_position, tmp_path):
+        """Testa snapshot de posições/estatísticas e restauração após restart"""
+        strategy.state_file = str(tmp_path / "cache" / "state.json")
+        strategy.positions[_addr_key(mock_position.token_address)] = mock_position
+        strategy.stats["total_trades"] = 3
+        strategy.stats["total_profit"] = Decimal("0.0125")
+        strategy.save_state()
+        
+        restored = AdvancedSniperStrategy()
+        restored.state_file = strategy.state_file
+        restored.load_state()
+        
+        position = restored.positions[_addr_key(mock_position.token_address)]
+        assert position.entry_amount == mock_position.entry_amount
+        assert position.strategy_type == StrategyType.MEMECOIN_SNIPER
+        assert position.tp_prices == mock_position.tp_prices
+        assert restored.stats["total_trades"] == 3
+        assert restored.stats["total_profit"] == Decimal("0.0125")
+    
+    def test_position_uses_slots(self, mock_position):
+        """Testa que Position não aloca __dict__ por instância"""
+        assert not hasattr(mock_position, "__dict__")
+        with pytest.raises(AttributeError):
+            mock_position.unknown_field = 1
     
     @pytest.mark.asyncio
     async def test_get_current_price_success(self, strategy):
@@ -324,6 +579,69 @@ class TestAdvancedSniperStrategy:
         
         assert price is None
     
+    @pytest.mark.asyncio
+    async def test_get_current_price_cached(self, strategy):
+        """Testa que cotações dentro do TTL não geram nova chamada"""
+        token_address = "0x1234567890123456789012345678901234567890"
+        
+        mock_quote = Mock()
+        mock_quote.dex_quote.amount_out = 1200000000000000000
+        
+        with patch('advanced_sniper_strategy.get_best_price', return_value=mock_quote) as mock_price:
+            await strategy._get_current_price(token_address)
+            price = await strategy._get_current_price(token_address)
+        
+        assert price == 1.2
+        mock_price.assert_called_once()
+    
+    @pytest.mark.asyncio
+    async def test_get_current_price_single_flight(self, strategy):
+        """Testa que chamadas concorrentes compartilham uma única cotação"""
+        import asyncio
+        
+        token_address = "0x1234567890123456789012345678901234567890"
+        
+        mock_quote = Mock()
+        mock_quote.dex_quote.amount_out = 1200000000000000000
+        
+        async def slow_quote(**kwargs):
+            await asyncio.sleep(0.01)
+            return mock_quote
+        
+        with patch('advanced_sniper_strategy.get_best_price', side_effect=slow_quote) as mock_price:
+            prices = await asyncio.gather(
+                strategy._get_current_price(token_address),
+                strategy._get_current_price(token_address)
+            )
+        
+        assert prices == [1.2, 1.2]
+        assert mock_price.call_count == 1
+        assert token_address not in strategy._inflight
+    
+    @pytest.mark.asyncio
+    async def test_get_current_price_sentinel_address(self, strategy):
+        """Testa que endereços sentinela não geram cotação"""
+        with patch('advanced_sniper_strategy.get_best_price') as mock_price:
+            price = await strategy._get_current_price("0xEeeeeEeeeEeEeeEeEeEeeEEEeeeeEeeeeeeeEEeE")
+        
+        assert price is None
+        mock_price.assert_not_called()
+    
+    @pytest.mark.asyncio
+    async def test_send_telegram_alert_queued_and_coalesced(self):
+        """Testa envio de alertas em background com descarte de duplicados"""
+        import advanced_sniper_strategy
+        
+        with patch('advanced_sniper_strategy._send_telegram_alert') as mock_send:
+            await advanced_sniper_strategy.send_telegram_alert("alerta repetido")
+            await advanced_sniper_strategy.send_telegram_alert("alerta repetido")
+            await advanced_sniper_strategy.send_telegram_alert("outro alerta")
+            await advanced_sniper_strategy._alert_queue.join()
+        
+        assert [c.args[0] for c in mock_send.call_args_list] == ["alerta repetido", "outro alerta"]
+        # O worker fica referenciado enquanto roda
+        assert any(not t.done() for t in advanced_sniper_strategy._alert_tasks)
+    
     @pytest.mark.asyncio
     async def test_notify_position_opened(self, strategy, mock_position):
         """Testa notificação de posição aberta"""
@@ -0,0 +1,48 @@
+"""
+Testes unitários para o filtro de honeypot (classifier)
+"""
+
+import pytest
+from unittest.mock import Mock, AsyncMock, patch
+
+from config import DexConfig
+from discovery import DexInfo, _dex_infos
+from classifier import should_buy
+
+
+WETH = "0x4200000000000000000000000000000000000006"
+TOKEN = "0x1111111111111111111111111111111111111111"
+ROUTER_A = "0x2222222222222222222222222222222222222222"
+ROUTER_B = "0x3333333333333333333333333333333333333333"
+
+
+def test_dex_infos_fill_v2_routers():
+    """Testa que as DEXs V2 recebem todos os routers V2 configurados"""
+    dexes = [
+        DexConfig("A", "0x" + "aa" * 20, ROUTER_A, "v2"),
+        DexConfig("B", "0x" + "bb" * 20, ROUTER_B, "v2"),
+        DexConfig("C", "0x" + "cc" * 20, "0x" + "dd" * 20, "v3"),
+    ]
+
+    infos = _dex_infos(dexes)
+
+    assert infos[0].routers == (ROUTER_A, ROUTER_B)
+    assert infos[1].routers == (ROUTER_B, ROUTER_A)
+    assert infos[2].routers == ()
+
+
+@pytest.mark.asyncio
+async def test_should_buy_simulates_every_router():
+    """Testa que todos os routers chegam ao mesmo tryAggregate"""
+    dex = DexInfo("A", "0x" + "aa" * 20, ROUTER_A, "v2", (ROUTER_A, ROUTER_B))
+    out = (10**15).to_bytes(32, "big")
+
+    multicall = Mock()
+    multicall.functions.tryAggregate.return_value.call = AsyncMock(return_value=[(False, b""), (True, out)])
+
+    with patch('classifier._multicall', return_value=multicall), \
+         patch('classifier.config', {"WETH": WETH}):
+        assert await should_buy("0x" + "ee" * 20, WETH, TOKEN, dex)
+
+    _, calls = multicall.functions.tryAggregate.call_args[0]
+    assert [router for router, _ in calls] == [ROUTER_A, ROUTER_B]
@@ -2,6 +2,7 @@
 Testes unitários para o agregador de DEXs
 """
 
+import asyncio
 import pytest
 from unittest.mock import Mock, AsyncMock, patch
 from decimal import Decimal
@@ -29,13 +30,15 @@ class TestDexAggregator:
         )
     
     @pytest.mark.asyncio
-    async def test_get_best_quote_success(self, dex_aggregator, mock_dex_quote):
+    async def test_get_best_quote_success(self, dex_aggregator, mock_dex_quote, mock_dex_config):
         """Testa obtenção de melhor cotação com sucesso"""
         token_in = "0x1111111111111111111111111111111111111111"
         token_out = "0x2222222222222222222222222222222222222222"
         amount_in = 1000000000000000000  # 1 ETH
+        dex_aggregator.dexes = [mock_dex_config]
         
-        with patch.object(dex_aggregator, '_get_dex_quote', return_value=mock_dex_quote):
+        with patch.object(dex_aggregator, '_get_block_number', AsyncMock(return_value=None)), \
+             patch.object(dex_aggregator, '_get_dex_quote', return_value=mock_dex_quote):
             with patch.object(dex_aggregator, '_select_best_quote') as mock_select:
                 mock_best = BestQuote(
                     dex_quote=mock_dex_quote,
@@ -62,6 +65,53 @@ class TestDexAggregator:
         
         assert result is None
     
+    @pytest.mark.asyncio
+    async def test_get_best_quote_early_exit(self, dex_aggregator, mock_dex_config):
+        """Testa que DEX pendente sem chance de superar a melhor cotação é cancelada"""
+        import asyncio
+        from config import DexConfig
+        
+        token_in = "0x1111111111111111111111111111111111111111"
+        token_out = "0x2222222222222222222222222222222222222222"
+        pair_address = "0x3333333333333333333333333333333333333333"
+        slow_dex = DexConfig(
+            name="SlowDEX",
+            factory="0x4444444444444444444444444444444444444444",
+            router="0x5555555555555555555555555555555555555555",
+            type="v2"
+        )
+        fast_quote = DexQuote(
+            dex_name="TestDEX",
+            dex_type=DexType.UNISWAP_V2,
+            router_address=mock_dex_config.router,
+            amount_out=960000000000000000,
+            price_impact=0.03,
+            gas_estimate=180000,
+            slippage=0.015,
+            liquidity=Decimal("3.0"),
+            is_available=True
+        )
+        
+        # Reservas do par lento já em cache no bloco: teto de score baixo
+        dex_aggregator.dexes = [mock_dex_config, slow_dex]
+        dex_aggregator._pair_cache[dex_aggregator._pair_key(slow_dex.factory, token_in, token_out)] = pair_address
+        dex_aggregator._reserves_cache[(pair_address.lower(), 100)] = (10**15, 10**15)
+        
+        async def fake_quote(dex_config, *args):
+            if dex_config.name == "SlowDEX":
+                await asyncio.sleep(10)
+            return fast_quote
+        
+        with patch.object(dex_aggregator, '_get_block_number', AsyncMock(return_value=100)), \
+             patch.object(dex_aggregator, '_get_dex_quote', side_effect=fake_quote), \
+             patch.object(dex_aggregator, '_get_current_gas_price', AsyncMock(return_value=20000000000)):
+            result = await asyncio.wait_for(
+                dex_aggregator.get_best_quote(token_in, token_out, 10**18, True), timeout=1
+            )
+        
+        assert result is not None
+        assert result.dex_quote is fast_quote
+    
     @pytest.mark.asyncio
     async def test_get_v2_quote_success(self, dex_aggregator, mock_dex_config):
         """Testa cotação V2 com sucesso"""
@@ -69,22 +119,31 @@ class TestDexAggregator:
         token_out = "0x2222222222222222222222222222222222222222"
         amount_in = 1000000000000000000
         
-        # Mock do contrato do router
-        mock_router = Mock()
-        mock_router.functions.getAmountsOut.return_value.call.return_value = [
-            amount_in, 950000000000000000  # 0.95 ETH out
-        ]
+        from eth_abi import encode
         
-        with patch.object(dex_aggregator.w3.eth, 'contract', return_value=mock_router):
-            with patch.object(dex_aggregator, '_calculate_price_impact_v2', return_value=0.05):
+        # getAmountsOut + getPair saem em um único aggregate3
+        mock_aggregate3 = AsyncMock(return_value=[
+            (True, encode(["uint256[]"], [[amount_in, 950000000000000000]])),  # 0.95 ETH out
+            (True, encode(["address"], ["0x3333333333333333333333333333333333333333"])),
+        ])
+        # getReserves do par vai pelo lote JSON-RPC
+        mock_eth_call = AsyncMock(return_value=encode(
+            ["uint112", "uint112", "uint32"], [10000000000000000000, 10000000000000000000, 0]
+        ))
+        
+        with patch.object(dex_aggregator, '_aggregate3', mock_aggregate3):
+            with patch.object(dex_aggregator.rpc_batch, 'eth_call', mock_eth_call):
                 with patch.object(dex_aggregator, '_estimate_swap_gas_v2', return_value=200000):
-                    with patch.object(dex_aggregator, '_get_pair_liquidity_v2', return_value=Decimal("2.0")):
-                        quote = await dex_aggregator._get_v2_quote(mock_dex_config, token_in, token_out, amount_in, True)
+                    quote = await dex_aggregator._get_v2_quote(mock_dex_config, token_in, token_out, amount_in, True)
         
         assert quote.dex_name == "TestDEX"
         assert quote.dex_type == DexType.UNISWAP_V2
         assert quote.amount_out == 950000000000000000
         assert quote.is_available == True
+        assert 0 <= quote.price_impact <= 1.0
+        mock_aggregate3.assert_called_once()
+        assert len(mock_aggregate3.call_args[0][0]) == 2
+        mock_eth_call.assert_called_once()
     
     @pytest.mark.asyncio
     async def test_get_v2_quote_failure(self, dex_aggregator, mock_dex_config):
@@ -93,11 +152,14 @@ class TestDexAggregator:
         token_out = "0x2222222222222222222222222222222222222222"
         amount_in = 1000000000000000000
         
-        with patch.object(dex_aggregator.w3.eth, 'contract', side_effect=Exception("Contract error")):
-            quote = await dex_aggregator._get_v2_quote(mock_dex_config, token_in, token_out, amount_in, True)
+        mock_aggregate3 = AsyncMock(side_effect=Exception("Contract error"))
+        
+        with patch.object(dex_aggregator, '_aggregate3', mock_aggregate3):
+            quote = await dex_aggregator._get_dex_quote(mock_dex_config, token_in, token_out, amount_in, True)
         
         assert quote.is_available == False
         assert quote.error == "Contract error"
+        mock_aggregate3.assert_called_once()
     
     @pytest.mark.asyncio
     async def test_calculate_price_impact_v2(self, dex_aggregator, mock_dex_config):
@@ -190,18 +252,51 @@ class TestDexAggregator:
         
         assert 0 <= score <= 1.0
     
+    @pytest.mark.asyncio
+    async def test_select_best_quote_score_matches_scalar(self, dex_aggregator, mock_dex_quote):
+        """Score vetorizado deve bater com _calculate_efficiency_score"""
+        with patch.object(dex_aggregator, '_get_current_gas_price', return_value=20000000000):
+            best = await dex_aggregator._select_best_quote([mock_dex_quote], True)
+        
+        expected = dex_aggregator._calculate_efficiency_score(mock_dex_quote, best.net_amount, best.total_cost)
+        assert best.efficiency_score == pytest.approx(expected)
+    
     @pytest.mark.asyncio
     async def test_get_current_gas_price_cached(self, dex_aggregator):
         """Testa cache do preço de gas"""
+        def gas_price(value):
+            # AsyncEth.gas_price é uma propriedade aguardável
+            future = asyncio.get_running_loop().create_future()
+            future.set_result(value)
+            return future
+        
         # Primeiro call
-        with patch.object(dex_aggregator.w3.eth, 'gas_price', 20000000000):
+        with patch.object(dex_aggregator, 'w3') as mock_w3:
+            mock_w3.eth.gas_price = gas_price(20000000000)
             price1 = await dex_aggregator._get_current_gas_price()
-        
-        # Segundo call (deve usar cache)
-        with patch.object(dex_aggregator.w3.eth, 'gas_price', 30000000000):
+            
+            # Segundo call (deve usar cache)
+            mock_w3.eth.gas_price = gas_price(30000000000)
             price2 = await dex_aggregator._get_current_gas_price()
+        await dex_aggregator.close()
+        
+        assert price1 == price2 == 22000000000  # Usou cache (+10% de buffer)
+    
+    @pytest.mark.asyncio
+    async def test_close_cancels_gas_poller(self, dex_aggregator):
+        """Testa que close() encerra o poller de gas"""
+        async def refresh():
+            dex_aggregator._gas_price = 20000000000
+        
+        with patch.object(dex_aggregator, '_refresh_gas_price', AsyncMock(side_effect=refresh)):
+            await dex_aggregator._get_current_gas_price()
+        task = dex_aggregator._gas_task
+        assert task is not None and not task.done()
+        
+        await dex_aggregator.close()
         
-        assert price1 == price2  # Usou cache
+        assert task.cancelled()
+        assert dex_aggregator._gas_task is None
     
     @pytest.mark.asyncio
     async def test_get_pair_address_v2_success(self, dex_aggregator, mock_dex_config):
@@ -210,11 +305,11 @@ class TestDexAggregator:
         token_out = "0x2222222222222222222222222222222222222222"
         pair_address = "0x3333333333333333333333333333333333333333"
         
-        # Mock da factory
-        mock_factory = Mock()
-        mock_factory.functions.getPair.return_value.call.return_value = pair_address
+        # Mock do retorno de getPair no lote JSON-RPC
+        from eth_abi import encode
+        mock_eth_call = AsyncMock(return_value=encode(["address"], [pair_address]))
         
-        with patch.object(dex_aggregator.w3.eth, 'contract', return_value=mock_factory):
+        with patch.object(dex_aggregator.rpc_batch, 'eth_call', mock_eth_call):
             result = await dex_aggregator._get_pair_address_v2(mock_dex_config, token_in, token_out)
         
         assert result == pair_address
@@ -226,13 +321,129 @@ class TestDexAggregator:
         token_out = "0x2222222222222222222222222222222222222222"
         
         # Mock da factory retornando endereço zero
-        mock_factory = Mock()
-        mock_factory.functions.getPair.return_value.call.return_value = "0x0000000000000000000000000000000000000000"
+        from eth_abi import encode
+        mock_eth_call = AsyncMock(return_value=encode(["address"], ["0x0000000000000000000000000000000000000000"]))
         
-        with patch.object(dex_aggregator.w3.eth, 'contract', return_value=mock_factory):
+        with patch.object(dex_aggregator.rpc_batch, 'eth_call', mock_eth_call):
             result = await dex_aggregator._get_pair_address_v2(mock_dex_config, token_in, token_out)
         
         assert result is None
+    
+    @pytest.mark.asyncio
+    async def test_get_pair_address_v2_cached(self, dex_aggregator, mock_dex_config):
+        """Testa que o endereço do par é lido da factory só uma vez"""
+        token_in = "0x1111111111111111111111111111111111111111"
+        token_out = "0x2222222222222222222222222222222222222222"
+        pair_address = "0x3333333333333333333333333333333333333333"
+        
+        from eth_abi import encode
+        mock_eth_call = AsyncMock(return_value=encode(["address"], [pair_address]))
+        
+        with patch.object(dex_aggregator.rpc_batch, 'eth_call', mock_eth_call):
+            first = await dex_aggregator._get_pair_address_v2(mock_dex_config, token_in, token_out)
+            second = await dex_aggregator._get_pair_address_v2(mock_dex_config, token_out, token_in)
+        
+        assert first == second == pair_address
+        mock_eth_call.assert_called_once()
+    
+    @pytest.mark.asyncio
+    async def test_get_pair_address_v2_singleflight(self, dex_aggregator, mock_dex_config):
+        """Testa que leituras idênticas concorrentes compartilham um único eth_call"""
+        import asyncio
+        from eth_abi import encode
+        
+        token_in = "0x1111111111111111111111111111111111111111"
+        token_out = "0x2222222222222222222222222222222222222222"
+        pair_address = "0x3333333333333333333333333333333333333333"
+        mock_eth_call = AsyncMock(return_value=encode(["address"], [pair_address]))
+        
+        with patch.object(dex_aggregator.rpc_batch, 'eth_call', mock_eth_call):
+            results = await asyncio.gather(*[
+                dex_aggregator._get_pair_address_v2(mock_dex_config, token_in, token_out)
+                for _ in range(5)
+            ])
+        
+        assert results == [pair_address] * 5
+        mock_eth_call.assert_called_once()
+    
+    @pytest.mark.asyncio
+    async def test_get_pair_address_v2_from_l2(self, dex_aggregator, mock_dex_config):
+        """Testa que par já gravado no cache L2 por outro processo dispensa o RPC"""
+        token_in = "0x1111111111111111111111111111111111111111"
+        token_out = "0x2222222222222222222222222222222222222222"
+        pair_address = "0x3333333333333333333333333333333333333333"
+        mock_l2 = Mock(enabled=True, get=AsyncMock(return_value=pair_address), set=AsyncMock())
+        mock_eth_call = AsyncMock()
+        
+        with patch.object(dex_aggregator, 'l2', mock_l2), \
+             patch.object(dex_aggregator.rpc_batch, 'eth_call', mock_eth_call):
+            result = await dex_aggregator._get_pair_address_v2(mock_dex_config, token_in, token_out)
+        
+        assert result == pair_address
+        mock_eth_call.assert_not_called()
+        mock_l2.get.assert_called_once_with(
+            f"pair:{mock_dex_config.factory.lower()}:{token_in}:{token_out}"
+        )
+    
+    def test_compute_pair_address_v2_create2(self):
+        """Testa cálculo local do par V2 (USDC/WETH da Uniswap V2 na mainnet)"""
+        from dex_aggregator import compute_pair_address_v2
+        
+        pair = compute_pair_address_v2(
+            "0x5C69bEe701ef814a2B6a3EDD4B1652CB9cc5aA6f",
+            "0xC02aaA39b223FE8D0A0e5C4F27eAD9083C756Cc2",
+            "0xA0b86991c6218b36c1d19D4a2e9Eb0cE3606eB48",
+            "0x96e8ac4277198ff8b6f785478aa9a39f403cb768dd02cbee326c3e7da348845f"
+        )
+        
+        assert pair == "0xB4e16d0168e52d35CaCD2c6185b44281Ec28C9Dc"
+    
+    def test_compute_pool_address_v3_create2(self):
+        """Testa cálculo local da pool V3 (USDC/WETH 0.05% da Uniswap V3 na mainnet)"""
+        from dex_aggregator import compute_pool_address_v3
+        
+        pool = compute_pool_address_v3(
+            "0x1F98431c8aD98523631AE4a59f267346ea31F984",
+            "0xC02aaA39b223FE8D0A0e5C4F27eAD9083C756Cc2",
+            "0xA0b86991c6218b36c1d19D4a2e9Eb0cE3606eB48",
+            500,
+            "0xe34f199b19b2b4f47f68442619d555527d244f78a3297ea89325f843f87b8b54"
+        )
+        
+        assert pool == "0x88e6A0c2dDD26FEEb64F039a2c41296FcB3f5640"
+    
+    def test_spot_price_from_sqrt_price_x96(self):
+        """Testa conversão do sqrtPriceX96 nos dois sentidos do par"""
+        from dex_aggregator import spot_price_from_sqrt_price_x96
+        
+        token0 = "0x1111111111111111111111111111111111111111"
+        token1 = "0x2222222222222222222222222222222222222222"
+        sqrt_price_x96 = 2 * 2**96  # token1/token0 = 4
+        
+        assert spot_price_from_sqrt_price_x96(sqrt_price_x96, token0, token1) == pytest.approx(4.0)
+        assert spot_price_from_sqrt_price_x96(sqrt_price_x96, token1, token0) == pytest.approx(0.25)
+    
+    @pytest.mark.asyncio
+    async def test_batch_get_prices_multicall(self, dex_aggregator, mock_dex_config):
+        """Testa cotação em lote via Multicall3"""
+        from eth_abi import encode
+        
+        token_a = "0x1111111111111111111111111111111111111111"
+        token_b = "0x2222222222222222222222222222222222222222"
+        weth = "0x4200000000000000000000000000000000000006"
+        
+        mock_aggregate3 = AsyncMock(return_value=[
+            (True, encode(["uint256[]"], [[10**18, 2 * 10**15]])),
+            (False, b""),
+        ])
+        
+        dex_aggregator.dexes = [mock_dex_config]
+        with patch.object(dex_aggregator, '_aggregate3', mock_aggregate3):
+            prices = await dex_aggregator.batch_get_prices([token_a, token_b], weth)
+        
+        assert prices == {token_a: 0.002}
+        mock_aggregate3.assert_called_once()
+        assert len(mock_aggregate3.call_args[0][0]) == 2
 
 
 @pytest.mark.asyncio
@@ -254,6 +465,25 @@ async def test_get_best_price_function():
         mock_aggregator.get_best_quote.assert_called_once_with(token_in, token_out, amount_in, True)
 
 
+def test_fill_sell_calldata():
+    """Testa preenchimento do template de venda pré-codificado"""
+    from dex_aggregator import encode_sell_template, fill_sell_calldata
+    
+    token = "0x1111111111111111111111111111111111111111"
+    weth = "0x4200000000000000000000000000000000000006"
+    wallet = "0x2222222222222222222222222222222222222222"
+    
+    template = encode_sell_template(token, weth, wallet)
+    calldata = fill_sell_calldata(template, 10**18, 5 * 10**17, 1700000000)
+    
+    assert len(calldata) == len(template)
+    assert calldata[:4] == template[:4]
+    assert int.from_bytes(calldata[4:36], "big") == 10**18
+    assert int.from_bytes(calldata[36:68], "big") == 5 * 10**17
+    assert int.from_bytes(calldata[132:164], "big") == 1700000000
+    assert calldata[164:] == template[164:]
+
+
 @pytest.mark.asyncio
 async def test_execute_best_trade_function():
     """Testa função de execução de melhor trade"""
@@ -267,11 +497,15 @@ async def test_execute_best_trade_function():
     mock_quote.dex_quote.dex_name = "TestDEX"
     mock_quote.net_amount = 950000000000000000
     
-    with patch('dex_aggregator.get_best_price', return_value=mock_quote):
-        with patch('dex_aggregator.execute_trade') as mock_execute:
+    template = b"\x00" * 4
+    
+    with patch.dict('config.config', {"RPC_URL": "http://localhost:8545"}), \
+         patch('dex_aggregator.get_best_price', return_value=mock_quote):
+        with patch('trade_executor_advanced.execute_trade') as mock_execute:
             mock_execute.return_value = {"success": True, "tx_hash": "0xabc123"}
             
-            result = await execute_best_trade(token_in, token_out, amount_in, True)
+            result = await execute_best_trade(token_in, token_out, amount_in, True, calldata_template=template)
     
     assert result["success"] == True
-    assert "tx_hash" in result
\ No newline at end of file
+    assert "tx_hash" in result
+    assert mock_execute.call_args.kwargs["sell_template"] is template
\ No newline at end of file
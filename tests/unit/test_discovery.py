@@ -0,0 +1,52 @@
+"""
+Testes unitários para a descoberta de novos pares
+"""
+
+import pytest
+from decimal import Decimal
+from unittest.mock import Mock
+
+from discovery import SniperDiscovery, DexInfo, LOGS_RANGE_MIN
+
+
+def _discovery(web3):
+    dex = DexInfo("TestDEX", "0x" + "aa" * 20, "0x" + "bb" * 20, "v2")
+    return SniperDiscovery(web3, [dex], [], Decimal("0.1"), 1, Mock(), Mock())
+
+
+def test_poll_once_backs_off_on_persistent_error(mock_web3):
+    """Testa que o erro repetido na janela mínima não vira loop sem espera"""
+    mock_web3.eth.block_number = 10_000
+    discovery = _discovery(mock_web3)
+    discovery._last_block = 0
+    mock_web3.eth.get_logs.side_effect = ValueError("rate limited")
+    
+    calls = 0
+    while discovery._poll_once():
+        calls += 1
+        assert calls < 100
+    
+    assert discovery._max_range == LOGS_RANGE_MIN
+    assert discovery._last_block == 0
+    assert mock_web3.eth.get_logs.call_count == calls + 1
+
+
+def test_stop_shuts_down_liq_pool(mock_web3):
+    """Testa que stop() encerra o pool da checagem de liquidez"""
+    discovery = _discovery(mock_web3)
+    pool = discovery._liq_pool
+    
+    discovery.stop()
+    
+    assert discovery._liq_pool is None
+    with pytest.raises(RuntimeError):
+        pool.submit(int)
+
+
+def test_liquidity_fallback_abis_are_callable():
+    """Testa que os ABIs do fallback par a par têm as funções usadas"""
+    from discovery import RESERVES_V2_ABI, ERC20_DECIMALS_ABI
+    
+    assert RESERVES_V2_ABI[0]["name"] == "getReserves"
+    assert len(RESERVES_V2_ABI[0]["outputs"]) == 3
+    assert ERC20_DECIMALS_ABI[0]["name"] == "decimals"
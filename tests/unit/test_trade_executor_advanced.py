@@ -0,0 +1,59 @@
+"""
+Testes unitários para o executor de trades avançado
+"""
+
+import pytest
+from unittest.mock import Mock, AsyncMock, patch
+
+from config import config
+from dex_aggregator import encode_sell_template
+
+
+TOKEN = "0x1111111111111111111111111111111111111111"
+WETH = "0x4200000000000000000000000000000000000006"
+WALLET = "0x2222222222222222222222222222222222222222"
+ROUTER = "0x3333333333333333333333333333333333333333"
+
+
+@pytest.fixture
+def executor():
+    """Executor global (o import monta o provider a partir de RPC_URL)"""
+    with patch.dict(config, {"RPC_URL": "http://localhost:8545"}):
+        import trade_executor_advanced
+    return trade_executor_advanced.trade_executor
+
+
+@pytest.mark.asyncio
+async def test_v2_sell_signs_precoded_calldata(executor):
+    """Testa que a venda para ETH envia o template completado, sem montar via Contract"""
+    template = encode_sell_template(TOKEN, WETH, WALLET)
+    dex_quote = Mock(router_address=ROUTER, dex_name="TestDEX")
+    
+    with patch.dict(config, {"WETH": WETH}), \
+         patch.object(executor, '_send_calldata', AsyncMock(return_value="sent")) as mock_send:
+        result = await executor._execute_v2_trade(
+            dex_quote, TOKEN, WETH, 10**18, 5 * 10**17, False, 300, template
+        )
+    
+    assert result == "sent"
+    to, calldata, dex_name = mock_send.call_args[0]
+    assert to == ROUTER
+    assert dex_name == "TestDEX"
+    assert calldata[:4] == template[:4]
+    assert int.from_bytes(calldata[4:36], "big") == 10**18
+    assert int.from_bytes(calldata[36:68], "big") == 5 * 10**17
+    assert calldata[164:] == template[164:]
+
+
+@pytest.mark.asyncio
+async def test_v2_sell_without_template_builds_contract_call(executor):
+    """Testa que sem template a venda segue pelo caminho do Contract"""
+    dex_quote = Mock(router_address=ROUTER, dex_name="TestDEX")
+    
+    with patch.dict(config, {"WETH": WETH}), \
+         patch.object(executor, '_send_calldata', AsyncMock()) as mock_calldata, \
+         patch.object(executor, '_send_transaction', AsyncMock(return_value="sent")) as mock_send:
+        await executor._execute_v2_trade(dex_quote, TOKEN, WETH, 10**18, 5 * 10**17, False, 300)
+    
+    mock_calldata.assert_not_called()
+    mock_send.assert_called_once()
@@ -16,6 +16,8 @@ except ImportError:
     Web3 = None
     BadFunctionCallOutput = Exception
 
+from check_balance import invalidate_balance
+
 logger = logging.getLogger(__name__)
 
 # ABI mínimo para ler decimals de tokens ERC20
@@ -163,6 +165,8 @@ class TradeExecutor:
                 amount_out_min=amount_out_min
             )
             tx_hex = txh.hex() if hasattr(txh, "hex") else str(txh)
+            invalidate_balance(token_in)
+            invalidate_balance(token_out)
             logger.info(f"Compra enviada {token_in}->{token_out}, ETH={amount_eth} → TX {tx_hex}")
             return tx_hex
         except Exception as e:
@@ -204,6 +208,8 @@ class TradeExecutor:
                 amount_out_min=amount_out_min
             )
             tx_hex = txh.hex() if hasattr(txh, "hex") else str(txh)
+            invalidate_balance(token_in)
+            invalidate_balance(token_out)
             logger.info(f"Venda enviada {token_in}->{token_out}, tokens={amount_tokens} → TX {tx_hex}")
             return tx_hex
         except Exception as e:
@@ -15,8 +15,8 @@ from eth_account import Account
 from eth_utils import to_checksum_address
 
 from config import config
-from dex_aggregator import get_best_price, BestQuote
-from utils import get_wallet_balance
+from dex_aggregator import get_best_price, BestQuote, fill_sell_calldata
+from utils import get_wallet_balance, http_provider
 
 logger = logging.getLogger(__name__)
 
@@ -37,7 +37,7 @@ class TradeExecutor:
     """Executor de trades avançado"""
     
     def __init__(self):
-        self.w3 = Web3(Web3.HTTPProvider(config["RPC_URL"]))
+        self.w3 = Web3(http_provider())
         self.account = Account.from_key(config["PRIVATE_KEY"])
         self.wallet_address = config["WALLET"]
         
@@ -61,7 +61,8 @@ class TradeExecutor:
         amount_in: int,
         is_buy: bool,
         max_slippage: Optional[float] = None,
-        deadline_seconds: int = 300
+        deadline_seconds: int = 300,
+        sell_template: Optional[bytes] = None
     ) -> TradeResult:
         """Executa trade otimizado"""
         
@@ -114,7 +115,8 @@ class TradeExecutor:
                 amount_in=amount_in,
                 min_amount_out=min_amount_out,
                 is_buy=is_buy,
-                deadline_seconds=deadline_seconds
+                deadline_seconds=deadline_seconds,
+                sell_template=sell_template
             )
             
             result.execution_time = time.time() - start_time
@@ -148,7 +150,8 @@ class TradeExecutor:
         amount_in: int,
         min_amount_out: int,
         is_buy: bool,
-        deadline_seconds: int
+        deadline_seconds: int,
+        sell_template: Optional[bytes] = None
     ) -> TradeResult:
         """Executa trade em uma DEX específica"""
         
@@ -159,7 +162,8 @@ class TradeExecutor:
             # Seleciona método baseado no tipo da DEX
             if dex_quote.dex_type.value == "v2":
                 return await self._execute_v2_trade(
-                    dex_quote, token_in, token_out, amount_in, min_amount_out, is_buy, deadline_seconds
+                    dex_quote, token_in, token_out, amount_in, min_amount_out, is_buy, deadline_seconds,
+                    sell_template
                 )
             elif dex_quote.dex_type.value == "v3":
                 return await self._execute_v3_trade(
@@ -190,7 +194,8 @@ class TradeExecutor:
         amount_in: int,
         min_amount_out: int,
         is_buy: bool,
-        deadline_seconds: int
+        deadline_seconds: int,
+        sell_template: Optional[bytes] = None
     ) -> TradeResult:
         """Executa trade em DEX V2 (Uniswap V2 style)"""
         
@@ -254,6 +259,10 @@ class TradeExecutor:
                 min_amount_out, path, self.wallet_address, deadline
             )
             value = amount_in
+        elif not is_buy and token_out.lower() == weth and sell_template:
+            # Venda para ETH com calldata pré-codificado na abertura da posição
+            calldata = fill_sell_calldata(sell_template, amount_in, min_amount_out, deadline)
+            return await self._send_calldata(router.address, calldata, dex_quote.dex_name)
         elif not is_buy and token_out.lower() == weth:
             # Venda para ETH
             function = router.functions.swapExactTokensForETH(
@@ -320,46 +329,44 @@ class TradeExecutor:
                 'nonce': nonce
             })
             
-            # Assina transação
-            signed_txn = self.account.sign_transaction(transaction)
+            return await self._sign_and_confirm(transaction, gas_price, dex_name)
             
-            # Envia transação
-            tx_hash = self.w3.eth.send_raw_transaction(signed_txn.rawTransaction)
+        except Exception as e:
+            logger.error(f"❌ Erro enviando transação: {e}")
+            return TradeResult(
+                success=False,
+                tx_hash=None,
+                amount_out=0,
+                gas_used=0,
+                gas_price=0,
+                total_cost=Decimal("0"),
+                execution_time=0,
+                dex_used=dex_name,
+                error=str(e)
+            )
             
-            logger.info(f"📤 Transação enviada: {tx_hash.hex()}")
+    async def _send_calldata(self, to: str, calldata: bytes, dex_name: str, value: int = 0) -> TradeResult:
+        """Envia transação com calldata já codificado (sem objeto Contract)"""
+        
+        try:
+            nonce = await self._get_nonce()
+            transaction = {
+                'from': self.wallet_address,
+                'to': to,
+                'data': calldata,
+                'value': value,
+                'nonce': nonce,
+                'chainId': self.w3.eth.chain_id
+            }
             
-            # Aguarda confirmação
-            receipt = self.w3.eth.wait_for_transaction_receipt(tx_hash, timeout=300)
+            # Estima gas com buffer
+            transaction['gas'] = int(self.w3.eth.estimate_gas(transaction) * self.gas_multiplier)
+            
+            gas_price = await self._get_optimal_gas_price()
+            transaction['gasPrice'] = gas_price
+            
+            return await self._sign_and_confirm(transaction, gas_price, dex_name)
             
-            if receipt.status == 1:
-                # Calcula amount_out dos logs
-                amount_out = self._extract_amount_out_from_logs(receipt.logs)
-                
-                total_cost = Decimal(str((receipt.gasUsed * gas_price) / 1e18))
-                
-                return TradeResult(
-                    success=True,
-                    tx_hash=tx_hash.hex(),
-                    amount_out=amount_out,
-                    gas_used=receipt.gasUsed,
-                    gas_price=gas_price,
-                    total_cost=total_cost,
-                    execution_time=0,
-                    dex_used=dex_name
-                )
-            else:
-                return TradeResult(
-                    success=False,
-                    tx_hash=tx_hash.hex(),
-                    amount_out=0,
-                    gas_used=receipt.gasUsed,
-                    gas_price=gas_price,
-                    total_cost=Decimal(str((receipt.gasUsed * gas_price) / 1e18)),
-                    execution_time=0,
-                    dex_used=dex_name,
-                    error="Transação revertida"
-                )
-                
         except Exception as e:
             logger.error(f"❌ Erro enviando transação: {e}")
             return TradeResult(
@@ -374,6 +381,49 @@ class TradeExecutor:
                 error=str(e)
             )
             
+    async def _sign_and_confirm(self, transaction: dict, gas_price: int, dex_name: str) -> TradeResult:
+        """Assina, envia e aguarda o recibo da transação"""
+        
+        # Assina transação
+        signed_txn = self.account.sign_transaction(transaction)
+        
+        # Envia transação
+        tx_hash = self.w3.eth.send_raw_transaction(signed_txn.rawTransaction)
+        
+        logger.info(f"📤 Transação enviada: {tx_hash.hex()}")
+        
+        # Aguarda confirmação
+        receipt = self.w3.eth.wait_for_transaction_receipt(tx_hash, timeout=300)
+        
+        if receipt.status == 1:
+            # Calcula amount_out dos logs
+            amount_out = self._extract_amount_out_from_logs(receipt.logs)
+            
+            total_cost = Decimal(str((receipt.gasUsed * gas_price) / 1e18))
+            
+            return TradeResult(
+                success=True,
+                tx_hash=tx_hash.hex(),
+                amount_out=amount_out,
+                gas_used=receipt.gasUsed,
+                gas_price=gas_price,
+                total_cost=total_cost,
+                execution_time=0,
+                dex_used=dex_name
+            )
+        else:
+            return TradeResult(
+                success=False,
+                tx_hash=tx_hash.hex(),
+                amount_out=0,
+                gas_used=receipt.gasUsed,
+                gas_price=gas_price,
+                total_cost=Decimal(str((receipt.gasUsed * gas_price) / 1e18)),
+                execution_time=0,
+                dex_used=dex_name,
+                error="Transação revertida"
+            )
+            
     async def _get_nonce(self) -> int:
         """Obtém nonce otimizado com cache"""
         current_time = time.time()
@@ -456,7 +506,8 @@ async def execute_trade(
     token_out: str,
     amount_in: int,
     min_amount_out: int,
-    is_buy: bool
+    is_buy: bool,
+    sell_template: Optional[bytes] = None
 ) -> dict:
     """Função principal para executar trades"""
     
@@ -464,7 +515,8 @@ async def execute_trade(
         token_in=token_in,
         token_out=token_out,
         amount_in=amount_in,
-        is_buy=is_buy
+        is_buy=is_buy,
+        sell_template=sell_template
     )
     
     return {
@@ -2,25 +2,323 @@
 
 import os
 import re
+import json
+import asyncio
 import time
+import functools
 import logging
 import requests
+from requests.adapters import HTTPAdapter
 from collections import deque
 from datetime import datetime, timezone, timedelta
 from decimal import Decimal
+from pathlib import Path
 from typing import Any, Callable, Deque, Dict, List, Optional, Union
 
 logger = logging.getLogger(__name__)
 
 try:
-    from web3 import Web3
+    from web3 import Web3, AsyncWeb3, AsyncHTTPProvider
     from web3.exceptions import BadFunctionCallOutput, ABIFunctionNotFound, ContractLogicError
     WEB3_AVAILABLE = True
 except ImportError:
     WEB3_AVAILABLE = False
     logger.warning("Web3 não disponível - funcionalidades blockchain limitadas")
 
-from config import config
+# aiohttp é opcional: sem ele o RpcBatcher envia o lote pela sessão requests numa thread
+try:
+    import aiohttp
+    AIOHTTP_AVAILABLE = True
+except ImportError:
+    AIOHTTP_AVAILABLE = False
+
+# httpx é opcional: cliente compartilhado com keep-alive e HTTP/2 (multiplexa RPCs numa conexão)
+try:
+    import httpx
+    HTTPX_AVAILABLE = True
+except ImportError:
+    HTTPX_AVAILABLE = False
+
+# HTTP/2 no httpx depende do pacote h2 (httpx[http2])
+try:
+    import h2  # noqa: F401
+    HTTP2_AVAILABLE = True
+except ImportError:
+    HTTP2_AVAILABLE = False
+
+# orjson é opcional: parse de JSON 2-5x mais rápido que o json da stdlib
+try:
+    import orjson
+    ORJSON_AVAILABLE = True
+except ImportError:
+    ORJSON_AVAILABLE = False
+
+# Numba é opcional: sem ele os kernels rodam como Python/NumPy puro
+try:
+    from numba import njit, prange
+    NUMBA_AVAILABLE = True
+except ImportError:
+    NUMBA_AVAILABLE = False
+    prange = range
+
+    def njit(*args, **kwargs):
+        """Fallback sem numba: retorna a função Python/NumPy original"""
+        if len(args) == 1 and callable(args[0]) and not kwargs:
+            return args[0]
+        return lambda func: func
+
+from config import config, _cs  # checksum memoizado, compartilhado com load_dexes
+
+# Sessão HTTP única para todos os providers Web3: reaproveita conexões keep-alive
+# (evita um handshake TCP+TLS por cliente/chamada)
+SHARED_SESSION = requests.Session()
+_SHARED_ADAPTER = HTTPAdapter(pool_connections=8, pool_maxsize=32, pool_block=False)
+SHARED_SESSION.mount("https://", _SHARED_ADAPTER)
+SHARED_SESSION.mount("http://", _SHARED_ADAPTER)
+
+# Multicall3 (mesmo endereço em todas as redes EVM)
+MULTICALL3 = "0xcA11bde05977b3631167028862bE2a173976CA11"
+MULTICALL3_ABI = [
+    {
+        "name": "aggregate", "type": "function", "stateMutability": "payable",
+        "inputs": [{"name": "calls", "type": "tuple[]", "components": [
+            {"name": "target", "type": "address"},
+            {"name": "callData", "type": "bytes"}
+        ]}],
+        "outputs": [{"name": "blockNumber", "type": "uint256"}, {"name": "returnData", "type": "bytes[]"}]
+    },
+    {
+        "name": "tryAggregate", "type": "function", "stateMutability": "payable",
+        "inputs": [
+            {"name": "requireSuccess", "type": "bool"},
+            {"name": "calls", "type": "tuple[]", "components": [
+                {"name": "target", "type": "address"},
+                {"name": "callData", "type": "bytes"}
+            ]}
+        ],
+        "outputs": [{"name": "returnData", "type": "tuple[]", "components": [
+            {"name": "success", "type": "bool"},
+            {"name": "returnData", "type": "bytes"}
+        ]}]
+    },
+    {
+        "name": "getEthBalance", "type": "function", "stateMutability": "view",
+        "inputs": [{"name": "addr", "type": "address"}],
+        "outputs": [{"name": "balance", "type": "uint256"}]
+    }
+]
+
+ABIS_DIR = Path(__file__).parent / "abis"
+
+@functools.lru_cache(maxsize=None)
+def load_abi(name: str) -> List[dict]:
+    """
+    ABI de abis/<name>.json, lida e parseada uma única vez no primeiro uso
+    (importar um módulo que usa ABIs não faz I/O).
+    """
+    data = (ABIS_DIR / f"{name}.json").read_bytes()
+    return orjson.loads(data) if ORJSON_AVAILABLE else json.loads(data)
+
+_ADDR_RE = re.compile(r"^0x[0-9a-fA-F]{40}$")
+
+def to_checksum(addr: str) -> str:
+    """
+    Endereço no formato EIP-55, com o keccak memoizado por endereço.
+    """
+    if not isinstance(addr, str) or not _ADDR_RE.match(addr):
+        raise ValueError(f"Endereço inválido: {addr}")
+    return _cs(addr.lower())
+
+def http_provider(rpc_url: Optional[str] = None):
+    """
+    Cria um HTTPProvider do Web3 usando a sessão HTTP compartilhada.
+    """
+    return Web3.HTTPProvider(rpc_url or config["RPC_URL"], session=SHARED_SESSION)
+
+HTTPX_CONNECT_TIMEOUT = 3.0
+HTTPX_MAX_KEEPALIVE = 64
+
+_httpx_client = None
+_httpx_loop = None
+
+def shared_httpx_client():
+    """
+    Cliente httpx único do processo (HTTP/2 quando o h2 está instalado).
+    Como as conexões ficam presas ao event loop, é recriado se o loop mudar.
+    """
+    global _httpx_client, _httpx_loop
+    loop = asyncio.get_running_loop()
+    if _httpx_client is None or _httpx_client.is_closed or _httpx_loop is not loop:
+        _httpx_client = httpx.AsyncClient(
+            http2=HTTP2_AVAILABLE,
+            verify=True,
+            timeout=httpx.Timeout(10.0, connect=HTTPX_CONNECT_TIMEOUT),
+            limits=httpx.Limits(max_keepalive_connections=HTTPX_MAX_KEEPALIVE),
+        )
+        _httpx_loop = loop
+    return _httpx_client
+
+if WEB3_AVAILABLE and HTTPX_AVAILABLE:
+    class HttpxAsyncHTTPProvider(AsyncHTTPProvider):
+        """AsyncHTTPProvider que envia as requisições pelo cliente httpx compartilhado"""
+
+        def __init__(self, endpoint_uri: str, timeout: float = 10.0):
+            super().__init__(endpoint_uri)
+            self.timeout = httpx.Timeout(timeout, connect=HTTPX_CONNECT_TIMEOUT)
+
+        async def make_request(self, method, params):
+            request_data = self.encode_rpc_request(method, params)
+            resp = await shared_httpx_client().post(
+                self.endpoint_uri,
+                content=request_data,
+                headers=self.get_request_headers(),
+                timeout=self.timeout,
+            )
+            resp.raise_for_status()
+            return self.decode_rpc_response(resp.content)
+
+def async_http_provider(rpc_url: Optional[str] = None, timeout: float = 10.0):
+    """
+    Cria um AsyncHTTPProvider do Web3 com timeout por requisição.
+    Com httpx, todos os providers dividem um cliente keep-alive/HTTP/2 (sem
+    handshake TLS por requisição); senão o web3 reaproveita uma sessão
+    aiohttp por endpoint.
+    """
+    if WEB3_AVAILABLE and HTTPX_AVAILABLE:
+        return HttpxAsyncHTTPProvider(rpc_url or config["RPC_URL"], timeout=timeout)
+    return AsyncHTTPProvider(rpc_url or config["RPC_URL"], request_kwargs={"timeout": timeout})
+
+@functools.lru_cache(maxsize=1)
+def shared_async_web3():
+    """AsyncWeb3 do processo sobre o provider compartilhado (BASE_RPC_URL)"""
+    return AsyncWeb3(async_http_provider(config["BASE_RPC_URL"]))
+
+def batch_rpc(
+    calls: List[tuple],
+    rpc_url: Optional[str] = None,
+    timeout: float = 10.0
+) -> List[Any]:
+    """
+    Envia várias chamadas (method, params) num único POST JSON-RPC em lote.
+    Retorna o `result` de cada resposta na mesma ordem (None se a chamada falhou).
+    """
+    payload = [
+        {"jsonrpc": "2.0", "id": i, "method": method, "params": params}
+        for i, (method, params) in enumerate(calls)
+    ]
+    resp = SHARED_SESSION.post(rpc_url or config["RPC_URL"], json=payload, timeout=timeout)
+    resp.raise_for_status()
+    return _map_batch_results(resp.json(), len(calls))
+
+def _map_batch_results(body: Any, size: int) -> List[Any]:
+    """Reordena as respostas de um lote JSON-RPC pelo `id` de cada chamada"""
+    if not isinstance(body, list):
+        # Nó sem suporte a lote responde com um único objeto de erro
+        raise ValueError(f"RPC não suporta requisições em lote: {body}")
+
+    results: List[Any] = [None] * size
+    for item in body:
+        idx = item.get("id")
+        if isinstance(idx, int) and 0 <= idx < size:
+            results[idx] = item.get("result")
+    return results
+
+def batch_eth_call(
+    calls: List[tuple],
+    rpc_url: Optional[str] = None,
+    timeout: float = 10.0
+) -> List[Optional[bytes]]:
+    """
+    Envia vários eth_call (to, data) num único POST JSON-RPC em lote.
+    Retorna os bytes de cada resposta na mesma ordem (None se a chamada reverteu).
+    """
+    results = batch_rpc(
+        [("eth_call", [{"to": to, "data": data}, "latest"]) for to, data in calls],
+        rpc_url=rpc_url,
+        timeout=timeout
+    )
+    return [bytes.fromhex(r[2:]) if r else None for r in results]
+
+class RpcBatcher:
+    """
+    Agrupa eth_call concorrentes num único POST JSON-RPC em lote.
+
+    Cada `eth_call` devolve um future; todas as chamadas enfileiradas no mesmo
+    ciclo do event loop saem juntas no tick seguinte. O resultado são os bytes
+    de retorno, ou None se a chamada reverteu.
+    """
+
+    def __init__(self, rpc_url: Optional[str] = None, timeout: float = 10.0):
+        self.rpc_url = rpc_url or config["RPC_URL"]
+        self.timeout = timeout
+        self._pending: List[tuple] = []
+        self._session = None
+        self._session_loop = None
+        self._tasks: set = set()  # referências fortes aos flushes em andamento
+
+    def eth_call(self, to: str, data: str) -> "asyncio.Future":
+        loop = asyncio.get_running_loop()
+        future = loop.create_future()
+        if not self._pending:
+            loop.call_soon(self._start_flush, loop)
+        self._pending.append((to, data, future))
+        return future
+
+    def _start_flush(self, loop) -> None:
+        batch, self._pending = self._pending, []
+        if batch:
+            task = loop.create_task(self._flush(batch))
+            self._tasks.add(task)
+            task.add_done_callback(self._tasks.discard)
+
+    async def _flush(self, batch: List[tuple]) -> None:
+        calls = [("eth_call", [{"to": to, "data": data}, "latest"]) for to, data, _ in batch]
+        try:
+            results = await self._post(calls)
+        except Exception as e:
+            logger.warning(f"Falha no lote JSON-RPC ({len(calls)} chamadas): {e}")
+            for _, _, future in batch:
+                if not future.done():
+                    future.set_exception(e)
+            return
+
+        for (_, _, future), result in zip(batch, results):
+            if not future.done():
+                future.set_result(bytes.fromhex(result[2:]) if result else None)
+
+    async def _post(self, calls: List[tuple]) -> List[Any]:
+        if not (HTTPX_AVAILABLE or AIOHTTP_AVAILABLE):
+            return await asyncio.to_thread(batch_rpc, calls, self.rpc_url, self.timeout)
+
+        payload = [
+            {"jsonrpc": "2.0", "id": i, "method": method, "params": params}
+            for i, (method, params) in enumerate(calls)
+        ]
+        if HTTPX_AVAILABLE:
+            # Mesmo cliente (e conexão HTTP/2) do provider Web3
+            resp = await shared_httpx_client().post(
+                self.rpc_url,
+                json=payload,
+                timeout=httpx.Timeout(self.timeout, connect=HTTPX_CONNECT_TIMEOUT),
+            )
+            resp.raise_for_status()
+            return _map_batch_results(resp.json(), len(calls))
+
+        async with self._get_session().post(self.rpc_url, json=payload) as resp:
+            resp.raise_for_status()
+            return _map_batch_results(await resp.json(content_type=None), len(calls))
+
+    def _get_session(self):
+        # A sessão aiohttp fica presa ao loop em que foi criada
+        loop = asyncio.get_running_loop()
+        if self._session is None or self._session.closed or self._session_loop is not loop:
+            self._session = aiohttp.ClientSession(timeout=aiohttp.ClientTimeout(total=self.timeout))
+            self._session_loop = loop
+        return self._session
+
+    async def close(self) -> None:
+        if self._session is not None and not self._session.closed:
+            await self._session.close()
 
 # --- Funções de Verificação de Conexão (Adicionadas para main_final.py) ---
 
@@ -38,7 +336,7 @@ def check_web3_connection() -> bool:
             logger.error("Nenhuma URL de RPC (RPC_URL ou BASE_RPC_URL) encontrada na configuração.")
             return False
             
-        w3 = Web3(Web3.HTTPProvider(rpc_url))
+        w3 = Web3(http_provider(rpc_url))
         if w3.is_connected():
             logger.info("Conexão com o nó Web3 (RPC) bem-sucedida.")
             return True
@@ -95,7 +393,7 @@ async def is_contract(address: str) -> bool:
             return True  # Assume que é contrato se não pode verificar
         
         from web3 import Web3
-        w3 = Web3(Web3.HTTPProvider(config["RPC_URL"]))
+        w3 = Web3(http_provider())
         code = w3.eth.get_code(address)
         return len(code) > 0
     except:
@@ -114,7 +412,7 @@ async def get_token_info(token_address: str) -> Optional[dict]:
             }
         
         from web3 import Web3
-        w3 = Web3(Web3.HTTPProvider(config["RPC_URL"]))
+        w3 = Web3(http_provider())
         
         # ABI básico do ERC20
         erc20_abi = [
@@ -165,7 +463,7 @@ async def calculate_liquidity(pair_address: str) -> Decimal:
             return Decimal("1.0")  # Placeholder
         
         from web3 import Web3
-        w3 = Web3(Web3.HTTPProvider(config["RPC_URL"]))
+        w3 = Web3(http_provider())
         
         # ABI básico do par
         pair_abi = [
@@ -225,7 +523,7 @@ async def get_wallet_balance() -> Decimal:
             return Decimal("0.001990")  # Valor configurado
         
         from web3 import Web3
-        w3 = Web3(Web3.HTTPProvider(config["RPC_URL"]))
+        w3 = Web3(http_provider())
         
         balance_wei = w3.eth.get_balance(config["WALLET"])
         balance_eth = Decimal(str(balance_wei / 1e18))
@@ -258,14 +556,17 @@ def _notify(text: str, via_alert: bool = False) -> None:
         logger.error(f"Falha ao enviar Telegram: {e}", exc_info=True)
 
 
+# Inclui o backslash no padrão para escapá-lo também
+_MD_V2_SPECIAL = re.compile(r'([_\*\[\]\(\)\~\`\>\#\+\-\=\|\{\}\.\!\\])')
+
+@functools.lru_cache(maxsize=1024)
 def escape_md_v2(text: str) -> str:
     """
     Escapa caracteres especiais para MarkdownV2:
     _ * [ ] ( ) ~ ` > # + - = | { } . ! \
+    Resultado em cache: templates de alerta se repetem.
     """
-    # Inclui o backslash no padrão para escapá-lo também
-    pattern = r'([_\*\[\]\(\)\~\`\>\#\+\-\=\|\{\}\.\!\\])'
-    return re.sub(pattern, r'\\\1', text)
+    return _MD_V2_SPECIAL.sub(r'\\\1', text)
 
 
 # -------------------------------------------------------------------
@@ -475,4 +776,19 @@ def configure_rate_limiter_from_config(config):
     Implementação simplificada.
     """
     logger.info("Rate limiter configurado (implementação simplificada)")
-    pass
\ No newline at end of file
+    pass
+
+def install_uvloop() -> bool:
+    """
+    Instala o uvloop como política de event loop do asyncio, se disponível.
+    Deve ser chamado antes de criar o event loop.
+    """
+    try:
+        import uvloop
+    except ImportError:
+        logger.info("uvloop não disponível - usando event loop padrão do asyncio")
+        return False
+
+    uvloop.install()
+    logger.info("⚡ uvloop instalado como event loop")
+    return True
@@ -5,12 +5,11 @@ except ImportError:
     WEB3_AVAILABLE = False
     Web3 = None
 from eth_account import Account
-from dotenv import load_dotenv
 import os
 import telebot
 
 # Carrega variáveis do .env
-load_dotenv()
+import _bootstrap_env  # noqa: F401 (import pelo efeito colateral)
 RPC_URL = os.getenv("RPC_URL") or "https://mainnet.base.org"
 BOT_TOKEN = os.getenv("BOT_TOKEN")
 PRIVATE_KEY = os.getenv("PRIVATE_KEY")